@@ -13,5 +13,20 @@ class RecordAdmin(admin.ModelAdmin):
     ordering = ("key",)
 
 
+class TokenAdmin(admin.ModelAdmin):
+    # Tokens are created with "ara-manage createtoken" which displays their key: they can only be listed or deleted
+    list_display = ("id", "name", "user", "created")
+    search_fields = ("name", "user__username")
+    ordering = ("-id",)
+    exclude = ("digest",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(models.Record, RecordAdmin)
+admin.site.register(models.Token, TokenAdmin)
 admin.site.unregister(Group)
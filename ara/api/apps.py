@@ -2,7 +2,13 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     name = "ara.api"
+
+    def ready(self):
+        from ara.api.search import install_search_indexes
+
+        post_migrate.connect(install_search_indexes, sender=self)
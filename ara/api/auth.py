@@ -2,7 +2,9 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from django.conf import settings
-from rest_framework import permissions
+from rest_framework import authentication, exceptions, permissions
+
+from ara.api import models
 
 
 class APIAccessPermission(permissions.BasePermission):
@@ -10,3 +12,41 @@ class APIAccessPermission(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return request.user.is_authenticated if settings.READ_LOGIN_REQUIRED else True
         return request.user.is_authenticated if settings.WRITE_LOGIN_REQUIRED else True
+
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticates requests with an API token provided as an "Authorization: Token <key>" header.
+
+    Passwords are hashed with many iterations of PBKDF2 which is expensive to verify for each request, for example
+    when recording playbooks with basic authentication. Tokens are verified with a single SHA-256 instead and
+    retrieved along with their user in one query, so that deleted tokens and inactive users are refused right away.
+    """
+
+    keyword = "Token"
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header: the token must be provided without spaces.")
+
+        try:
+            key = header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header: the token contains invalid characters.")
+        return self.authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        try:
+            token = models.Token.objects.select_related("user").get(digest=models.Token.hash_key(key))
+        except models.Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        return (token.user, None)
+
+    def authenticate_header(self, request):
+        return self.keyword
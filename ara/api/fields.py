@@ -1,6 +1,8 @@
 # Copyright (c) 2022 The ARA Records Ansible authors
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import base64
+import binascii
 import collections
 import hashlib
 import json
@@ -17,6 +19,40 @@ EMPTY_LIST = zlib.compress(json.dumps([]).encode("utf8"))
 EMPTY_STRING = zlib.compress(json.dumps("").encode("utf8"))
 
 
+def bulk_get_or_create_result_contents(compressed):
+    """
+    Returns the ids of the ResultContent of many already compressed contents at once, by compressed contents.
+    Contents are identified by their sha1 so that identical results are stored once.
+    """
+    sha1s = {hashlib.sha1(contents).hexdigest(): contents for contents in compressed}
+    existing = set(models.ResultContent.objects.filter(sha1__in=sha1s).values_list("sha1", flat=True))
+    created = [
+        models.ResultContent(sha1=sha1, contents=contents) for sha1, contents in sha1s.items() if sha1 not in existing
+    ]
+    for content in created:
+        # bulk_create doesn't call save() which extracts the text of the contents
+        content.set_text()
+    # Contents created concurrently by another request are left untouched
+    models.ResultContent.objects.bulk_create(created, ignore_conflicts=True)
+
+    ids = models.ResultContent.objects.filter(sha1__in=sha1s).values_list("sha1", "id")
+    return {sha1s[sha1]: content_id for sha1, content_id in ids}
+
+
+def get_or_create_file_content(contents, compressed=None):
+    """
+    Returns the FileContent for the contents of a file, identified by their sha1, so that files are stored once.
+    The contents can be provided already compressed, in which case they are stored as-is.
+    """
+    sha1 = hashlib.sha1(contents).hexdigest()
+    if compressed is None:
+        compressed = zlib.compress(contents)
+    content_file, created = models.FileContent.objects.get_or_create(
+        sha1=sha1, defaults={"sha1": sha1, "contents": compressed}
+    )
+    return content_file
+
+
 class CompressedTextField(serializers.CharField):
     """
     Compresses text before storing it in the database.
@@ -44,6 +80,34 @@ class CompressedObjectField(serializers.JSONField):
         return zlib.compress(json.dumps(data).encode("utf8"))
 
 
+class ResultContentField(serializers.JSONField):
+    """
+    Serializes/compresses the content of a result, stored uniquely when the result is saved.
+    Decompresses/deserializes the content of a result before serving it.
+    """
+
+    def to_representation(self, obj):
+        return json.loads(zlib.decompress(obj.contents).decode("utf8"))
+
+    def to_internal_value(self, data):
+        return zlib.compress(json.dumps(data).encode("utf8"))
+
+
+class PreCompressedObjectField(serializers.CharField):
+    """
+    Accepts an object that was serialized to JSON and compressed by the client, encoded in base64.
+    It is decompressed to validate the object but stored as it was compressed.
+    """
+
+    def to_internal_value(self, data):
+        try:
+            compressed = base64.b64decode(data, validate=True)
+            json.loads(zlib.decompress(compressed).decode("utf8"))
+        except (binascii.Error, zlib.error, ValueError):
+            raise serializers.ValidationError("Expected JSON compressed with zlib and encoded in base64.")
+        return compressed
+
+
 class FileContentField(serializers.CharField):
     """
     Compresses text before storing it in the database.
@@ -54,12 +118,37 @@ class FileContentField(serializers.CharField):
         return zlib.decompress(obj.contents).decode("utf8")
 
     def to_internal_value(self, data):
-        contents = data.encode("utf8")
-        sha1 = hashlib.sha1(contents).hexdigest()
-        content_file, created = models.FileContent.objects.get_or_create(
-            sha1=sha1, defaults={"sha1": sha1, "contents": zlib.compress(contents)}
-        )
-        return content_file
+        return get_or_create_file_content(data.encode("utf8"))
+
+
+class PreCompressedFileContentField(serializers.CharField):
+    """
+    Accepts the text of a file that was compressed by the client, encoded in base64.
+    It is decompressed to identify and validate the contents but stored as it was compressed.
+    """
+
+    def to_internal_value(self, data):
+        try:
+            compressed = base64.b64decode(data, validate=True)
+            contents = zlib.decompress(compressed)
+            contents.decode("utf8")
+        except (binascii.Error, zlib.error, UnicodeDecodeError):
+            raise serializers.ValidationError("Expected text compressed with zlib and encoded in base64.")
+        return get_or_create_file_content(contents, compressed)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    A PrimaryKeyRelatedField which first looks for the object among the related objects retrieved at once
+    for every item of a list, see BulkResultSerializer. Other objects are retrieved one at a time.
+    """
+
+    def to_internal_value(self, data):
+        related_objects = getattr(self.root, "related_objects", {})
+        obj = related_objects.get((self.get_queryset().model, str(data)))
+        if obj is not None:
+            return obj
+        return super().to_internal_value(data)
 
 
 class CreatableSlugRelatedField(serializers.SlugRelatedField):
@@ -3,10 +3,15 @@
 
 import django_filters
 from django.db import models as django_models
-from django.db.models import Value
-from django.db.models.functions import Coalesce
+from django.db.models import Q
 
 from ara.api import models as ara_models
+from ara.api.search import get_search_backend
+
+
+def filter_search(queryset, name, value):
+    # Full-text search of playbooks, tasks and results, see ara.api.search
+    return get_search_backend(queryset.db).search(queryset, value)
 
 
 class BaseFilter(django_filters.rest_framework.FilterSet):
@@ -52,8 +57,9 @@ class PlaybookFilter(DateFilter):
     controller = django_filters.CharFilter(field_name="controller", lookup_expr="icontains")
     name = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
     path = django_filters.CharFilter(field_name="path", lookup_expr="icontains")
+    search = django_filters.CharFilter(method=filter_search)
     status = django_filters.MultipleChoiceFilter(
-        field_name="status", choices=ara_models.Playbook.STATUS, lookup_expr="iexact"
+        field_name="status", choices=ara_models.Playbook.STATUS, lookup_expr="exact"
     )
     label = django_filters.CharFilter(field_name="labels", lookup_expr="name__iexact")
 
@@ -75,7 +81,7 @@ class PlayFilter(DateFilter):
     playbook = django_filters.NumberFilter(field_name="playbook__id", lookup_expr="exact")
     uuid = django_filters.UUIDFilter(field_name="uuid", lookup_expr="exact")
     status = django_filters.MultipleChoiceFilter(
-        field_name="status", choices=ara_models.Play.STATUS, lookup_expr="iexact"
+        field_name="status", choices=ara_models.Play.STATUS, lookup_expr="exact"
     )
     name = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
 
@@ -99,21 +105,22 @@ class TaskFilter(DateFilter):
     playbook_path = django_filters.CharFilter(field_name="playbook__path", lookup_expr="icontains")
     play = django_filters.NumberFilter(field_name="play__id", lookup_expr="exact")
     status = django_filters.MultipleChoiceFilter(
-        field_name="status", choices=ara_models.Task.STATUS, lookup_expr="iexact"
+        field_name="status", choices=ara_models.Task.STATUS, lookup_expr="exact"
     )
     name = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
+    search = django_filters.CharFilter(method=filter_search)
     uuid = django_filters.UUIDFilter(field_name="uuid", lookup_expr="exact")
     action = django_filters.CharFilter(field_name="action", lookup_expr="iexact")
     path = django_filters.CharFilter(field_name="file__path", lookup_expr="icontains")
     lineno = django_filters.CharFilter(field_name="lineno", lookup_expr="exact")
     handler = django_filters.BooleanFilter(field_name="handler", lookup_expr="exact")
 
-    exceptions_count__gt = django_filters.NumberFilter(method="filter_exceptions_count_gt")
-    exceptions_count__lt = django_filters.NumberFilter(method="filter_exceptions_count_lt")
-    deprecations_count__gt = django_filters.NumberFilter(method="filter_deprecations_count_gt")
-    deprecations_count__lt = django_filters.NumberFilter(method="filter_deprecations_count_lt")
-    warnings_count__gt = django_filters.NumberFilter(method="filter_warnings_count_gt")
-    warnings_count__lt = django_filters.NumberFilter(method="filter_warnings_count_lt")
+    exceptions_count__gt = django_filters.NumberFilter(field_name="exceptions_count", lookup_expr="gt")
+    exceptions_count__lt = django_filters.NumberFilter(field_name="exceptions_count", lookup_expr="lt")
+    deprecations_count__gt = django_filters.NumberFilter(field_name="deprecations_count", lookup_expr="gt")
+    deprecations_count__lt = django_filters.NumberFilter(field_name="deprecations_count", lookup_expr="lt")
+    warnings_count__gt = django_filters.NumberFilter(field_name="warnings_count", lookup_expr="gt")
+    warnings_count__lt = django_filters.NumberFilter(field_name="warnings_count", lookup_expr="lt")
 
     # fmt: off
     order = django_filters.OrderingFilter(
@@ -128,36 +135,6 @@ class TaskFilter(DateFilter):
     )
     # fmt: on
 
-    def filter_exceptions_count_gt(self, queryset, name, value):
-        return queryset.annotate(exceptions_count=Coalesce(ara_models.JsonLength("exceptions"), Value(0))).filter(
-            exceptions_count__gt=value
-        )
-
-    def filter_exceptions_count_lt(self, queryset, name, value):
-        return queryset.annotate(exceptions_count=Coalesce(ara_models.JsonLength("exceptions"), Value(0))).filter(
-            exceptions_count__lt=value
-        )
-
-    def filter_deprecations_count_gt(self, queryset, name, value):
-        return queryset.annotate(deprecations_count=Coalesce(ara_models.JsonLength("deprecations"), Value(0))).filter(
-            deprecations_count__gt=value
-        )
-
-    def filter_deprecations_count_lt(self, queryset, name, value):
-        return queryset.annotate(deprecations_count=Coalesce(ara_models.JsonLength("deprecations"), Value(0))).filter(
-            deprecations_count__lt=value
-        )
-
-    def filter_warnings_count_gt(self, queryset, name, value):
-        return queryset.annotate(warnings_count=Coalesce(ara_models.JsonLength("warnings"), Value(0))).filter(
-            warnings_count__gt=value
-        )
-
-    def filter_warnings_count_lt(self, queryset, name, value):
-        return queryset.annotate(warnings_count=Coalesce(ara_models.JsonLength("warnings"), Value(0))).filter(
-            warnings_count__lt=value
-        )
-
 
 class HostFilter(BaseFilter):
     playbook = django_filters.NumberFilter(field_name="playbook__id", lookup_expr="exact")
@@ -236,13 +213,16 @@ class ResultFilter(DateFilter):
     playbook = django_filters.NumberFilter(field_name="playbook__id", lookup_expr="exact")
     task = django_filters.NumberFilter(field_name="task__id", lookup_expr="exact")
     task_name = django_filters.CharFilter(field_name="task__name", lookup_expr="icontains")
+    search = django_filters.CharFilter(method=filter_search)
     play = django_filters.NumberFilter(field_name="play__id", lookup_expr="exact")
     host = django_filters.NumberFilter(field_name="host__id", lookup_expr="exact")
     host_name = django_filters.CharFilter(field_name="host__name", lookup_expr="iexact")
     delegated_to = django_filters.NumberFilter(field_name="delegated_to__id", lookup_expr="exact")
     changed = django_filters.BooleanFilter(field_name="changed", lookup_expr="exact")
-    status = django_filters.MultipleChoiceFilter(
-        field_name="status", choices=ara_models.Result.STATUS, lookup_expr="iexact"
+    # "changed" and "ignored" results can be searched with the other statuses, "ok" and "failed" include them
+    status = django_filters.MultipleChoiceFilter(choices=ara_models.Result.EFFECTIVE_STATUS, method="filter_status")
+    effective_status = django_filters.MultipleChoiceFilter(
+        field_name="effective_status", choices=ara_models.Result.EFFECTIVE_STATUS, lookup_expr="exact"
     )
     ignore_errors = django_filters.BooleanFilter(field_name="ignore_errors", lookup_expr="exact")
 
@@ -259,6 +239,11 @@ class ResultFilter(DateFilter):
     )
     # fmt: on
 
+    def filter_status(self, queryset, name, value):
+        effective = {ara_models.Result.CHANGED, ara_models.Result.IGNORED}
+        query = Q(status__in=set(value) - effective) | Q(effective_status__in=set(value) & effective)
+        return queryset.filter(query)
+
 
 class FileFilter(BaseFilter):
     playbook = django_filters.NumberFilter(field_name="playbook__id", lookup_expr="exact")
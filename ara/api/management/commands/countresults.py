@@ -0,0 +1,29 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from django.core.management.base import BaseCommand
+
+from ara.api import models
+
+
+class Command(BaseCommand):
+    help = "Counts the results of playbooks, plays and tasks by status again, for example if the counters drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--playbook", type=int, nargs="+", default=None, help="Only count the results of these playbook ids"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Number of objects counted at once (default: 500)"
+        )
+
+    def handle(self, *args, **options):
+        for model in (models.Playbook, models.Play, models.Task):
+            queryset = model.objects.order_by("pk")
+            if options["playbook"] is not None:
+                lookup = "pk__in" if model is models.Playbook else "playbook__in"
+                queryset = queryset.filter(**{lookup: options["playbook"]})
+
+            ids = queryset.values_list("pk", flat=True)
+            model.refresh_result_counts(ids, batch_size=options["batch_size"])
+            self.stdout.write("Counted the results of %s %s" % (len(ids), model._meta.verbose_name_plural))
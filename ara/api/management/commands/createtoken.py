@@ -0,0 +1,27 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ara.api import models
+
+
+class Command(BaseCommand):
+    help = "Creates an API token for a user and prints it"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="User the token authenticates as")
+        parser.add_argument("--name", default="", help="Describes what the token is used for (default: '')")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{User.USERNAME_FIELD: options["username"]})
+        except User.DoesNotExist:
+            raise CommandError("User '%s' does not exist" % options["username"])
+
+        token, key = models.Token.objects.create_token(user, name=options["name"])
+        # Only the key is printed to stdout so that it can be captured by scripts
+        self.stderr.write("Created token %s for user '%s', it can't be displayed again:" % (token.id, user))
+        self.stdout.write(key)
@@ -0,0 +1,22 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ara.api import models
+
+
+class Command(BaseCommand):
+    help = "Deletes API tokens so that they can no longer be used"
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="+", type=int, help="Ids of the tokens to delete")
+
+    def handle(self, *args, **options):
+        tokens = models.Token.objects.filter(id__in=options["ids"])
+        missing = set(options["ids"]) - set(tokens.values_list("id", flat=True))
+        if missing:
+            raise CommandError("Tokens not found: %s" % ", ".join(str(token_id) for token_id in sorted(missing)))
+
+        count, _ = tokens.delete()
+        self.stdout.write("Deleted %s token(s)" % count)
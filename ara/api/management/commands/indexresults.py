@@ -0,0 +1,38 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from django.core.management.base import BaseCommand
+
+from ara.api import models
+
+
+class Command(BaseCommand):
+    help = "Extracts the text of result contents to search results by it, for results recorded before it was enabled"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Extract the text of every result content, for example after changing SEARCH_RESULT_KEYS",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Number of result contents extracted at once (default: 500)"
+        )
+
+    def handle(self, *args, **options):
+        queryset = models.ResultContent.objects.order_by("pk").only("pk", "contents", "text")
+        if not options["all"]:
+            queryset = queryset.filter(text="")
+
+        indexed = 0
+        last = 0
+        while True:
+            contents = list(queryset.filter(pk__gt=last)[: options["batch_size"]])
+            if not contents:
+                break
+            for content in contents:
+                content.set_text()
+            models.ResultContent.objects.bulk_update(contents, ["text"])
+            indexed += len(contents)
+            last = contents[-1].pk
+        self.stdout.write("Extracted the text of %s result contents" % indexed)
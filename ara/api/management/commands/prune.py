@@ -81,13 +81,14 @@ class Command(BaseCommand):
         playbooks = api_client.get("/api/v1/playbooks", started_before=limit_date)
 
         # TODO: Improve client validation and exception handling
-        if "count" not in playbooks:
+        if "results" not in playbooks:
             # If we didn't get an answer we can parse, it's probably due to an error 500, 403, 401, etc.
             # The client would have logged the error.
             logger.error("Client failed to retrieve results, see logs for ara.clients.offline or ara.clients.http.")
             sys.exit(1)
 
-        logger.info("Found %s playbooks matching query" % playbooks["count"])
+        # The count may be estimated or disabled (COUNT_STRATEGY): log the playbooks actually found instead
+        logger.info("Found %s playbooks matching query" % len(playbooks["results"]))
 
         for playbook in playbooks["results"]:
             if not confirm:
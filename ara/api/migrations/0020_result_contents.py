@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_task_deprecations_exceptions_warnings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResultContent",
+            fields=[
+                ("id", models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("sha1", models.CharField(max_length=40, unique=True)),
+                ("contents", models.BinaryField(max_length=4294967295)),
+            ],
+            options={
+                "db_table": "result_contents",
+            },
+        ),
+        migrations.AddField(
+            model_name="result",
+            name="result_content",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="results",
+                to="api.resultcontent",
+            ),
+        ),
+    ]
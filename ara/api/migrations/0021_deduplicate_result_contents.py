@@ -0,0 +1,73 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:10
+
+import hashlib
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def deduplicate_result_contents(apps, schema_editor):
+    # We can't import the model directly as it may be a newer version than this migration expects.
+    Result = apps.get_model("api", "Result")
+    ResultContent = apps.get_model("api", "ResultContent")
+
+    last_id = 0
+    while True:
+        results = list(Result.objects.filter(id__gt=last_id).order_by("id").only("id", "content")[:BATCH_SIZE])
+        if not results:
+            break
+
+        # Contents are looked up by batch rather than kept in memory for every distinct content
+        batch = {}
+        for result in results:
+            compressed = bytes(result.content)
+            result.sha1 = hashlib.sha1(compressed).hexdigest()
+            batch[result.sha1] = compressed
+
+        existing = set(ResultContent.objects.filter(sha1__in=batch.keys()).values_list("sha1", flat=True))
+        ResultContent.objects.bulk_create(
+            [
+                ResultContent(sha1=sha1, contents=compressed)
+                for sha1, compressed in batch.items()
+                if sha1 not in existing
+            ]
+        )
+        contents = dict(ResultContent.objects.filter(sha1__in=batch.keys()).values_list("sha1", "id"))
+
+        for result in results:
+            result.result_content_id = contents[result.sha1]
+        Result.objects.bulk_update(results, ["result_content"])
+        last_id = results[-1].id
+
+
+def restore_result_contents(apps, schema_editor):
+    # We can't import the model directly as it may be a newer version than this migration expects.
+    Result = apps.get_model("api", "Result")
+
+    last_id = 0
+    while True:
+        results = list(
+            Result.objects.filter(id__gt=last_id).order_by("id").select_related("result_content")[:BATCH_SIZE]
+        )
+        if not results:
+            break
+
+        for result in results:
+            result.content = result.result_content.contents
+
+        Result.objects.bulk_update(results, ["content"])
+        last_id = results[-1].id
+
+
+class Migration(migrations.Migration):
+    # The results are updated in their own migration: PostgreSQL doesn't allow altering the table
+    # in the same transaction as updates of its deferred foreign keys.
+
+    dependencies = [
+        ("api", "0020_result_contents"),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_result_contents, restore_result_contents),
+    ]
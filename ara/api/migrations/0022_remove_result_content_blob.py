@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0021_deduplicate_result_contents"),
+    ]
+
+    operations = [
+        # Provides a default for the column when it is added back by reversing the migration
+        migrations.AlterField(
+            model_name="result",
+            name="content",
+            field=models.BinaryField(default=b"", max_length=4294967295),
+        ),
+        migrations.RemoveField(
+            model_name="result",
+            name="content",
+        ),
+        migrations.RenameField(
+            model_name="result",
+            old_name="result_content",
+            new_name="content",
+        ),
+        migrations.AlterField(
+            model_name="result",
+            name="content",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT, related_name="results", to="api.resultcontent"
+            ),
+        ),
+    ]
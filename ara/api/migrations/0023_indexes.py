@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0022_remove_result_content_blob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(fields=["name", "updated"], name="hosts_name_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="play",
+            index=models.Index(fields=["uuid"], name="plays_uuid_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="playbook",
+            index=models.Index(fields=["status", "started"], name="playbooks_status_started_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="result",
+            index=models.Index(fields=["playbook", "started"], name="results_playbook_started_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="result",
+            index=models.Index(fields=["host", "started"], name="results_host_started_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="result",
+            index=models.Index(fields=["task", "status"], name="results_task_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["playbook", "id"], name="tasks_playbook_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["uuid"], name="tasks_uuid_idx"),
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# The conditions of the counters: results don't have an effective status yet
+COUNTERS = {
+    "results_ok": Q(status="ok", changed=False),
+    "results_changed": Q(status="ok", changed=True),
+    "results_failed": Q(status="failed", ignore_errors=False),
+    "results_ignored": Q(status="failed", ignore_errors=True),
+    "results_skipped": Q(status="skipped"),
+    "results_unreachable": Q(status="unreachable"),
+}
+
+
+def count_results(apps, schema_editor):
+    """Counts the existing results of playbooks, plays and tasks by status"""
+    # We can't import the model directly as it may be a newer
+    # version than this migration expects. We use the historical version.
+    result_model = apps.get_model("api", "Result")
+    for model_name in ("Playbook", "Play", "Task"):
+        model = apps.get_model("api", model_name)
+        lookup = model._meta.model_name
+        counts = {}
+        for field, condition in COUNTERS.items():
+            results = result_model.objects.filter(condition, **{lookup: OuterRef("pk")}).order_by()
+            count = results.values(lookup).annotate(count=Count("pk")).values("count")
+            counts[field] = Coalesce(Subquery(count), Value(0))
+        model.objects.update(**counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0024_tokens"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="results_changed",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="play",
+            name="results_failed",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="play",
+            name="results_ignored",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="play",
+            name="results_ok",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="play",
+            name="results_skipped",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="play",
+            name="results_unreachable",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="playbook",
+            name="results_changed",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="playbook",
+            name="results_failed",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="playbook",
+            name="results_ignored",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="playbook",
+            name="results_ok",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="playbook",
+            name="results_skipped",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="playbook",
+            name="results_unreachable",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="results_changed",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="results_failed",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="results_ignored",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="results_ok",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="results_skipped",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="results_unreachable",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:02
+
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+
+
+def set_effective_status(apps, schema_editor):
+    """Stores the effective status of existing results, taking changed and ignore_errors into account"""
+    # We can't import the model directly as it may be a newer
+    # version than this migration expects. We use the historical version.
+    result_model = apps.get_model("api", "Result")
+    result_model.objects.update(
+        effective_status=Case(
+            When(status="ok", changed=True, then=Value("changed")),
+            When(status="failed", ignore_errors=True, then=Value("ignored")),
+            default=F("status"),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0025_result_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="result",
+            name="effective_status",
+            field=models.CharField(
+                choices=[
+                    ("ok", "ok"),
+                    ("changed", "changed"),
+                    ("failed", "failed"),
+                    ("ignored", "ignored"),
+                    ("skipped", "skipped"),
+                    ("unreachable", "unreachable"),
+                    ("unknown", "unknown"),
+                ],
+                default="unknown",
+                editable=False,
+                max_length=25,
+            ),
+        ),
+        migrations.RunPython(set_effective_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="result",
+            index=models.Index(
+                fields=["effective_status", "started"],
+                name="results_effective_started_idx",
+            ),
+        ),
+    ]
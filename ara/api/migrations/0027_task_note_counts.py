@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:04
+
+from django.db import migrations, models
+from django.db.models import Func, IntegerField, Value
+from django.db.models.functions import Coalesce
+
+
+class JsonLength(Func):
+    """
+    Use native DB functions to count the number of items in a json list.
+    Copied from ara.api.models so that the migration doesn't depend on the current version of the models.
+    """
+
+    output_field = IntegerField()
+
+    def as_postgresql(self, compiler, connection):
+        return self.as_sql(
+            compiler, connection, function="jsonb_array_length", template="%(function)s(%(expressions)s)"
+        )
+
+    def as_mysql(self, compiler, connection):
+        return self.as_sql(compiler, connection, function="JSON_LENGTH", template="%(function)s(%(expressions)s)")
+
+    def as_sqlite(self, compiler, connection):
+        return self.as_sql(compiler, connection, function="json_array_length", template="%(function)s(%(expressions)s)")
+
+
+def set_note_counts(apps, schema_editor):
+    """Counts the warnings, deprecations and exceptions of existing tasks"""
+    # We can't import the model directly as it may be a newer
+    # version than this migration expects. We use the historical version.
+    task_model = apps.get_model("api", "Task")
+    task_model.objects.update(
+        warnings_count=Coalesce(JsonLength("warnings"), Value(0)),
+        deprecations_count=Coalesce(JsonLength("deprecations"), Value(0)),
+        exceptions_count=Coalesce(JsonLength("exceptions"), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0026_result_effective_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="deprecations_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="exceptions_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="warnings_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(set_note_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["warnings_count"], name="tasks_warnings_count_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["deprecations_count"], name="tasks_deprecations_count_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["exceptions_count"], name="tasks_exceptions_count_idx"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+def drop_result_contents_search(apps, schema_editor):
+    # The triggers installed by the sqlite search backend refer to the text of result contents
+    # and prevent removing the column when the migration is reversed.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in ["insert", "delete", "update"]:
+        schema_editor.execute("DROP TRIGGER IF EXISTS result_contents_search_%s" % trigger)
+    schema_editor.execute("DROP TABLE IF EXISTS result_contents_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0027_task_note_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resultcontent",
+            name="text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, drop_result_contents_search),
+    ]
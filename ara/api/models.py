@@ -1,10 +1,18 @@
 # Copyright (c) 2022 The ARA Records Ansible authors
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import collections
+import hashlib
+import json
+import secrets
 import uuid
+import zlib
 
-from django.db import models
-from django.db.models import Func, IntegerField
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Func, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from ara.setup import ara_version
@@ -78,13 +86,81 @@ class Duration(Base):
     ended = models.DateTimeField(blank=True, null=True)
     duration = models.DurationField(blank=True, null=True)
 
-    def save(self, *args, **kwargs):
+    def set_duration(self):
         # Compute duration based on available timestamps
         if self.ended is not None:
             self.duration = self.ended - self.started
+
+    def save(self, *args, **kwargs):
+        self.set_duration()
         return super().save(*args, **kwargs)
 
 
+class ResultCounts(models.Model):
+    """
+    Abstract model for models counting their results by status.
+    The counters are maintained as results are created, updated and deleted so that they don't need to be
+    counted from the results.
+    """
+
+    class Meta:
+        abstract = True
+
+    results_ok = models.PositiveIntegerField(default=0, editable=False)
+    results_changed = models.PositiveIntegerField(default=0, editable=False)
+    results_failed = models.PositiveIntegerField(default=0, editable=False)
+    results_ignored = models.PositiveIntegerField(default=0, editable=False)
+    results_skipped = models.PositiveIntegerField(default=0, editable=False)
+    results_unreachable = models.PositiveIntegerField(default=0, editable=False)
+
+    @classmethod
+    def refresh_result_counts(cls, ids, batch_size=500):
+        """
+        Counts the results of objects from scratch, for example after results were deleted along with a host or
+        for results recorded before the counters existed.
+        """
+        lookup = cls._meta.model_name
+        counters = {field: Count("pk", filter=condition) for field, condition in Result.COUNTERS.items()}
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            objects = {pk: cls(pk=pk, **dict.fromkeys(counters, 0)) for pk in ids[start:end]}
+            counts = Result.objects.filter(**{"%s__in" % lookup: objects.keys()}).values(lookup).order_by()
+            for count in counts.annotate(**counters):
+                obj = objects[count.pop(lookup)]
+                for field, value in count.items():
+                    setattr(obj, field, value)
+            cls.objects.bulk_update(objects.values(), list(counters))
+
+
+def update_result_counts(counts):
+    """
+    Increments the result counters of playbooks, plays and tasks from a Counter of the results to count,
+    provided by Result.get_counted(). Negative numbers decrement the counters, for example when results are deleted.
+    Counters are incremented by the database so that concurrent increments are not lost.
+    """
+    updates = collections.defaultdict(collections.Counter)
+    for (playbook, play, task, field), count in counts.items():
+        if field is None or not count:
+            continue
+        for model, pk in ((Playbook, playbook), (Play, play), (Task, task)):
+            updates[(model, pk)][field] += count
+
+    for (model, pk), fields in updates.items():
+        model.objects.filter(pk=pk).update(**{field: counter_expression(field, count) for field, count in fields.items()})
+
+
+def counter_expression(field, count):
+    """
+    Returns the expression of a counter incremented by count. Decrements stop at 0 rather than failing on the
+    constraint of the field, for example for results recorded before the counters existed.
+    """
+    if count >= 0:
+        return F(field) + count
+    # The counter is compared rather than decremented first since it may be unsigned (i.e, mysql)
+    return Case(When(**{"%s__gte" % field: -count}, then=F(field) + count), default=Value(0))
+
+
 class Label(Base):
     """
     A label is a generic container meant to group or correlate different
@@ -106,7 +182,43 @@ class Label(Base):
         return "<Label %s: %s>" % (self.id, self.name)
 
 
-class Playbook(Duration):
+class ItemCountQuerySet(models.QuerySet):
+    # Relationships counted by the "items" of playbooks, plays and tasks
+    ITEMS = ["plays", "tasks", "results", "hosts", "files", "records"]
+
+    def with_item_counts(self):
+        """
+        Annotates each object with the number of its related objects (i.e, "tasks_count") in the same query instead
+        of counting them with an additional query for each object and relationship.
+        """
+        counts = {}
+        for item in self.ITEMS:
+            try:
+                relation = self.model._meta.get_field(item)
+            except FieldDoesNotExist:
+                continue
+            field = relation.field.name
+            related = relation.related_model.objects.filter(**{field: OuterRef("pk")}).order_by().values(field)
+            count = related.annotate(count=Count("pk")).values("count")
+            counts["%s_count" % item] = Coalesce(Subquery(count, output_field=IntegerField()), 0)
+        return self.annotate(**counts)
+
+
+def prefetch_item_counts(queryset, *lookups):
+    """
+    Prefetches the playbooks, plays or tasks related to the objects of a queryset along with their item counts,
+    for serializers nesting them. For example: prefetch_item_counts(Result.objects.all(), "playbook", "task")
+    """
+    prefetches = []
+    for lookup in lookups:
+        model = queryset.model
+        for name in lookup.split("__"):
+            model = model._meta.get_field(name).related_model
+        prefetches.append(models.Prefetch(lookup, queryset=model.objects.with_item_counts()))
+    return queryset.prefetch_related(*prefetches)
+
+
+class Playbook(Duration, ResultCounts):
     """
     An entry in the 'playbooks' table represents a single execution of the
     ansible or ansible-playbook commands. All the data for that execution
@@ -115,6 +227,9 @@ class Playbook(Duration):
 
     class Meta:
         db_table = "playbooks"
+        indexes = [
+            models.Index(fields=["status", "started"], name="playbooks_status_started_idx"),
+        ]
 
     # A playbook in ARA can be running (in progress), completed (succeeded) or failed.
     UNKNOWN = "unknown"
@@ -142,6 +257,8 @@ class Playbook(Duration):
     controller = models.CharField(max_length=255, null=True, default="localhost")
     user = models.CharField(max_length=255, null=True)
 
+    objects = ItemCountQuerySet.as_manager()
+
     def __str__(self):
         return "<Playbook %s>" % self.id
 
@@ -200,7 +317,7 @@ class Record(Base):
         return "<Record %s:%s>" % (self.id, self.key)
 
 
-class Play(Duration):
+class Play(Duration, ResultCounts):
     """
     Data about Ansible plays.
     Hosts, tasks and results are children of an Ansible play.
@@ -208,6 +325,9 @@ class Play(Duration):
 
     class Meta:
         db_table = "plays"
+        indexes = [
+            models.Index(fields=["uuid"], name="plays_uuid_idx"),
+        ]
 
     # A play in ARA can be running (in progress) or completed (regardless of success or failure)
     UNKNOWN = "unknown"
@@ -221,15 +341,24 @@ class Play(Duration):
     status = models.CharField(max_length=25, choices=STATUS, default=UNKNOWN)
     playbook = models.ForeignKey(Playbook, on_delete=models.CASCADE, related_name="plays")
 
+    objects = ItemCountQuerySet.as_manager()
+
     def __str__(self):
         return "<Play %s:%s>" % (self.id, self.name)
 
 
-class Task(Duration):
+class Task(Duration, ResultCounts):
     """Data about Ansible tasks."""
 
     class Meta:
         db_table = "tasks"
+        indexes = [
+            models.Index(fields=["playbook", "id"], name="tasks_playbook_id_idx"),
+            models.Index(fields=["uuid"], name="tasks_uuid_idx"),
+            models.Index(fields=["warnings_count"], name="tasks_warnings_count_idx"),
+            models.Index(fields=["deprecations_count"], name="tasks_deprecations_count_idx"),
+            models.Index(fields=["exceptions_count"], name="tasks_exceptions_count_idx"),
+        ]
 
     # Possible statuses for a task
     # A failed task is expected to have at least one failed result
@@ -257,14 +386,29 @@ class Task(Duration):
     warnings = models.JSONField(default=list)
     deprecations = models.JSONField(default=list)
     exceptions = models.JSONField(default=list)
+    # Number of warnings, deprecations and exceptions, stored for searching tasks by them
+    warnings_count = models.PositiveIntegerField(default=0, editable=False)
+    deprecations_count = models.PositiveIntegerField(default=0, editable=False)
+    exceptions_count = models.PositiveIntegerField(default=0, editable=False)
 
     play = models.ForeignKey(Play, on_delete=models.CASCADE, related_name="tasks")
     file = models.ForeignKey(File, on_delete=models.CASCADE, related_name="tasks")
     playbook = models.ForeignKey(Playbook, on_delete=models.CASCADE, related_name="tasks")
 
+    objects = ItemCountQuerySet.as_manager()
+
     def __str__(self):
         return "<Task %s:%s>" % (self.name, self.id)
 
+    def set_note_counts(self):
+        self.warnings_count = len(self.warnings or [])
+        self.deprecations_count = len(self.deprecations or [])
+        self.exceptions_count = len(self.exceptions or [])
+
+    def save(self, *args, **kwargs):
+        self.set_note_counts()
+        return super().save(*args, **kwargs)
+
 
 class Host(Base):
     """
@@ -274,6 +418,10 @@ class Host(Base):
     class Meta:
         db_table = "hosts"
         unique_together = ("name", "playbook")
+        indexes = [
+            # For finding the latest host by name
+            models.Index(fields=["name", "updated"], name="hosts_name_updated_idx"),
+        ]
 
     name = models.CharField(max_length=255)
     facts = models.BinaryField(max_length=(2**32) - 1)
@@ -311,6 +459,81 @@ class LatestHost(models.Model):
         return "<LatestHost %s>" % (self.name)
 
 
+class ResultContentQuerySet(models.QuerySet):
+    def orphaned(self):
+        """Contents no longer referred to by any result"""
+        return self.filter(results__isnull=True)
+
+    def delete_orphans(self, ids, batch_size=500):
+        """
+        Deletes the contents with the given ids that are no longer referred to by any result.
+        Used after deleting results in order to garbage collect their contents.
+        """
+        ids = list(ids)
+        deleted = 0
+        while ids:
+            batch, ids = ids[:batch_size], ids[batch_size:]
+            count, _ = self.filter(id__in=batch).orphaned().delete()
+            deleted += count
+        return deleted
+
+
+class ResultContent(Base):
+    """
+    Contents of a uniquely stored and compressed result.
+    Identical results (i.e, skipped or debug tasks across hosts) share the
+    same contents, identified by the sha1 of the compressed contents.
+    """
+
+    class Meta:
+        db_table = "result_contents"
+
+    sha1 = models.CharField(max_length=40, unique=True)
+    contents = models.BinaryField(max_length=(2**32) - 1)
+    # Text of the contents indexed to search results by it, see ara.api.search
+    text = models.TextField(blank=True, default="", editable=False)
+
+    objects = ResultContentQuerySet.as_manager()
+
+    def __str__(self):
+        return "<ResultContent %s:%s>" % (self.id, self.sha1)
+
+    def set_text(self):
+        """
+        Extracts the keys of the contents listed by the SEARCH_RESULT_KEYS setting (i.e, msg, stdout and stderr),
+        including the keys of the results of loops, up to SEARCH_RESULT_MAX_LENGTH characters.
+        Nothing is extracted by default, which spares decompressing the contents when they are stored.
+        """
+        self.text = ""
+        if not settings.SEARCH_RESULT_KEYS:
+            return
+
+        try:
+            contents = json.loads(zlib.decompress(self.contents).decode("utf8"))
+        except (zlib.error, ValueError):
+            # Contents that can't be decoded aren't searchable but are stored regardless
+            return
+        if not isinstance(contents, dict):
+            return
+        items = [contents]
+        if isinstance(contents.get("results"), list):
+            items.extend(item for item in contents["results"] if isinstance(item, dict))
+
+        texts = []
+        for item in items:
+            for key in settings.SEARCH_RESULT_KEYS:
+                value = item.get(key)
+                if value not in (None, "", [], {}):
+                    texts.append(value if isinstance(value, str) else json.dumps(value))
+        self.text = "\n".join(texts)[: settings.SEARCH_RESULT_MAX_LENGTH]
+
+    def save(self, *args, **kwargs):
+        # Contents are identified by their sha1 and never change once stored
+        if self._state.adding:
+            self.set_text()
+        return super().save(*args, **kwargs)
+
+
 class Result(Duration):
     """
     Data about Ansible results.
@@ -319,6 +542,12 @@ class Result(Duration):
 
     class Meta:
         db_table = "results"
+        indexes = [
+            models.Index(fields=["playbook", "started"], name="results_playbook_started_idx"),
+            models.Index(fields=["host", "started"], name="results_host_started_idx"),
+            models.Index(fields=["task", "status"], name="results_task_status_idx"),
+            models.Index(fields=["effective_status", "started"], name="results_effective_started_idx"),
+        ]
 
     # Ansible statuses
     OK = "ok"
@@ -327,6 +556,9 @@ class Result(Duration):
     UNREACHABLE = "unreachable"
     # ARA specific status, it's the default when not specified
     UNKNOWN = "unknown"
+    # Effective statuses of results that take changed and ignore_errors into account
+    CHANGED = "changed"
+    IGNORED = "ignored"
 
     # fmt:off
     STATUS = (
@@ -336,14 +568,30 @@ class Result(Duration):
         (UNREACHABLE, "unreachable"),
         (UNKNOWN, "unknown"),
     )
+    EFFECTIVE_STATUS = (
+        (OK, "ok"),
+        (CHANGED, "changed"),
+        (FAILED, "failed"),
+        (IGNORED, "ignored"),
+        (SKIPPED, "skipped"),
+        (UNREACHABLE, "unreachable"),
+        (UNKNOWN, "unknown"),
+    )
     # fmt:on
 
+    # Counters of playbooks, plays and tasks for each effective status of their results
+    COUNTERS = {
+        "results_%s" % status: Q(effective_status=status)
+        for status in (OK, CHANGED, FAILED, IGNORED, SKIPPED, UNREACHABLE)
+    }
+
     status = models.CharField(max_length=25, choices=STATUS, default=UNKNOWN)
     changed = models.BooleanField(default=False)
     ignore_errors = models.BooleanField(default=False)
+    # The status taking changed and ignore_errors into account, stored for searching results by it
+    effective_status = models.CharField(max_length=25, choices=EFFECTIVE_STATUS, default=UNKNOWN, editable=False)
 
-    # todo use a single Content table
-    content = models.BinaryField(max_length=(2**32) - 1)
+    content = models.ForeignKey(ResultContent, on_delete=models.PROTECT, related_name="results")
     host = models.ForeignKey(Host, on_delete=models.CASCADE, related_name="results")
     delegated_to = models.ManyToManyField(Host)
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="results")
@@ -352,3 +600,85 @@ class Result(Duration):
 
     def __str__(self):
         return "<Result %s, %s>" % (self.id, self.status)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembers how the result was counted in order to update the counters if that changes
+        if {"effective_status", "playbook_id", "play_id", "task_id"}.issubset(field_names):
+            instance._counted = instance.get_counted()
+        return instance
+
+    def get_effective_status(self):
+        if self.status == self.OK and self.changed:
+            return self.CHANGED
+        elif self.status == self.FAILED and self.ignore_errors:
+            return self.IGNORED
+        else:
+            return self.status
+
+    def set_effective_status(self):
+        self.effective_status = self.get_effective_status()
+
+    def get_counted(self):
+        """
+        Returns the objects and the counter the result is counted in, for update_result_counts().
+        Results with an unknown status aren't counted.
+        """
+        field = "results_%s" % self.effective_status
+        return (self.playbook_id, self.play_id, self.task_id, field if field in self.COUNTERS else None)
+
+    def save(self, *args, **kwargs):
+        counts = collections.Counter()
+        if not self._state.adding:
+            counted = getattr(self, "_counted", None)
+            if counted is None:
+                counted = Result.objects.get(pk=self.pk).get_counted()
+            counts[counted] -= 1
+        self.set_effective_status()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._counted = self.get_counted()
+            counts[self._counted] += 1
+            update_result_counts(counts)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            update_result_counts({self.get_counted(): -1})
+        return deleted
+
+
+class TokenQuerySet(models.QuerySet):
+    def create_token(self, user, name=""):
+        """
+        Creates a token for a user and returns it along with its key.
+        Only a hash of the key is stored: the key can't be retrieved afterwards.
+        """
+        key = secrets.token_urlsafe(32)
+        token = self.create(user=user, name=name, digest=Token.hash_key(key))
+        return token, key
+
+
+class Token(Base):
+    """
+    API tokens authenticate requests on behalf of a user, see ara.api.auth.TokenAuthentication.
+    """
+
+    class Meta:
+        db_table = "tokens"
+
+    name = models.CharField(max_length=255, blank=True, default="")
+    # SHA-256 of the key of the token
+    digest = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="ara_tokens")
+
+    objects = TokenQuerySet.as_manager()
+
+    @staticmethod
+    def hash_key(key):
+        # Keys are long and random: unlike passwords, they don't need a slow hash to resist brute force
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def __str__(self):
+        return "<Token %s:%s>" % (self.id, self.name)
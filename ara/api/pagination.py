@@ -0,0 +1,187 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.template import loader
+from rest_framework import pagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+COUNT_STRATEGIES = ["exact", "estimated", "disabled"]
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination following the ordering of the queryset (i.e, "-id" or "-started") instead of an offset:
+    each page is filtered from the position of the last object of the previous page so that walking a large
+    collection is linear overall instead of scanning and counting every previous object for each page.
+    """
+
+    page_size_query_param = "limit"
+    # Fields that can be used as the position of the cursor in the ordering
+    cursor_fields = ["id", "pk", "created", "updated", "started"]
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(queryset.query.order_by) or ["-pk"]
+        field = ordering[0].lstrip("-")
+        if field not in self.cursor_fields:
+            raise ValidationError(
+                {"cursor": "Cursor pagination requires ordering by one of: %s" % ", ".join(self.cursor_fields)}
+            )
+
+        # Break ties between objects sharing the same position to keep the ordering stable
+        if field != "id" and field != "pk":
+            ordering.append("-pk" if ordering[0].startswith("-") else "pk")
+        return tuple(ordering)
+
+
+class LimitOffsetPagination(pagination.LimitOffsetPagination):
+    """
+    Paginates with a limit and offset by default or with a cursor when the "cursor" parameter is provided.
+    The cursor can be empty to request the first page: the following pages are linked by "next" and "previous".
+
+    Objects are counted according to the COUNT_STRATEGY setting: "exact", "estimated" from the statistics of the
+    database or "disabled". Counting can also be disabled for a request with "count=false".
+    """
+
+    cursor_pagination_class = CursorPagination
+    # Whether to paginate with a limit and offset rather than failing when the ordering can't be used by a cursor
+    cursor_fallback = False
+    # Estimates below this number of objects are replaced by an exact count, estimates being least accurate for
+    # small numbers of objects
+    estimate_threshold = 10000
+    # Seconds during which counts are cached when the database doesn't provide estimates (i.e, sqlite)
+    count_cache_timeout = 60
+
+    def get_count_strategy(self, request):
+        if request.query_params.get("count", "").lower() == "false":
+            return "disabled"
+        if settings.COUNT_STRATEGY not in COUNT_STRATEGIES:
+            raise ImproperlyConfigured("COUNT_STRATEGY must be one of: %s" % ", ".join(COUNT_STRATEGIES))
+        return settings.COUNT_STRATEGY
+
+    def get_estimated_count(self, queryset):
+        """
+        Returns the number of objects of a queryset estimated by the query planner of the database, or an exact count
+        cached for count_cache_timeout if the database doesn't provide estimates.
+        Returns whether the count may be inexact as well.
+        """
+        connection = connections[queryset.db]
+        sql, params = queryset.query.sql_with_params()
+        estimate = None
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+        elif connection.vendor == "mysql":
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN " + sql, params)
+                columns = [column[0].lower() for column in cursor.description]
+                estimate = int(cursor.fetchone()[columns.index("rows")] or 0)
+
+        if estimate is None:
+            key = "%s:%s:%s" % (connection.settings_dict["NAME"], sql, params)
+            key = "ara-count-%s" % hashlib.sha1(key.encode("utf-8")).hexdigest()
+            count = cache.get(key)
+            if count is None:
+                count = queryset.count()
+                cache.set(key, count, self.count_cache_timeout)
+            # The count may have changed since it was cached
+            return count, True
+
+        if estimate >= self.estimate_threshold:
+            return estimate, True
+        return queryset.count(), False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_pagination = None
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            cursor_pagination = self.cursor_pagination_class()
+            try:
+                page = cursor_pagination.paginate_queryset(queryset, request, view)
+            except ValidationError:
+                if not self.cursor_fallback:
+                    raise
+            else:
+                self.cursor_pagination = cursor_pagination
+                self.display_page_controls = cursor_pagination.display_page_controls
+                return page
+
+        self.count_strategy = self.get_count_strategy(request)
+        self.count_estimated = False
+        if self.count_strategy == "exact":
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+
+        self.count = None
+        if self.count_strategy == "estimated":
+            self.count, self.count_estimated = self.get_estimated_count(queryset)
+
+        # The count isn't known exactly: retrieve an additional object to know whether there is a next page
+        start, end = self.offset, self.offset + self.limit + 1
+        page = list(queryset[start:end])
+        self.has_next = len(page) > self.limit
+        self.page = page[: self.limit]
+        if self.template is not None and (self.has_next or self.offset):
+            self.display_page_controls = True
+        return self.page
+
+    def has_next_page(self):
+        if self.count_strategy == "exact":
+            return self.offset + self.limit < self.count
+        return self.has_next
+
+    def get_next_link(self):
+        if not self.has_next_page():
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("count_estimated", self.count_estimated),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        # The count isn't provided when counting is disabled
+        response_schema["properties"]["count"]["nullable"] = True
+        response_schema["properties"]["count_estimated"] = {"type": "boolean", "example": False}
+        return response_schema
+
+    def to_html(self):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.to_html()
+        if self.count is None:
+            # Pages can't be numbered without a count: they are only linked by previous and next, like with a cursor
+            template = loader.get_template(self.cursor_pagination_class.template)
+            return template.render({"previous_url": self.get_previous_link(), "next_url": self.get_next_link()})
+        return super().to_html()
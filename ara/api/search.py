@@ -0,0 +1,198 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from functools import reduce
+from operator import or_
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from ara.api import models
+
+
+class SearchBackend:
+    """
+    Searches the text of playbooks, tasks and results for every word of a search, without a full-text index:
+    each word is matched with a case-insensitive "contains" against every field.
+    Results are searched by the text extracted from their contents, see ResultContent.set_text().
+
+    Backends for databases providing full-text indexes install them after migrations and search with them instead.
+    """
+
+    # Fields searched for each model
+    fields = {
+        models.Playbook: ["name", "path"],
+        models.Task: ["name"],
+        models.ResultContent: ["text"],
+    }
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        """
+        Creates the indexes used for searching if they don't exist, called after running migrations.
+        """
+
+    def search(self, queryset, search):
+        """
+        Returns the objects of the queryset matching every word of the search.
+        """
+        words = search.split()
+        if not words:
+            return queryset
+        if queryset.model is models.Result:
+            contents = self.match(models.ResultContent.objects.all(), words)
+            return queryset.filter(content__in=contents.values("pk"))
+        return self.match(queryset, words)
+
+    def match(self, queryset, words):
+        fields = self.fields[queryset.model]
+        for word in words:
+            queryset = queryset.filter(reduce(or_, [Q(**{"%s__icontains" % field: word}) for field in fields]))
+        return queryset
+
+    def get_columns(self, model):
+        return [model._meta.get_field(field).column for field in self.fields[model]]
+
+    def get_tables(self):
+        # The tables and columns that are searched
+        for model in self.fields:
+            yield model._meta.db_table, self.get_columns(model)
+
+
+class SqliteSearchBackend(SearchBackend):
+    """
+    Searches with FTS5 tables which index the searched columns of each table ("<table>_search").
+    The FTS5 tables don't store a copy of the text and are kept up to date by triggers on the indexed tables.
+    """
+
+    def install(self):
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            for table, columns in self.get_tables():
+                index = "%s_search" % table
+                # Migrations re-create tables in order to alter them with sqlite, which drops their triggers
+                triggers = ["%s_insert" % index, "%s_delete" % index, "%s_update" % index]
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)", triggers
+                )
+                if cursor.fetchone()[0] == len(triggers):
+                    continue
+
+                names = ", ".join(quote(column) for column in columns)
+                old = ", ".join("old.%s" % quote(column) for column in columns)
+                new = ", ".join("new.%s" % quote(column) for column in columns)
+                delete = "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.id, %s);" % (index, index, names, old)
+                insert = "INSERT INTO %s(rowid, %s) VALUES (new.id, %s);" % (index, names, new)
+                cursor.execute("DROP TABLE IF EXISTS %s" % index)
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE %s USING fts5(%s, content='%s', content_rowid='id')" % (index, names, table)
+                )
+                for trigger in triggers:
+                    cursor.execute("DROP TRIGGER IF EXISTS %s" % trigger)
+                cursor.execute("CREATE TRIGGER %s_insert AFTER INSERT ON %s BEGIN %s END" % (index, table, insert))
+                cursor.execute("CREATE TRIGGER %s_delete AFTER DELETE ON %s BEGIN %s END" % (index, table, delete))
+                cursor.execute(
+                    "CREATE TRIGGER %s_update AFTER UPDATE OF %s ON %s BEGIN %s %s END"
+                    % (index, names, table, delete, insert)
+                )
+                # Indexes the existing rows
+                cursor.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (index, index))
+
+    def match(self, queryset, words):
+        # Words are quoted so that they are matched as-is rather than as FTS5 query syntax
+        query = " ".join('"%s"' % word.replace('"', '""') for word in words)
+        index = "%s_search" % queryset.model._meta.db_table
+        sql = "SELECT rowid FROM %s WHERE %s MATCH %%s" % (index, index)
+        return queryset.filter(pk__in=RawSQL(sql, [query]))
+
+
+class PostgresqlSearchBackend(SearchBackend):
+    """
+    Searches with GIN indexes of the text search vectors of the searched columns of each table ("<table>_search").
+    """
+
+    def get_vector(self, columns):
+        # The expression must be identical in the index and the queries for the index to be used
+        text = " || ' ' || ".join("coalesce(%s, '')" % self.connection.ops.quote_name(column) for column in columns)
+        return "to_tsvector('simple', %s)" % text
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            for table, columns in self.get_tables():
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS %s_search ON %s USING GIN ((%s))"
+                    % (table, table, self.get_vector(columns))
+                )
+
+    def match(self, queryset, words):
+        vector = self.get_vector(self.get_columns(queryset.model))
+        sql = "SELECT id FROM %s WHERE %s @@ plainto_tsquery('simple', %%s)" % (queryset.model._meta.db_table, vector)
+        return queryset.filter(pk__in=RawSQL(sql, [" ".join(words)]))
+
+
+class MysqlSearchBackend(SearchBackend):
+    """
+    Searches with FULLTEXT indexes of the searched columns of each table ("<table>_search").
+    """
+
+    def install(self):
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            for table, columns in self.get_tables():
+                cursor.execute(
+                    "SELECT 1 FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+                    [table, "%s_search" % table],
+                )
+                if cursor.fetchone() is None:
+                    names = ", ".join(quote(column) for column in columns)
+                    cursor.execute("ALTER TABLE %s ADD FULLTEXT INDEX %s_search (%s)" % (table, table, names))
+
+    def match(self, queryset, words):
+        names = ", ".join(self.connection.ops.quote_name(column) for column in self.get_columns(queryset.model))
+        # Every word is required and matched as a phrase rather than as boolean query syntax
+        query = " ".join('+"%s"' % word.replace('"', "") for word in words)
+        sql = "SELECT id FROM %s WHERE MATCH (%s) AGAINST (%%s IN BOOLEAN MODE)" % (
+            queryset.model._meta.db_table,
+            names,
+        )
+        return queryset.filter(pk__in=RawSQL(sql, [query]))
+
+
+BACKENDS = {
+    "sqlite": SqliteSearchBackend,
+    "postgresql": PostgresqlSearchBackend,
+    "mysql": MysqlSearchBackend,
+}
+
+
+def get_search_backend(using="default"):
+    """
+    Returns the search backend of a database according to the SEARCH_BACKEND setting.
+    """
+    connection = connections[using]
+    if settings.SEARCH_BACKEND == "auto":
+        backend = BACKENDS.get(connection.vendor, SearchBackend)
+    else:
+        backend = import_string(settings.SEARCH_BACKEND)
+    return backend(connection)
+
+
+def install_search_indexes(sender, using="default", apps=None, **kwargs):
+    """
+    Installs the indexes of the search backend once the database is migrated, see ApiConfig.
+    """
+    # Nothing to index if migrations were reverted to before the text of results was stored
+    apps = apps or global_apps
+    try:
+        apps.get_model("api", "ResultContent")._meta.get_field("text")
+    except (LookupError, FieldDoesNotExist):
+        return
+    get_search_backend(using).install()
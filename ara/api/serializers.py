@@ -1,25 +1,79 @@
 # Copyright (c) 2022 The ARA Records Ansible authors
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import collections
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from ara.api import fields as ara_fields, models
 
 
+def bulk_get_or_create_hosts(names, playbook):
+    """
+    Retrieves many hosts of a playbook by name at once, creating them if necessary.
+    The hosts become the latest hosts for their names.
+    """
+    names = set(names)
+    with transaction.atomic():
+        # Hosts that already exist are left untouched
+        models.Host.objects.bulk_create(
+            [models.Host(name=name, playbook=playbook, facts=ara_fields.EMPTY_DICT) for name in names],
+            ignore_conflicts=True,
+        )
+        hosts = list(models.Host.objects.filter(playbook=playbook, name__in=names))
+
+        # Only some databases need (or support) the unique fields for updating conflicts
+        unique_fields = ["name"] if connection.features.supports_update_conflicts_with_target else None
+        models.LatestHost.objects.bulk_create(
+            [models.LatestHost(name=host.name, host=host) for host in hosts],
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=["host", "updated"],
+        )
+    return hosts
+
+
+def create_result_relations(results):
+    """
+    Gets or creates the hosts and contents of many validated results at once, when results refer to hosts by name
+    and provide their contents. Hosts are only looked up once per playbook and contents once for every result.
+    """
+    names = collections.defaultdict(set)
+    for result in results:
+        if "host_name" in result:
+            names[result["playbook"]].add(result["host_name"])
+        if result.get("delegated_to_names"):
+            names[result["playbook"]].update(result["delegated_to_names"])
+
+    hosts = {}
+    for playbook, playbook_names in names.items():
+        for host in bulk_get_or_create_hosts(playbook_names, playbook):
+            hosts[(playbook.id, host.name)] = host
+
+    contents = ara_fields.bulk_get_or_create_result_contents(
+        [result["content"] for result in results if "content" in result]
+    )
+    for result in results:
+        if "content" in result:
+            result["content_id"] = contents[result.pop("content")]
+        if "host_name" in result:
+            result["host"] = hosts[(result["playbook"].id, result.pop("host_name"))]
+        delegated_to_names = result.pop("delegated_to_names", [])
+        if delegated_to_names:
+            delegated_to = list(result.get("delegated_to", []))
+            delegated_to.extend(hosts[(result["playbook"].id, name)] for name in delegated_to_names)
+            result["delegated_to"] = delegated_to
+
+
 class ResultStatusSerializer(serializers.ModelSerializer):
     class Meta:
         abstract = True
 
-    status = serializers.SerializerMethodField()
-
-    @staticmethod
-    def get_status(obj):
-        if obj.status == "ok" and obj.changed:
-            return "changed"
-        elif obj.status == "failed" and obj.ignore_errors:
-            return "ignored"
-        else:
-            return obj.status
+    # The status of results taking changed and ignore_errors into account
+    status = serializers.CharField(source="effective_status", read_only=True)
 
 
 class TaskPathSerializer(serializers.ModelSerializer):
@@ -42,8 +96,13 @@ class ItemCountSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_items(obj):
-        types = ["plays", "tasks", "results", "hosts", "files", "records"]
-        items = {item: getattr(obj, item).count() for item in types if hasattr(obj, item)}
+        items = {}
+        for item in models.ItemCountQuerySet.ITEMS:
+            # Counts are annotated by querysets "with_item_counts()", count them otherwise
+            if hasattr(obj, "%s_count" % item):
+                items[item] = getattr(obj, "%s_count" % item)
+            elif hasattr(obj, item):
+                items[item] = getattr(obj, item).count()
         return items
 
 
@@ -165,14 +224,14 @@ class DetailedLatestHostSerializer(serializers.ModelSerializer):
 class DetailedResultSerializer(ResultStatusSerializer):
     class Meta:
         model = models.Result
-        fields = "__all__"
+        exclude = ("effective_status",)
 
     playbook = SimplePlaybookSerializer(read_only=True)
     play = SimplePlaySerializer(read_only=True)
     task = SimpleTaskSerializer(read_only=True)
     host = SimpleHostSerializer(read_only=True)
     delegated_to = SimpleHostSerializer(many=True, read_only=True)
-    content = ara_fields.CompressedObjectField(read_only=True)
+    content = ara_fields.ResultContentField(read_only=True)
 
 
 class DetailedFileSerializer(FileSha1Serializer):
@@ -242,10 +301,27 @@ class ListHostSerializer(serializers.ModelSerializer):
     playbook = serializers.PrimaryKeyRelatedField(read_only=True)
 
 
+class ListHostPlaybookSerializer(serializers.ModelSerializer):
+    # Hosts along with their playbook, without their facts, for the host index of the reporting interface
+    class Meta:
+        model = models.Host
+        exclude = ("facts",)
+
+    playbook = SimplePlaybookSerializer(read_only=True)
+
+
+class ListLatestHostSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.LatestHost
+        fields = "__all__"
+
+    host = ListHostPlaybookSerializer(read_only=True)
+
+
 class ListResultSerializer(ResultStatusSerializer):
     class Meta:
         model = models.Result
-        exclude = ("content",)
+        exclude = ("content", "effective_status")
 
     playbook = serializers.PrimaryKeyRelatedField(read_only=True)
     play = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -270,6 +346,61 @@ class ListRecordSerializer(serializers.ModelSerializer):
     playbook = serializers.PrimaryKeyRelatedField(read_only=True)
 
 
+#######
+# Metrics serializers represent metrics about objects aggregated by one of their fields.
+# They are read-only.
+#######
+
+
+class MetricsSerializer(serializers.Serializer):
+    class Meta:
+        abstract = True
+
+    aggregate = serializers.CharField(read_only=True)
+    count = serializers.IntegerField(read_only=True)
+
+
+class DurationMetricsSerializer(MetricsSerializer):
+    class Meta:
+        abstract = True
+
+    # Objects that have not ended don't have a duration and are not included in the average
+    duration_total = serializers.DurationField(read_only=True)
+    duration_avg = serializers.DurationField(read_only=True)
+
+
+class PlaybookMetricsSerializer(DurationMetricsSerializer):
+    completed = serializers.IntegerField(read_only=True)
+    expired = serializers.IntegerField(read_only=True)
+    failed = serializers.IntegerField(read_only=True)
+    running = serializers.IntegerField(read_only=True)
+    unknown = serializers.IntegerField(read_only=True)
+    plays = serializers.IntegerField(read_only=True)
+    tasks = serializers.IntegerField(read_only=True)
+    results = serializers.IntegerField(read_only=True)
+    hosts = serializers.IntegerField(read_only=True)
+    files = serializers.IntegerField(read_only=True)
+    records = serializers.IntegerField(read_only=True)
+
+
+class TaskMetricsSerializer(DurationMetricsSerializer):
+    completed = serializers.IntegerField(read_only=True)
+    expired = serializers.IntegerField(read_only=True)
+    failed = serializers.IntegerField(read_only=True)
+    running = serializers.IntegerField(read_only=True)
+    unknown = serializers.IntegerField(read_only=True)
+    results = serializers.IntegerField(read_only=True)
+
+
+class HostMetricsSerializer(MetricsSerializer):
+    # Sums of the statistics of the hosts, annotated under different names than the fields of hosts
+    changed = serializers.IntegerField(source="changed_total", read_only=True)
+    failed = serializers.IntegerField(source="failed_total", read_only=True)
+    ok = serializers.IntegerField(source="ok_total", read_only=True)
+    skipped = serializers.IntegerField(source="skipped_total", read_only=True)
+    unreachable = serializers.IntegerField(source="unreachable_total", read_only=True)
+
+
 #######
 # Default serializers represents objects as they are modelized in the database.
 # They are used for creating/updating/destroying objects.
@@ -303,8 +434,25 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Task
         fields = "__all__"
+        extra_kwargs = {"play": {"required": False}}
 
     tags = ara_fields.CompressedObjectField(default=ara_fields.EMPTY_LIST, help_text="A list containing Ansible tags")
+    play_uuid = serializers.UUIDField(
+        write_only=True, required=False, help_text="The uuid of the play of the playbook, instead of its id"
+    )
+
+    def validate(self, data):
+        data = super().validate(data)
+        play_uuid = data.pop("play_uuid", None)
+        if self.instance is None and "play" not in data:
+            if play_uuid is None:
+                raise serializers.ValidationError({"play": "Either play or play_uuid is required."})
+            # Plays run in batches with serial share the same uuid, the last one is the one that is running
+            play = models.Play.objects.filter(playbook=data["playbook"], uuid=play_uuid).order_by("-id").first()
+            if play is None:
+                raise serializers.ValidationError({"play_uuid": "No play with this uuid in the playbook."})
+            data["play"] = play
+        return data
 
 
 class HostSerializer(serializers.ModelSerializer):
@@ -331,15 +479,219 @@ class HostSerializer(serializers.ModelSerializer):
         return host
 
 
+class BulkHostSerializer(serializers.Serializer):
+    """
+    Gets or creates many hosts of a playbook at once, for example every host of a play when it starts.
+    The hosts become the latest hosts for their names.
+    """
+
+    playbook = serializers.PrimaryKeyRelatedField(queryset=models.Playbook.objects.all())
+    names = serializers.ListField(child=serializers.CharField(max_length=255), allow_empty=False)
+
+    def create(self, validated_data):
+        return bulk_get_or_create_hosts(validated_data["names"], validated_data["playbook"])
+
+    def to_representation(self, hosts):
+        return {"count": len(hosts), "hosts": {host.name: host.id for host in hosts}}
+
+
+class HostStatsSerializer(serializers.Serializer):
+    changed = serializers.IntegerField(min_value=0, default=0)
+    failed = serializers.IntegerField(min_value=0, default=0)
+    ok = serializers.IntegerField(min_value=0, default=0)
+    skipped = serializers.IntegerField(min_value=0, default=0)
+    unreachable = serializers.IntegerField(min_value=0, default=0)
+
+
+class BulkHostStatsSerializer(serializers.Serializer):
+    """
+    Updates the statistics of many hosts of a playbook at once, for example every host at the end of a playbook.
+    Hosts are referred to by name and are created if necessary.
+    """
+
+    playbook = serializers.PrimaryKeyRelatedField(queryset=models.Playbook.objects.all())
+    hosts = serializers.DictField(child=HostStatsSerializer(), allow_empty=False)
+
+    def create(self, validated_data):
+        stats = validated_data["hosts"]
+        # bulk_update doesn't go through save() which would otherwise refresh the updated timestamp
+        updated = timezone.now()
+        with transaction.atomic():
+            hosts = bulk_get_or_create_hosts(stats.keys(), validated_data["playbook"])
+            for host in hosts:
+                for field, value in stats[host.name].items():
+                    setattr(host, field, value)
+                host.updated = updated
+            models.Host.objects.bulk_update(hosts, list(HostStatsSerializer().fields) + ["updated"], batch_size=500)
+        return hosts
+
+    def to_representation(self, hosts):
+        return {"count": len(hosts)}
+
+
+class BulkResultSerializer(serializers.ListSerializer):
+    """
+    Creates many results at once with bulk inserts instead of one INSERT per result.
+    The objects results refer to are retrieved and created once for every result rather than once per result.
+    """
+
+    # Objects which results refer to by id, retrieved with their id only
+    related_models = {
+        "playbook": models.Playbook,
+        "play": models.Play,
+        "task": models.Task,
+        "host": models.Host,
+        "delegated_to": models.Host,
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            items = [item for item in data if isinstance(item, dict)]
+            self.related_objects = self.get_related_objects(items)
+            self.tasks_by_uuid = self.get_tasks_by_uuid(items)
+        return super().to_internal_value(data)
+
+    def get_related_objects(self, items):
+        pks = collections.defaultdict(set)
+        for item in items:
+            for field, model in self.related_models.items():
+                values = item.get(field)
+                for value in values if isinstance(values, list) else [values]:
+                    if isinstance(value, int) or (isinstance(value, str) and value.isdecimal()):
+                        pks[model].add(int(value))
+
+        related_objects = {}
+        for model, model_pks in pks.items():
+            queryset = model.objects.filter(pk__in=model_pks).only("id")
+            if model is models.Task:
+                # The play of results is the play of their task when it isn't provided
+                queryset = queryset.select_related("play").only("id", "play__id")
+            related_objects.update({(model, str(obj.pk)): obj for obj in queryset})
+        return related_objects
+
+    def get_tasks_by_uuid(self, items):
+        uuids = set()
+        for item in items:
+            try:
+                uuids.add(uuid.UUID(str(item["task_uuid"])))
+            except (KeyError, ValueError):
+                continue
+        if not uuids:
+            return {}
+
+        tasks = (
+            models.Task.objects.filter(uuid__in=uuids).select_related("play").only("id", "uuid", "playbook", "play__id")
+        )
+        # Tasks run in batches with serial share the same uuid, the last one is the one that is running
+        return {(task.playbook_id, task.uuid): task for task in tasks.order_by("id")}
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            create_result_relations(validated_data)
+            delegations = [item.pop("delegated_to", []) for item in validated_data]
+            results = [models.Result(**item) for item in validated_data]
+            for result in results:
+                # bulk_create doesn't call save() so the duration and effective status must be computed here
+                result.set_duration()
+                result.set_effective_status()
+
+            if connection.features.can_return_rows_from_bulk_insert:
+                results = models.Result.objects.bulk_create(results)
+                # bulk_create doesn't call save() either, count the results all at once
+                models.update_result_counts(collections.Counter(result.get_counted() for result in results))
+            else:
+                # Without primary keys we couldn't associate delegated hosts, save results one by one instead
+                for result in results:
+                    result.save()
+
+            delegated_to = models.Result.delegated_to.through
+            delegated_to.objects.bulk_create(
+                [
+                    delegated_to(result_id=result.id, host_id=host.id)
+                    for result, hosts in zip(results, delegations)
+                    for host in hosts
+                ]
+            )
+        return results
+
+
 class ResultSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Result
-        fields = "__all__"
+        exclude = ("effective_status",)
+        list_serializer_class = BulkResultSerializer
+        extra_kwargs = {"task": {"required": False}, "play": {"required": False}, "host": {"required": False}}
+
+    serializer_related_field = ara_fields.BulkPrimaryKeyRelatedField
 
-    content = ara_fields.CompressedObjectField(default=ara_fields.EMPTY_DICT)
-    delegated_to = serializers.SlugRelatedField(
-        many=True, required=False, slug_field="id", queryset=models.Host.objects.all()
+    content = ara_fields.ResultContentField(required=False)
+    compressed_content = ara_fields.PreCompressedObjectField(
+        write_only=True, required=False, help_text="The content compressed with zlib and encoded in base64"
+    )
+    delegated_to = ara_fields.BulkPrimaryKeyRelatedField(many=True, required=False, queryset=models.Host.objects.all())
+    # Natural keys which can be provided instead of ids so that clients don't need to wait for them
+    task_uuid = serializers.UUIDField(
+        write_only=True, required=False, help_text="The uuid of the task of the playbook, instead of its id"
+    )
+    host_name = serializers.CharField(
+        write_only=True, required=False, max_length=255, help_text="The name of the host, created if necessary"
     )
+    delegated_to_names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        write_only=True,
+        required=False,
+        help_text="The names of the hosts the result was delegated to, created if necessary",
+    )
+
+    def validate(self, data):
+        # Nothing is created before every result is validated: hosts and contents are created with the results
+        data = super().validate(data)
+        task_uuid = data.pop("task_uuid", None)
+        if "compressed_content" in data:
+            data["content"] = data.pop("compressed_content")
+        if self.instance is not None:
+            data.pop("host_name", None)
+            data.pop("delegated_to_names", None)
+            return data
+
+        if "content" not in data:
+            data["content"] = ara_fields.EMPTY_DICT
+
+        if "task" not in data:
+            if task_uuid is None:
+                raise serializers.ValidationError({"task": "Either task or task_uuid is required."})
+            task = self.get_task(data["playbook"], task_uuid)
+            if task is None:
+                raise serializers.ValidationError({"task_uuid": "No task with this uuid in the playbook."})
+            data["task"] = task
+
+        if "play" not in data:
+            data["play"] = data["task"].play
+
+        if "host" in data:
+            data.pop("host_name", None)
+        elif "host_name" not in data:
+            raise serializers.ValidationError({"host": "Either host or host_name is required."})
+        return data
+
+    def get_task(self, playbook, task_uuid):
+        # The tasks of a list of results are retrieved at once by BulkResultSerializer
+        tasks = getattr(self.root, "tasks_by_uuid", {})
+        if (playbook.id, task_uuid) in tasks:
+            return tasks[(playbook.id, task_uuid)]
+        return (
+            models.Task.objects.select_related("play").filter(playbook=playbook, uuid=task_uuid).order_by("-id").first()
+        )
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            create_result_relations([validated_data])
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            create_result_relations([validated_data])
+            return super().update(instance, validated_data)
 
 
 class FileSerializer(FileSha1Serializer):
@@ -347,7 +699,10 @@ class FileSerializer(FileSha1Serializer):
         model = models.File
         fields = "__all__"
 
-    content = ara_fields.FileContentField()
+    content = ara_fields.FileContentField(required=False)
+    compressed_content = ara_fields.PreCompressedFileContentField(
+        write_only=True, required=False, help_text="The content compressed with zlib and encoded in base64"
+    )
 
     def get_unique_together_validators(self):
         """
@@ -358,6 +713,14 @@ class FileSerializer(FileSha1Serializer):
         """
         return []
 
+    def validate(self, data):
+        data = super().validate(data)
+        if "compressed_content" in data:
+            data["content"] = data.pop("compressed_content")
+        if self.instance is None and "content" not in data:
+            raise serializers.ValidationError({"content": "Either content or compressed_content is required."})
+        return data
+
     def create(self, validated_data):
         file_, created = models.File.objects.get_or_create(
             path=validated_data["path"],
@@ -368,6 +731,41 @@ class FileSerializer(FileSha1Serializer):
         return file_
 
 
+class FileSha1EntrySerializer(serializers.Serializer):
+    path = serializers.CharField(max_length=255)
+    sha1 = serializers.RegexField(r"^[0-9a-f]{40}$")
+
+
+class BulkFileSerializer(serializers.Serializer):
+    """
+    Creates many files of a playbook at once from the sha1 of their contents, for contents that are already stored.
+    Contents that aren't stored yet are reported as missing so that only those need to be sent.
+    """
+
+    playbook = serializers.PrimaryKeyRelatedField(queryset=models.Playbook.objects.all())
+    files = FileSha1EntrySerializer(many=True, allow_empty=False)
+
+    def create(self, validated_data):
+        playbook = validated_data["playbook"]
+        entries = validated_data["files"]
+        contents = models.FileContent.objects.filter(sha1__in={entry["sha1"] for entry in entries}).only("id", "sha1")
+        contents = {content.sha1: content for content in contents}
+
+        paths = {entry["path"]: contents[entry["sha1"]] for entry in entries if entry["sha1"] in contents}
+        with transaction.atomic():
+            # Files that were already recorded for the playbook are left untouched
+            models.File.objects.bulk_create(
+                [models.File(path=path, content=content, playbook=playbook) for path, content in paths.items()],
+                ignore_conflicts=True,
+            )
+        files = models.File.objects.filter(playbook=playbook, path__in=paths.keys()).values_list("path", "id")
+        missing = sorted({entry["sha1"] for entry in entries if entry["sha1"] not in contents})
+        return {"files": dict(files), "missing": missing}
+
+    def to_representation(self, created):
+        return created
+
+
 class RecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Record
@@ -115,11 +115,20 @@ class LatestHostFactory(DjangoModelFactory):
     host = factory.SubFactory(HostFactory, name=name)
 
 
+class ResultContentFactory(DjangoModelFactory):
+    class Meta:
+        model = models.ResultContent
+        django_get_or_create = ("sha1",)
+
+    sha1 = utils.sha1_bytes(utils.compressed_obj(RESULT_CONTENTS))
+    contents = utils.compressed_obj(RESULT_CONTENTS)
+
+
 class ResultFactory(DjangoModelFactory):
     class Meta:
         model = models.Result
 
-    content = utils.compressed_obj(RESULT_CONTENTS)
+    content = factory.SubFactory(ResultContentFactory)
     status = "ok"
     host = factory.SubFactory(HostFactory)
     # delegated_to expects a HostFactory to be assigned but it can also be []
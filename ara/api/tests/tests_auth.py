@@ -1,9 +1,19 @@
 # Copyright (c) 2022 The ARA Records Ansible authors
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import base64
+import io
+
 from django.conf import settings
+from django.contrib.auth.models import User as DjangoUser
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
 
+from ara.api import models
 from ara.api.auth import APIAccessPermission
 
 
@@ -58,3 +68,73 @@ class PermissionBackendTestCase(TestCase):
 
         self.assertTrue(backend.has_permission(self.authed_get_request, None))
         self.assertTrue(backend.has_permission(self.authed_post_request, None))
+
+
+@override_settings(WRITE_LOGIN_REQUIRED=True)
+class TokenAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        self.user = DjangoUser.objects.create_user(username="user", password="password")
+        self.token, self.key = models.Token.objects.create_token(self.user, name="test")
+
+    def test_create_token(self):
+        # Only the hash of the key is stored
+        self.assertNotEqual(self.key, self.token.digest)
+        self.assertEqual(models.Token.hash_key(self.key), self.token.digest)
+
+    def test_token_authentication(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token %s" % self.key)
+        request = self.client.post("/api/v1/labels", {"name": "authenticated"})
+        self.assertEqual(201, request.status_code)
+
+    def test_token_authentication_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token %s" % self.key)
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.post("/api/v1/labels", {"name": "first"})
+        self.assertEqual(201, request.status_code)
+        # The token and its user are retrieved in a single query
+        self.assertEqual(1, len([query for query in queries.captured_queries if '"tokens"' in query["sql"]]))
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        request = self.client.post("/api/v1/labels", {"name": "invalid"})
+        self.assertEqual(401, request.status_code)
+        self.assertEqual(0, models.Label.objects.count())
+
+    def test_invalid_token_header(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token %s %s" % (self.key, self.key))
+        request = self.client.post("/api/v1/labels", {"name": "invalid"})
+        self.assertEqual(401, request.status_code)
+
+    def test_deleted_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token %s" % self.key)
+        self.assertEqual(201, self.client.post("/api/v1/labels", {"name": "first"}).status_code)
+
+        # Deleted tokens are rejected right away
+        call_command("deletetoken", str(self.token.id), stdout=io.StringIO())
+        request = self.client.post("/api/v1/labels", {"name": "second"})
+        self.assertEqual(401, request.status_code)
+
+    def test_inactive_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token %s" % self.key)
+        self.assertEqual(201, self.client.post("/api/v1/labels", {"name": "active"}).status_code)
+
+        self.user.is_active = False
+        self.user.save()
+        request = self.client.post("/api/v1/labels", {"name": "inactive"})
+        self.assertEqual(401, request.status_code)
+
+    def test_basic_authentication(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Basic %s" % base64.b64encode(b"user:password").decode())
+        request = self.client.post("/api/v1/labels", {"name": "basic"})
+        self.assertEqual(201, request.status_code)
+
+    def test_createtoken_command(self):
+        stdout = io.StringIO()
+        call_command("createtoken", "user", name="callback", stdout=stdout, stderr=io.StringIO())
+        key = stdout.getvalue().strip()
+        token = models.Token.objects.get(digest=models.Token.hash_key(key))
+        self.assertEqual("callback", token.name)
+        self.assertEqual(self.user, token.user)
+
+        with self.assertRaises(CommandError):
+            call_command("createtoken", "unknown", stdout=io.StringIO(), stderr=io.StringIO())
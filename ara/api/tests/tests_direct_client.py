@@ -0,0 +1,94 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.signals import request_finished, request_started
+from django.test import TestCase, override_settings
+
+from ara.api import models
+from ara.api.tests import factories
+from ara.clients.utils import get_client
+
+
+class DirectClientTestCase(TestCase):
+    def setUp(self):
+        self.client = get_client(client="direct", run_sql_migrations=False)
+
+    def test_create_playbook(self):
+        self.assertEqual(0, models.Playbook.objects.count())
+        playbook = self.client.post(
+            "/api/v1/playbooks", ansible_version="2.4.0", path="/path/playbook.yml", arguments={"check": True}
+        )
+        self.assertEqual(1, models.Playbook.objects.count())
+        self.assertEqual(playbook["id"], models.Playbook.objects.get().id)
+        self.assertEqual(playbook["arguments"], {"check": True})
+
+    def test_get_with_query_parameters(self):
+        factories.PlaybookFactory(status="failed")
+        factories.PlaybookFactory(status="completed")
+        playbooks = self.client.get("/api/v1/playbooks", status="failed")
+        self.assertEqual(1, playbooks["count"])
+        self.assertEqual("failed", playbooks["results"][0]["status"])
+
+    def test_post_raw(self):
+        body = '{"ansible_version": "2.4.0", "path": "/path/playbook.yml", "name": "caf\u00e9"}'
+        playbook = self.client.post_raw("/api/v1/playbooks", body)
+        self.assertEqual("caf\u00e9", playbook["name"])
+        self.assertEqual("caf\u00e9", models.Playbook.objects.get(id=playbook["id"]).name)
+
+    def test_update_and_delete_playbook(self):
+        playbook = factories.PlaybookFactory()
+        updated = self.client.patch("/api/v1/playbooks/%s" % playbook.id, status="completed")
+        self.assertEqual("completed", updated["status"])
+
+        response = self.client.delete("/api/v1/playbooks/%s" % playbook.id)
+        self.assertEqual(204, response.status_code)
+        self.assertEqual(0, models.Playbook.objects.count())
+
+    def test_request_signals(self):
+        # Django closes the database connections that can't be reused when requests start and finish
+        signals = []
+        for signal in (request_started, request_finished):
+            receiver = mock.Mock()
+            signal.connect(receiver)
+            self.addCleanup(signal.disconnect, receiver)
+            signals.append(receiver)
+        self.client.get("/api/v1/playbooks")
+        for receiver in signals:
+            self.assertEqual(1, receiver.call_count)
+
+    def test_server_error(self):
+        with mock.patch("ara.api.views.LabelViewSet.create", side_effect=RuntimeError("unexpected")):
+            with self.assertLogs("ara.clients.direct", "ERROR"):
+                response = self.client.post("/api/v1/labels", name="error")
+        self.assertEqual({"detail": "A server error occurred."}, response)
+
+    def test_unknown_endpoint(self):
+        with self.assertLogs("ara.clients.direct", "ERROR"):
+            response = self.client.get("/api/v1/unknown")
+        self.assertEqual({"detail": "Not found."}, response)
+
+    @override_settings(WRITE_LOGIN_REQUIRED=True)
+    def test_authentication(self):
+        User.objects.create_user(username="user", password="password")
+
+        with self.assertLogs("ara.clients.direct", "ERROR"):
+            self.client.post("/api/v1/labels", name="anonymous")
+        self.assertEqual(0, models.Label.objects.count())
+
+        client = get_client(client="direct", username="user", password="password", run_sql_migrations=False)
+        label = client.post("/api/v1/labels", name="authenticated")
+        self.assertEqual("authenticated", label["name"])
+        self.assertEqual(1, models.Label.objects.count())
+
+    @override_settings(WRITE_LOGIN_REQUIRED=True)
+    def test_token_authentication(self):
+        user = User.objects.create_user(username="user", password="password")
+        token, key = models.Token.objects.create_token(user)
+
+        client = get_client(client="direct", token=key, run_sql_migrations=False)
+        label = client.post("/api/v1/labels", name="authenticated")
+        self.assertEqual("authenticated", label["name"])
+        self.assertEqual(1, models.Label.objects.count())
@@ -1,8 +1,12 @@
 # Copyright (c) 2022 The ARA Records Ansible authors
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import base64
 import datetime
+import zlib
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
 from ara.api import models, serializers
@@ -54,6 +58,77 @@ class FileTestCase(APITestCase):
         self.assertEqual(201, request.status_code)
         self.assertEqual(1, models.File.objects.count())
 
+    def test_create_file_with_compressed_content(self):
+        playbook = factories.PlaybookFactory()
+        compressed = zlib.compress(factories.FILE_CONTENTS.encode("utf8"), 1)
+        request = self.client.post(
+            "/api/v1/files",
+            {
+                "path": "/path/playbook.yml",
+                "compressed_content": base64.b64encode(compressed).decode("ascii"),
+                "playbook": playbook.id,
+            },
+        )
+        self.assertEqual(201, request.status_code)
+        self.assertEqual(utils.sha1(factories.FILE_CONTENTS), request.data["sha1"])
+        # The content is identified by the sha1 of the text but stored as it was compressed
+        content = models.FileContent.objects.get()
+        self.assertEqual(compressed, bytes(content.contents))
+
+        request = self.client.get("/api/v1/files/%s" % request.data["id"])
+        self.assertEqual(factories.FILE_CONTENTS, request.data["content"])
+
+    def test_create_file_with_invalid_compressed_content(self):
+        playbook = factories.PlaybookFactory()
+        for compressed in ["not base64!", base64.b64encode(b"not zlib").decode("ascii")]:
+            request = self.client.post(
+                "/api/v1/files",
+                {"path": "/path/playbook.yml", "compressed_content": compressed, "playbook": playbook.id},
+            )
+            self.assertEqual(400, request.status_code)
+            self.assertIn("compressed_content", request.data)
+
+        request = self.client.post("/api/v1/files", {"path": "/path/playbook.yml", "playbook": playbook.id})
+        self.assertEqual(400, request.status_code)
+        self.assertEqual(0, models.File.objects.count())
+
+    def test_bulk_create_files(self):
+        playbook = factories.PlaybookFactory()
+        content = factories.FileContentFactory()
+        unknown = utils.sha1("unknown")
+        request = self.client.post(
+            "/api/v1/files/bulk",
+            {
+                "playbook": playbook.id,
+                "files": [
+                    {"path": "/path/1/playbook.yml", "sha1": content.sha1},
+                    {"path": "/path/2/playbook.yml", "sha1": content.sha1},
+                    {"path": "/path/unknown.yml", "sha1": unknown},
+                ],
+            },
+        )
+        self.assertEqual(201, request.status_code)
+        self.assertEqual([unknown], request.data["missing"])
+        self.assertEqual({"/path/1/playbook.yml", "/path/2/playbook.yml"}, set(request.data["files"]))
+        self.assertEqual(2, models.File.objects.filter(playbook=playbook, content=content).count())
+
+        # Creating them again returns the same files
+        files = request.data["files"]
+        request = self.client.post(
+            "/api/v1/files/bulk",
+            {"playbook": playbook.id, "files": [{"path": "/path/1/playbook.yml", "sha1": content.sha1}]},
+        )
+        self.assertEqual(201, request.status_code)
+        self.assertEqual(files["/path/1/playbook.yml"], request.data["files"]["/path/1/playbook.yml"])
+        self.assertEqual(2, models.File.objects.count())
+
+    def test_bulk_create_files_with_invalid_sha1(self):
+        playbook = factories.PlaybookFactory()
+        request = self.client.post(
+            "/api/v1/files/bulk", {"playbook": playbook.id, "files": [{"path": "/path/playbook.yml", "sha1": "nope"}]}
+        )
+        self.assertEqual(400, request.status_code)
+
     def test_post_same_file_for_a_playbook(self):
         playbook = factories.PlaybookFactory()
         self.assertEqual(0, models.File.objects.count())
@@ -79,6 +154,21 @@ class FileTestCase(APITestCase):
         self.assertEqual(1, len(request.data["results"]))
         self.assertEqual(file.path, request.data["results"][0]["path"])
 
+    def test_get_files_without_contents(self):
+        factories.FileFactory.create_batch(2)
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get("/api/v1/files")
+        self.assertEqual(2, len(request.data["results"]))
+        self.assertNotIn("content", request.data["results"][0])
+        self.assertIsNotNone(request.data["results"][0]["sha1"])
+        for query in queries.captured_queries:
+            self.assertNotIn('"file_contents"."contents"', query["sql"])
+
+        # The sha1 of every file is retrieved along with the files
+        factories.FileFactory.create_batch(2)
+        with self.assertNumQueries(len(queries.captured_queries)):
+            self.client.get("/api/v1/files")
+
     def test_get_file(self):
         file = factories.FileFactory()
         request = self.client.get("/api/v1/files/%s" % file.id)
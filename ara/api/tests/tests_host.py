@@ -3,6 +3,8 @@
 
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
 from ara.api import models, serializers
@@ -48,6 +50,15 @@ class HostTestCase(APITestCase):
         self.assertEqual(1, len(request.data["results"]))
         self.assertEqual(host.name, request.data["results"][0]["name"])
 
+    def test_get_hosts_without_facts(self):
+        factories.HostFactory()
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get("/api/v1/hosts")
+        self.assertEqual(1, len(request.data["results"]))
+        self.assertNotIn("facts", request.data["results"][0])
+        for query in queries.captured_queries:
+            self.assertNotIn('"hosts"."facts"', query["sql"])
+
     def test_delete_host(self):
         host = factories.HostFactory()
         self.assertEqual(1, models.Host.objects.all().count())
@@ -73,6 +84,68 @@ class HostTestCase(APITestCase):
         self.assertEqual(201, request.status_code)
         self.assertEqual(1, models.Host.objects.count())
 
+    def test_bulk_create_hosts(self):
+        playbook = factories.PlaybookFactory()
+        existing = factories.HostFactory(name="existing", playbook=playbook, facts=utils.compressed_obj({"a": "b"}))
+        # A previous playbook ran against host1
+        previous = factories.HostFactory(name="host1")
+        factories.LatestHostFactory(name="host1", host=previous)
+
+        request = self.client.post(
+            "/api/v1/hosts/bulk", {"playbook": playbook.id, "names": ["host1", "host2", "existing", "host2"]}
+        )
+        self.assertEqual(201, request.status_code)
+        self.assertEqual(3, request.data["count"])
+        self.assertEqual(existing.id, request.data["hosts"]["existing"])
+        self.assertEqual(3, models.Host.objects.filter(playbook=playbook).count())
+
+        # Existing hosts are left as they were
+        self.assertEqual({"a": "b"}, self.client.get("/api/v1/hosts/%s" % existing.id).data["facts"])
+
+        # Hosts become the latest hosts for their names
+        for name in ["host1", "host2", "existing"]:
+            self.assertEqual(request.data["hosts"][name], models.LatestHost.objects.get(name=name).host_id)
+
+    def test_bulk_create_hosts_without_names(self):
+        playbook = factories.PlaybookFactory()
+        request = self.client.post("/api/v1/hosts/bulk", {"playbook": playbook.id, "names": []})
+        self.assertEqual(400, request.status_code)
+        self.assertEqual(0, models.Host.objects.count())
+
+    def test_bulk_update_host_stats(self):
+        playbook = factories.PlaybookFactory()
+        host = factories.HostFactory(name="host1", playbook=playbook)
+        other = factories.HostFactory(name="host1")
+        request = self.client.post(
+            "/api/v1/hosts/stats",
+            {
+                "playbook": playbook.id,
+                "hosts": {
+                    "host1": {"changed": 1, "failed": 0, "ok": 5, "skipped": 2, "unreachable": 0},
+                    # Hosts that weren't recorded yet are created
+                    "host2": {"failed": 1, "ok": 3},
+                },
+            },
+        )
+        self.assertEqual(200, request.status_code)
+        self.assertEqual(2, request.data["count"])
+
+        host.refresh_from_db()
+        self.assertEqual((1, 0, 5, 2, 0), (host.changed, host.failed, host.ok, host.skipped, host.unreachable))
+        host2 = models.Host.objects.get(name="host2", playbook=playbook)
+        self.assertEqual((0, 1, 3, 0, 0), (host2.changed, host2.failed, host2.ok, host2.skipped, host2.unreachable))
+
+        # Hosts of other playbooks aren't updated
+        other.refresh_from_db()
+        self.assertEqual(0, other.ok)
+
+    def test_bulk_update_host_stats_with_negative_value(self):
+        host = factories.HostFactory()
+        request = self.client.post(
+            "/api/v1/hosts/stats", {"playbook": host.playbook.id, "hosts": {host.name: {"ok": -1}}}
+        )
+        self.assertEqual(400, request.status_code)
+
     def test_partial_update_host(self):
         host = factories.HostFactory()
         self.assertNotEqual("foo", host.name)
@@ -0,0 +1,50 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import LiveServerTestCase
+
+from ara.api import models
+from ara.clients.http import AraHttpClient, HttpClient
+from ara.clients.utils import get_client
+
+
+class HttpClientTestCase(LiveServerTestCase):
+    def test_connection_pool(self):
+        client = HttpClient(endpoint=self.live_server_url, pool_maxsize=32, pool_block=True)
+        adapter = client.http.get_adapter(self.live_server_url)
+        self.assertEqual(32, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual("keep-alive", client.http.headers["Connection"])
+        client.http.close()
+
+    def test_disable_keepalive(self):
+        client = HttpClient(endpoint=self.live_server_url, keepalive=False)
+        self.assertEqual("close", client.http.headers["Connection"])
+        self.assertEqual(200, client.get("/api/").status_code)
+        client.http.close()
+
+    def test_get_client_pool(self):
+        client = get_client(client="http", endpoint=self.live_server_url, pool_maxsize=4, pool_block=True)
+        self.assertIsInstance(client, AraHttpClient)
+        self.assertEqual(4, client.client.http.get_adapter(self.live_server_url)._pool_maxsize)
+        client.client.http.close()
+
+    def test_get_offline_client_pool(self):
+        client = get_client(client="offline", run_sql_migrations=False, pool_maxsize=4, pool_block=True, keepalive=False)
+        adapter = client.client.http.get_adapter(client.endpoint)
+        self.assertEqual(4, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual("close", client.client.http.headers["Connection"])
+        client.client.http.close()
+        client.server_thread.httpd.shutdown()
+        client.server_thread.httpd.server_close()
+
+    def test_more_threads_than_connections(self):
+        # Threads wait for one of the connections to be available rather than opening more
+        client = AraHttpClient(endpoint=self.live_server_url, pool_maxsize=2, pool_block=True)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda name: client.post("/api/v1/labels", name="label-%s" % name), range(16)))
+        self.assertEqual(16, models.Label.objects.count())
+        client.client.http.close()
@@ -0,0 +1,124 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import datetime
+
+from rest_framework.test import APITestCase
+
+from ara.api.tests import factories
+
+
+class MetricsTestCase(APITestCase):
+    def _metrics(self, url, **params):
+        request = self.client.get(url, params)
+        self.assertEqual(200, request.status_code)
+        return {metric["aggregate"]: metric for metric in request.data["results"]}
+
+    def test_playbook_metrics(self):
+        started = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        completed = factories.PlaybookFactory(
+            path="/site.yml", status="completed", started=started, ended=started + datetime.timedelta(seconds=10)
+        )
+        factories.PlaybookFactory(
+            path="/site.yml", status="failed", started=started, ended=started + datetime.timedelta(seconds=20)
+        )
+        factories.PlaybookFactory(path="/site.yml", status="running")
+        factories.PlaybookFactory(path="/other.yml", status="completed")
+        task = factories.TaskFactory(playbook=completed)
+        factories.ResultFactory.create_batch(2, playbook=completed, task=task)
+
+        metrics = self._metrics("/api/v1/playbooks/metrics")
+        # Aggregates are ordered by their value
+        self.assertEqual(sorted(metrics), list(metrics))
+        site = metrics["/site.yml"]
+        self.assertEqual(3, site["count"])
+        self.assertEqual(1, site["completed"])
+        self.assertEqual(1, site["failed"])
+        self.assertEqual(1, site["running"])
+        # The running playbook doesn't have a duration yet
+        self.assertEqual("00:00:30", site["duration_total"])
+        self.assertEqual("00:00:15", site["duration_avg"])
+        self.assertEqual(1, site["tasks"])
+        self.assertEqual(2, site["results"])
+        self.assertEqual(0, metrics["/other.yml"]["tasks"])
+
+    def test_playbook_metrics_with_filters(self):
+        factories.PlaybookFactory.create_batch(2, name="first", status="completed")
+        factories.PlaybookFactory(name="first", status="failed")
+        factories.PlaybookFactory(name=None, status="failed")
+        metrics = self._metrics("/api/v1/playbooks/metrics", aggregate="name", status="failed")
+        self.assertEqual(1, metrics["first"]["count"])
+        self.assertEqual(0, metrics["first"]["completed"])
+        # Playbooks without a name are aggregated together
+        self.assertEqual(1, metrics[None]["count"])
+        self.assertEqual(0, metrics[None]["tasks"])
+
+    def test_playbook_metrics_by_label(self):
+        first = factories.LabelFactory(name="first")
+        second = factories.LabelFactory(name="second")
+        playbook = factories.PlaybookFactory()
+        playbook.labels.add(first, second)
+        factories.TaskFactory(playbook=playbook)
+        factories.PlaybookFactory().labels.add(first)
+
+        metrics = self._metrics("/api/v1/playbooks/metrics", aggregate="label")
+        self.assertEqual(2, metrics["first"]["count"])
+        self.assertEqual(1, metrics["first"]["tasks"])
+        self.assertEqual(1, metrics["second"]["count"])
+        self.assertEqual(1, metrics["second"]["tasks"])
+
+    def test_playbook_metrics_constant_queries(self):
+        factories.PlaybookFactory(path="/first.yml")
+        # The count, the aggregates and one query for each type of item
+        with self.assertNumQueries(8):
+            self.client.get("/api/v1/playbooks/metrics")
+        factories.PlaybookFactory.create_batch(2, path="/second.yml")
+        with self.assertNumQueries(8):
+            self.client.get("/api/v1/playbooks/metrics")
+
+    def test_metrics_pagination(self):
+        for path in ["/a.yml", "/b.yml", "/c.yml"]:
+            factories.PlaybookFactory(path=path)
+        request = self.client.get("/api/v1/playbooks/metrics", {"limit": 2, "offset": 2})
+        self.assertEqual(3, request.data["count"])
+        self.assertEqual(["/c.yml"], [metric["aggregate"] for metric in request.data["results"]])
+
+    def test_metrics_invalid_aggregate(self):
+        request = self.client.get("/api/v1/playbooks/metrics", {"aggregate": "arguments"})
+        self.assertEqual(400, request.status_code)
+        self.assertIn("aggregate", request.data)
+
+    def test_task_metrics(self):
+        playbook = factories.PlaybookFactory()
+        command = factories.TaskFactory(playbook=playbook, action="command", status="completed")
+        factories.TaskFactory(playbook=playbook, action="command", status="failed")
+        factories.TaskFactory(playbook=playbook, action="debug", status="completed")
+        factories.ResultFactory.create_batch(3, playbook=playbook, task=command)
+
+        metrics = self._metrics("/api/v1/tasks/metrics", playbook=playbook.id)
+        self.assertEqual(["command", "debug"], list(metrics))
+        self.assertEqual(2, metrics["command"]["count"])
+        self.assertEqual(1, metrics["command"]["completed"])
+        self.assertEqual(1, metrics["command"]["failed"])
+        self.assertEqual(3, metrics["command"]["results"])
+        self.assertEqual(0, metrics["debug"]["results"])
+
+        metrics = self._metrics("/api/v1/tasks/metrics", aggregate="path")
+        self.assertEqual(3, metrics[command.file.path]["count"])
+
+    def test_host_metrics(self):
+        factories.HostFactory(name="first", changed=1, failed=2, ok=3)
+        factories.HostFactory(name="first", changed=1, ok=5, playbook=factories.PlaybookFactory())
+        factories.HostFactory(name="second", unreachable=1)
+
+        metrics = self._metrics("/api/v1/hosts/metrics")
+        self.assertEqual(2, metrics["first"]["count"])
+        self.assertEqual(2, metrics["first"]["changed"])
+        self.assertEqual(2, metrics["first"]["failed"])
+        self.assertEqual(8, metrics["first"]["ok"])
+        self.assertEqual(0, metrics["first"]["skipped"])
+        self.assertEqual(1, metrics["second"]["unreachable"])
+
+        metrics = self._metrics("/api/v1/hosts/metrics", failed__gt=0)
+        self.assertEqual(["first"], list(metrics))
+        self.assertEqual(1, metrics["first"]["count"])
@@ -0,0 +1,148 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from ara.api.tests import factories
+from ara.clients.direct import AraDirectClient
+from ara.clients.utils import paginate
+
+
+class PaginationTestCase(APITestCase):
+    def _walk(self, url, **params):
+        # Follows the "next" cursors from the first page and returns the ids of every object in order
+        params["cursor"] = ""
+        ids = []
+        while True:
+            request = self.client.get(url, params)
+            self.assertEqual(200, request.status_code)
+            self.assertNotIn("count", request.data)
+            ids.extend(obj["id"] for obj in request.data["results"])
+            if request.data["next"] is None:
+                return ids
+            params["cursor"] = parse_qs(urlsplit(request.data["next"]).query)["cursor"][0]
+
+    def test_limit_offset_by_default(self):
+        factories.PlaybookFactory.create_batch(3)
+        request = self.client.get("/api/v1/playbooks?limit=2&offset=2")
+        self.assertEqual(3, request.data["count"])
+        self.assertFalse(request.data["count_estimated"])
+        self.assertEqual(1, len(request.data["results"]))
+
+    def test_count_disabled_by_request(self):
+        factories.PlaybookFactory.create_batch(3)
+        request = self.client.get("/api/v1/playbooks", {"limit": 2, "count": "false"})
+        self.assertIsNone(request.data["count"])
+        self.assertFalse(request.data["count_estimated"])
+        self.assertEqual(2, len(request.data["results"]))
+        self.assertIsNotNone(request.data["next"])
+
+        request = self.client.get(request.data["next"])
+        self.assertEqual(1, len(request.data["results"]))
+        self.assertIsNone(request.data["next"])
+        self.assertIsNotNone(request.data["previous"])
+
+    def test_count_disabled_browsable_api(self):
+        factories.PlaybookFactory.create_batch(3)
+        request = self.client.get("/api/v1/playbooks?limit=1&offset=1&count=false", HTTP_ACCEPT="text/html")
+        self.assertEqual(200, request.status_code)
+        # Pages are linked by previous and next, without page numbers
+        self.assertContains(request, 'rel="prev"')
+        self.assertContains(request, 'rel="next"')
+        self.assertNotContains(request, "offset=3")
+
+    def test_count_disabled_without_count_query(self):
+        factories.PlaybookFactory.create_batch(2)
+        with override_settings(COUNT_STRATEGY="disabled"):
+            with self.assertNumQueries(2):
+                # The playbooks and their labels
+                request = self.client.get("/api/v1/playbooks", {"limit": 2})
+        self.assertIsNone(request.data["count"])
+        # The page is full but there are no other playbooks
+        self.assertIsNone(request.data["next"])
+
+    @override_settings(COUNT_STRATEGY="estimated")
+    def test_count_estimated(self):
+        cache.clear()
+        factories.PlaybookFactory.create_batch(3)
+        request = self.client.get("/api/v1/playbooks", {"limit": 2})
+        self.assertEqual(3, request.data["count"])
+        self.assertTrue(request.data["count_estimated"])
+        self.assertIsNotNone(request.data["next"])
+
+        # sqlite doesn't provide estimates: counts are cached instead
+        factories.PlaybookFactory()
+        request = self.client.get("/api/v1/playbooks", {"limit": 2})
+        self.assertEqual(3, request.data["count"])
+        request = self.client.get("/api/v1/playbooks", {"limit": 2, "status": "running"})
+        self.assertEqual(4, request.data["count"])
+
+    @override_settings(COUNT_STRATEGY="invalid")
+    def test_count_strategy_invalid(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.client.get("/api/v1/playbooks")
+
+    def test_cursor_by_id(self):
+        playbooks = factories.PlaybookFactory.create_batch(5)
+        expected = sorted([playbook.id for playbook in playbooks], reverse=True)
+        self.assertEqual(expected, self._walk("/api/v1/playbooks", limit=2))
+        self.assertEqual(expected[::-1], self._walk("/api/v1/playbooks", limit=2, order="id"))
+
+    def test_cursor_by_started_with_duplicates(self):
+        # Results sharing the same started timestamp must neither be skipped nor repeated across pages
+        started = timezone.now()
+        results = []
+        for offset in [0, 0, 0, 1, 1, 2, 2, 2, 2]:
+            results.append(factories.ResultFactory(started=started + datetime.timedelta(seconds=offset)))
+
+        expected = [result.id for result in sorted(results, key=lambda result: (result.started, result.id))]
+        self.assertEqual(expected, self._walk("/api/v1/results", limit=2, order="started"))
+        self.assertEqual(expected[::-1], self._walk("/api/v1/results", limit=2, order="-started"))
+
+    def test_cursor_with_filters(self):
+        factories.PlaybookFactory.create_batch(3, status="completed")
+        failed = factories.PlaybookFactory.create_batch(3, status="failed")
+        expected = sorted([playbook.id for playbook in failed], reverse=True)
+        self.assertEqual(expected, self._walk("/api/v1/playbooks", limit=2, status="failed"))
+
+    def test_cursor_previous_page(self):
+        playbooks = factories.PlaybookFactory.create_batch(3)
+        expected = sorted([playbook.id for playbook in playbooks], reverse=True)
+
+        request = self.client.get("/api/v1/playbooks", {"cursor": "", "limit": 2})
+        self.assertIsNone(request.data["previous"])
+        request = self.client.get(request.data["next"])
+        self.assertEqual(expected[2:], [playbook["id"] for playbook in request.data["results"]])
+        request = self.client.get(request.data["previous"])
+        self.assertEqual(expected[:2], [playbook["id"] for playbook in request.data["results"]])
+
+    def test_cursor_with_unsupported_ordering(self):
+        factories.PlaybookFactory()
+        request = self.client.get("/api/v1/playbooks", {"cursor": "", "order": "duration"})
+        self.assertEqual(400, request.status_code)
+        self.assertIn("cursor", request.data)
+
+    def test_invalid_cursor(self):
+        request = self.client.get("/api/v1/playbooks", {"cursor": "invalid"})
+        self.assertEqual(404, request.status_code)
+
+    def test_client_paginate(self):
+        playbooks = factories.PlaybookFactory.create_batch(5)
+        expected = sorted([playbook.id for playbook in playbooks], reverse=True)
+        client = AraDirectClient(run_sql_migrations=False)
+
+        pages = list(paginate(client, "/api/v1/playbooks", 4, page_size=3, order="-started"))
+        self.assertEqual([3, 1], [len(page["results"]) for page in pages])
+        self.assertEqual(expected[:4], [playbook["id"] for page in pages for playbook in page["results"]])
+
+        # Orderings that can't be walked with a cursor are retrieved in a single page
+        pages = list(paginate(client, "/api/v1/playbooks", 4, page_size=3, order="duration"))
+        self.assertEqual(1, len(pages))
+        self.assertEqual(4, len(pages[0]["results"]))
@@ -3,6 +3,8 @@
 
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.dateparse import parse_duration
 from rest_framework.test import APITestCase
@@ -86,6 +88,29 @@ class PlayTestCase(APITestCase):
         request = self.client.get("/api/v1/plays/%s" % play.id)
         self.assertEqual(play.name, request.data["name"])
 
+    def test_get_play_items(self):
+        play = factories.PlayFactory()
+        task = factories.TaskFactory(play=play, playbook=play.playbook)
+        factories.ResultFactory(play=play, task=task, playbook=play.playbook)
+
+        request = self.client.get("/api/v1/plays/%s" % play.id)
+        self.assertEqual(dict(tasks=1, results=1), request.data["items"])
+        self.assertEqual(
+            dict(plays=1, tasks=1, results=1, hosts=0, files=0, records=0), request.data["playbook"]["items"]
+        )
+
+    def test_list_plays_constant_queries(self):
+        # Items are counted in the same query as the plays instead of once per play
+        factories.TaskFactory()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/v1/plays")
+
+        for _ in range(4):
+            factories.TaskFactory()
+        with self.assertNumQueries(len(queries)):
+            request = self.client.get("/api/v1/plays")
+        self.assertEqual(5, len(request.data["results"]))
+
     def test_get_play_by_playbook(self):
         play = factories.PlayFactory(name="play1")
         factories.PlayFactory(name="play2")
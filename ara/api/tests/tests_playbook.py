@@ -3,6 +3,8 @@
 
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.dateparse import parse_duration
 from rest_framework.test import APITestCase
@@ -72,6 +74,20 @@ class PlaybookTestCase(APITestCase):
         self.assertEqual(204, request.status_code)
         self.assertEqual(0, models.Playbook.objects.all().count())
 
+    def test_delete_playbook_collects_result_contents(self):
+        result = factories.ResultFactory()
+        # Another playbook shares the same result content
+        other = factories.ResultFactory()
+        self.assertEqual(1, models.ResultContent.objects.count())
+
+        request = self.client.delete("/api/v1/playbooks/%s" % result.playbook.id)
+        self.assertEqual(204, request.status_code)
+        self.assertEqual(1, models.ResultContent.objects.count())
+
+        request = self.client.delete("/api/v1/playbooks/%s" % other.playbook.id)
+        self.assertEqual(204, request.status_code)
+        self.assertEqual(0, models.ResultContent.objects.count())
+
     def test_create_playbook(self):
         self.assertEqual(0, models.Playbook.objects.count())
         request = self.client.post(
@@ -123,6 +139,38 @@ class PlaybookTestCase(APITestCase):
         request = self.client.get("/api/v1/playbooks/%s" % playbook.id)
         self.assertEqual(playbook.ansible_version, request.data["ansible_version"])
 
+    def _create_playbook_with_items(self):
+        playbook = factories.PlaybookFactory()
+        play = factories.PlayFactory(playbook=playbook)
+        task = factories.TaskFactory(playbook=playbook, play=play, file=factories.FileFactory(playbook=playbook))
+        for name in ["host1", "host2"]:
+            host = factories.HostFactory(playbook=playbook, name=name)
+            factories.ResultFactory(playbook=playbook, play=play, task=task, host=host)
+        factories.RecordFactory(playbook=playbook)
+        return playbook
+
+    def test_get_playbook_items(self):
+        playbook = self._create_playbook_with_items()
+        expected = dict(plays=1, tasks=1, results=2, hosts=2, files=1, records=1)
+
+        request = self.client.get("/api/v1/playbooks/%s" % playbook.id)
+        self.assertEqual(expected, request.data["items"])
+
+        request = self.client.get("/api/v1/playbooks")
+        self.assertEqual(expected, request.data["results"][0]["items"])
+
+    def test_list_playbooks_constant_queries(self):
+        # Items are counted in the same query as the playbooks instead of once per playbook
+        self._create_playbook_with_items()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/v1/playbooks")
+
+        for _ in range(4):
+            self._create_playbook_with_items()
+        with self.assertNumQueries(len(queries)):
+            request = self.client.get("/api/v1/playbooks")
+        self.assertEqual(5, len(request.data["results"]))
+
     def test_get_playbook_by_controller(self):
         playbook = factories.PlaybookFactory(name="playbook1", controller="controller-one")
         factories.PlaybookFactory(name="playbook2", controller="controller-two")
@@ -91,6 +91,17 @@ class PruneCmdTestCase(LiveServerTestCase, LogCheckerMixin):
         self.assertIn("INFO:ara.api.management.commands.prune:1 playbooks deleted", output)
         self.assertEqual(0, models.Playbook.objects.all().count())
 
+    @override_settings(COUNT_STRATEGY="disabled")
+    def test_prune_with_matching_playbook_without_count(self):
+        old_timestamp = datetime.datetime.now() - datetime.timedelta(days=60)
+        factories.PlaybookFactory(started=old_timestamp)
+
+        args = ["--confirm", "--client", "http", "--endpoint", self.live_server_url]
+        output = self.run_prune_command(*args)
+        self.assertIn("INFO:ara.api.management.commands.prune:Found 1 playbooks matching query", output)
+        self.assertIn("INFO:ara.api.management.commands.prune:1 playbooks deleted", output)
+        self.assertEqual(0, models.Playbook.objects.all().count())
+
     @override_settings(READ_LOGIN_REQUIRED=True, WRITE_LOGIN_REQUIRED=True)
     def test_prune_without_authenticated_http_client(self):
         args = ["--confirm", "--client", "http", "--endpoint", self.live_server_url]
@@ -3,6 +3,8 @@
 
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
 from ara.api import models, serializers
@@ -36,6 +38,15 @@ class RecordTestCase(APITestCase):
         self.assertEqual(1, len(request.data["results"]))
         self.assertEqual(record.key, request.data["results"][0]["key"])
 
+    def test_get_records_without_value(self):
+        factories.RecordFactory()
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get("/api/v1/records")
+        self.assertEqual(1, len(request.data["results"]))
+        self.assertNotIn("value", request.data["results"][0])
+        for query in queries.captured_queries:
+            self.assertNotIn('"records"."value"', query["sql"])
+
     def test_delete_record(self):
         record = factories.RecordFactory()
         self.assertEqual(1, models.Record.objects.all().count())
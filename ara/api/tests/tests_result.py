@@ -1,8 +1,13 @@
 # Copyright (c) 2022 The ARA Records Ansible authors
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import base64
 import datetime
+import json
+import zlib
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.dateparse import parse_duration
 from rest_framework.test import APITestCase
@@ -88,10 +93,10 @@ class ResultTestCase(APITestCase):
         serializer.is_valid()
         result = serializer.save()
         result.refresh_from_db()
-        self.assertEqual(result.content, utils.compressed_obj(factories.RESULT_CONTENTS))
+        self.assertEqual(bytes(result.content.contents), utils.compressed_obj(factories.RESULT_CONTENTS))
 
     def test_result_serializer_decompress_content(self):
-        result = factories.ResultFactory(content=utils.compressed_obj(factories.RESULT_CONTENTS))
+        result = factories.ResultFactory()
         serializer = serializers.ResultSerializer(instance=result)
         self.assertEqual(serializer.data["content"], factories.RESULT_CONTENTS)
 
@@ -105,12 +110,59 @@ class ResultTestCase(APITestCase):
         self.assertEqual(1, len(request.data["results"]))
         self.assertEqual(result.status, request.data["results"][0]["status"])
 
+    def test_get_results_constant_queries(self):
+        def create_result():
+            result = factories.ResultFactory()
+            result.delegated_to.add(factories.HostFactory())
+
+        create_result()
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get("/api/v1/results")
+        self.assertEqual(1, len(request.data["results"][0]["delegated_to"]))
+
+        # The hosts results are delegated to are prefetched rather than queried for each result
+        create_result()
+        create_result()
+        with self.assertNumQueries(len(queries.captured_queries)):
+            request = self.client.get("/api/v1/results")
+        self.assertEqual(3, len(request.data["results"]))
+
     def test_delete_result(self):
         result = factories.ResultFactory()
         self.assertEqual(1, models.Result.objects.all().count())
         request = self.client.delete("/api/v1/results/%s" % result.id)
         self.assertEqual(204, request.status_code)
         self.assertEqual(0, models.Result.objects.all().count())
+        # The content is no longer referred to by any result
+        self.assertEqual(0, models.ResultContent.objects.count())
+
+    def test_delete_result_keeps_shared_content(self):
+        result = factories.ResultFactory()
+        other = factories.ResultFactory()
+        self.assertEqual(result.content.id, other.content.id)
+        request = self.client.delete("/api/v1/results/%s" % result.id)
+        self.assertEqual(204, request.status_code)
+        self.assertEqual(1, models.ResultContent.objects.count())
+        request = self.client.get("/api/v1/results/%s" % other.id)
+        self.assertEqual(factories.RESULT_CONTENTS, request.data["content"])
+
+    def test_create_identical_results_share_content(self):
+        task = factories.TaskFactory()
+        for name in ["first", "second", "third"]:
+            host = factories.HostFactory(name=name, playbook=task.playbook)
+            request = self.client.post(
+                "/api/v1/results",
+                {
+                    "content": {"skip_reason": "Conditional result was False"},
+                    "status": "skipped",
+                    "host": host.id,
+                    "task": task.id,
+                    "playbook": task.playbook.id,
+                },
+            )
+            self.assertEqual(201, request.status_code)
+        self.assertEqual(3, models.Result.objects.count())
+        self.assertEqual(1, models.ResultContent.objects.count())
 
     def test_create_result(self):
         host = factories.HostFactory()
@@ -202,6 +254,101 @@ class ResultTestCase(APITestCase):
         self.assertEqual(request.data["play"], task.play.id)
         self.assertEqual(request.data["playbook"], task.playbook.id)
 
+    def test_create_result_with_natural_keys(self):
+        playbook = factories.PlaybookFactory()
+        play = factories.PlayFactory(playbook=playbook)
+        task = factories.TaskFactory(playbook=playbook, play=play)
+        request = self.client.post(
+            "/api/v1/results",
+            {
+                "status": "ok",
+                "task_uuid": task.uuid,
+                "host_name": "natural",
+                "delegated_to_names": ["delegated"],
+                "playbook": playbook.id,
+            },
+        )
+        self.assertEqual(201, request.status_code)
+        self.assertEqual(request.data["task"], task.id)
+        self.assertEqual(request.data["play"], play.id)
+        host = models.Host.objects.get(name="natural", playbook=playbook)
+        delegated_host = models.Host.objects.get(name="delegated", playbook=playbook)
+        self.assertEqual(request.data["host"], host.id)
+        self.assertEqual(request.data["delegated_to"], [delegated_host.id])
+        self.assertEqual(host.id, models.LatestHost.objects.get(name="natural").host.id)
+
+        # Hosts are only created once per playbook
+        request = self.client.post(
+            "/api/v1/results", {"status": "ok", "task_uuid": task.uuid, "host_name": "natural", "playbook": playbook.id}
+        )
+        self.assertEqual(201, request.status_code)
+        self.assertEqual(request.data["host"], host.id)
+        self.assertEqual(2, models.Host.objects.count())
+
+    def test_create_result_with_unknown_natural_keys(self):
+        task = factories.TaskFactory()
+        # The task belongs to another playbook
+        playbook = factories.PlaybookFactory()
+        request = self.client.post(
+            "/api/v1/results", {"status": "ok", "task_uuid": task.uuid, "host_name": "host", "playbook": playbook.id}
+        )
+        self.assertEqual(400, request.status_code)
+        self.assertIn("task_uuid", request.data)
+
+        request = self.client.post("/api/v1/results", {"status": "ok", "task": task.id, "playbook": task.playbook.id})
+        self.assertEqual(400, request.status_code)
+        self.assertIn("host", request.data)
+        self.assertEqual(0, models.Result.objects.count())
+
+    def test_create_result_with_compressed_content(self):
+        task = factories.TaskFactory()
+        host = factories.HostFactory(playbook=task.playbook)
+        compressed = zlib.compress(json.dumps(factories.RESULT_CONTENTS).encode("utf8"))
+        request = self.client.post(
+            "/api/v1/results",
+            {
+                "compressed_content": base64.b64encode(compressed).decode("ascii"),
+                "status": "ok",
+                "host": host.id,
+                "task": task.id,
+                "playbook": task.playbook.id,
+            },
+        )
+        self.assertEqual(201, request.status_code)
+        # The content is stored as it was sent
+        result = models.Result.objects.get(id=request.data["id"])
+        self.assertEqual(compressed, bytes(result.content.contents))
+
+        request = self.client.get("/api/v1/results/%s" % result.id)
+        self.assertEqual(factories.RESULT_CONTENTS, request.data["content"])
+
+    def test_create_result_with_invalid_compressed_content(self):
+        task = factories.TaskFactory()
+        host = factories.HostFactory(playbook=task.playbook)
+        invalid = [
+            "not base64!",
+            base64.b64encode(b"not compressed").decode("ascii"),
+            base64.b64encode(zlib.compress(b"<html>")).decode("ascii"),
+            # Truncated stream
+            base64.b64encode(zlib.compress(json.dumps(factories.RESULT_CONTENTS).encode("utf8"))[:-8]).decode("ascii"),
+            # Starts like JSON but isn't
+            base64.b64encode(zlib.compress(b'{"msg": ')).decode("ascii"),
+        ]
+        for compressed_content in invalid:
+            request = self.client.post(
+                "/api/v1/results",
+                {
+                    "compressed_content": compressed_content,
+                    "status": "ok",
+                    "host": host.id,
+                    "task": task.id,
+                    "playbook": task.playbook.id,
+                },
+            )
+            self.assertEqual(400, request.status_code)
+            self.assertIn("compressed_content", request.data)
+        self.assertEqual(0, models.Result.objects.count())
+
     def test_partial_update_result(self):
         result = factories.ResultFactory()
         self.assertNotEqual("unreachable", result.status)
@@ -210,6 +357,16 @@ class ResultTestCase(APITestCase):
         result_updated = models.Result.objects.get(id=result.id)
         self.assertEqual("unreachable", result_updated.status)
 
+    def test_update_result_content(self):
+        result = factories.ResultFactory()
+        previous = result.content.id
+        request = self.client.patch("/api/v1/results/%s" % result.id, {"content": {"msg": "updated"}})
+        self.assertEqual(200, request.status_code)
+        result.refresh_from_db()
+        self.assertEqual({"msg": "updated"}, self.client.get("/api/v1/results/%s" % result.id).data["content"])
+        # The previous content is no longer referred to
+        self.assertFalse(models.ResultContent.objects.filter(id=previous).exists())
+
     def test_get_result(self):
         result = factories.ResultFactory()
         request = self.client.get("/api/v1/results/%s" % result.id)
@@ -263,6 +420,38 @@ class ResultTestCase(APITestCase):
         self.assertEqual(failed_result.status, results[1]["status"])
         self.assertEqual(skipped_result.status, results[0]["status"])
 
+    def test_get_result_by_effective_statuses(self):
+        ok = factories.ResultFactory(status="ok")
+        changed = factories.ResultFactory(status="ok", changed=True)
+        failed = factories.ResultFactory(status="failed")
+        ignored = factories.ResultFactory(status="failed", ignore_errors=True)
+
+        results = self.client.get("/api/v1/results?status=changed").data["results"]
+        self.assertEqual([changed.id], [result["id"] for result in results])
+
+        results = self.client.get("/api/v1/results?status=changed&status=ignored").data["results"]
+        self.assertEqual([ignored.id, changed.id], [result["id"] for result in results])
+
+        # ok and failed results include changed and ignored results
+        results = self.client.get("/api/v1/results?status=ok").data["results"]
+        self.assertEqual([changed.id, ok.id], [result["id"] for result in results])
+
+        results = self.client.get("/api/v1/results?effective_status=ok&effective_status=failed").data["results"]
+        self.assertEqual([failed.id, ok.id], [result["id"] for result in results])
+
+        request = self.client.get("/api/v1/results?effective_status=invalid")
+        self.assertEqual(400, request.status_code)
+
+    def test_update_result_effective_status(self):
+        result = factories.ResultFactory(status="ok")
+        self.assertEqual("ok", result.effective_status)
+
+        request = self.client.patch("/api/v1/results/%s" % result.id, {"changed": True})
+        self.assertEqual(200, request.status_code)
+        self.assertNotIn("effective_status", request.data)
+        result.refresh_from_db()
+        self.assertEqual("changed", result.effective_status)
+
     def test_result_status_serializer(self):
         ok = factories.ResultFactory(status="ok")
         result = self.client.get("/api/v1/results/%s" % ok.id)
@@ -376,3 +565,97 @@ class ResultTestCase(APITestCase):
         result = factories.ResultFactory()
         request = self.client.get("/api/v1/results/%s" % result.id)
         self.assertIn("inventory", request.data["playbook"]["arguments"])
+
+    def test_bulk_create_results(self):
+        host = factories.HostFactory(name="original")
+        delegated_host = factories.HostFactory(name="delegated")
+        task = factories.TaskFactory()
+        started = timezone.now()
+        ended = started + datetime.timedelta(seconds=5)
+        results = [
+            {
+                "content": factories.RESULT_CONTENTS,
+                "status": "ok",
+                "host": host.id,
+                "delegated_to": [delegated_host.id],
+                "task": task.id,
+                "play": task.play.id,
+                "playbook": task.playbook.id,
+                "started": started.isoformat(),
+                "ended": ended.isoformat(),
+                "changed": True,
+            },
+            {
+                "status": "skipped",
+                "host": delegated_host.id,
+                "task": task.id,
+                "play": task.play.id,
+                "playbook": task.playbook.id,
+            },
+        ]
+        self.assertEqual(0, models.Result.objects.count())
+        request = self.client.post("/api/v1/results/bulk", {"results": results})
+        self.assertEqual(201, request.status_code)
+        self.assertEqual(2, request.data["count"])
+        self.assertEqual(2, models.Result.objects.count())
+
+        first = models.Result.objects.get(id=request.data["ids"][0])
+        self.assertEqual(first.status, "ok")
+        self.assertEqual(first.changed, True)
+        self.assertEqual(first.effective_status, "changed")
+        self.assertEqual(first.duration, ended - started)
+        self.assertEqual(bytes(first.content.contents), utils.compressed_obj(factories.RESULT_CONTENTS))
+        self.assertEqual(list(first.delegated_to.values_list("id", flat=True)), [delegated_host.id])
+
+        second = models.Result.objects.get(id=request.data["ids"][1])
+        self.assertEqual(second.status, "skipped")
+        self.assertEqual(second.host.id, delegated_host.id)
+        self.assertEqual(list(second.delegated_to.all()), [])
+
+    def test_bulk_create_results_with_invalid_result(self):
+        task = factories.TaskFactory()
+        host = factories.HostFactory()
+        results = [
+            {"status": "ok", "host": host.id, "task": task.id, "play": task.play.id, "playbook": task.playbook.id},
+            {"status": "invalid", "host": host.id, "task": task.id, "play": task.play.id, "playbook": task.playbook.id},
+        ]
+        request = self.client.post("/api/v1/results/bulk", {"results": results})
+        self.assertEqual(400, request.status_code)
+        self.assertEqual(0, models.Result.objects.count())
+
+    def test_bulk_create_results_with_invalid_result_creates_nothing(self):
+        task = factories.TaskFactory()
+        results = [
+            {"status": "ok", "task_uuid": task.uuid, "host_name": "host", "playbook": task.playbook.id},
+            {"status": "ok", "content": {"msg": "new"}, "task_uuid": task.uuid, "playbook": task.playbook.id},
+        ]
+        request = self.client.post("/api/v1/results/bulk", {"results": results}, format="json")
+        self.assertEqual(400, request.status_code)
+        # Hosts and contents are only created once every result is valid
+        self.assertFalse(models.Host.objects.filter(name="host").exists())
+        self.assertEqual(0, models.ResultContent.objects.count())
+
+    def test_bulk_create_results_queries(self):
+        task = factories.TaskFactory()
+        hosts = [factories.HostFactory(playbook=task.playbook, name="host%s" % index) for index in range(10)]
+
+        def bulk_create(count, natural_keys):
+            results = []
+            for index in range(count):
+                result = {"status": "ok", "content": {"msg": str(index)}, "playbook": task.playbook.id}
+                if natural_keys:
+                    # New hosts are created for every request
+                    names = ["%s-%s-%s" % (natural_keys, count, index), "delegated-%s" % count]
+                    result.update(task_uuid=task.uuid, host_name=names[0], delegated_to_names=names[1:])
+                else:
+                    result.update(task=task.id, play=task.play.id, host=hosts[index].id, delegated_to=[hosts[0].id])
+                results.append(result)
+            return self.client.post("/api/v1/results/bulk", {"results": results}, format="json")
+
+        # The objects results refer to are retrieved and created at once, the same number of queries for any count
+        for natural_keys in ["natural", None]:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(201, bulk_create(2, natural_keys).status_code)
+            with self.assertNumQueries(len(queries.captured_queries)):
+                self.assertEqual(201, bulk_create(10, natural_keys).status_code)
+        self.assertEqual(24, models.Result.objects.count())
@@ -0,0 +1,141 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import io
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from ara.api import models
+from ara.api.tests import factories
+
+COUNTERS = ["ok", "changed", "failed", "ignored", "skipped", "unreachable"]
+
+
+class ResultCountsTestCase(APITestCase):
+    def setUp(self):
+        self.task = factories.TaskFactory()
+        self.play = self.task.play
+        self.playbook = self.task.playbook
+
+    def create_result(self, **kwargs):
+        return factories.ResultFactory(task=self.task, play=self.play, playbook=self.playbook, **kwargs)
+
+    def assertCounts(self, expected, *objects):
+        expected = dict(dict.fromkeys(COUNTERS, 0), **expected)
+        for obj in objects or (self.playbook, self.play, self.task):
+            obj.refresh_from_db()
+            self.assertEqual(expected, {counter: getattr(obj, "results_%s" % counter) for counter in COUNTERS}, obj)
+
+    def test_create_results(self):
+        self.create_result(status="ok")
+        self.create_result(status="ok", changed=True)
+        self.create_result(status="failed")
+        self.create_result(status="failed", ignore_errors=True)
+        self.create_result(status="skipped")
+        self.create_result(status="unreachable")
+        # Results with an unknown status aren't counted
+        self.create_result(status="unknown")
+        self.assertCounts({counter: 1 for counter in COUNTERS})
+
+    def test_update_result(self):
+        result = self.create_result(status="unknown")
+        self.assertCounts({})
+
+        request = self.client.patch("/api/v1/results/%s" % result.id, {"status": "ok", "changed": True})
+        self.assertEqual(200, request.status_code)
+        self.assertCounts({"changed": 1})
+
+        # Results retrieved from the database are counted as they were retrieved
+        result = models.Result.objects.get(pk=result.pk)
+        result.status = "failed"
+        result.save()
+        self.assertCounts({"failed": 1})
+
+        # Saving a result without changing its status doesn't count it twice
+        result.save()
+        self.assertCounts({"failed": 1})
+
+    def test_delete_result(self):
+        result = self.create_result(status="skipped")
+        self.create_result(status="skipped")
+        request = self.client.delete("/api/v1/results/%s" % result.id)
+        self.assertEqual(204, request.status_code)
+        self.assertCounts({"skipped": 1})
+
+    def test_delete_uncounted_result(self):
+        result = self.create_result(status="skipped")
+        # A result recorded before the counters existed
+        models.Task.objects.update(results_skipped=0)
+        request = self.client.delete("/api/v1/results/%s" % result.id)
+        self.assertEqual(204, request.status_code)
+        self.assertCounts({}, self.task)
+
+    def test_update_uncounted_result(self):
+        result = self.create_result(status="failed")
+        models.Task.objects.update(results_failed=0)
+        request = self.client.patch("/api/v1/results/%s" % result.id, {"ignore_errors": True})
+        self.assertEqual(200, request.status_code)
+        self.assertCounts({"ignored": 1}, self.task)
+
+    def test_bulk_create_results(self):
+        host = factories.HostFactory(playbook=self.playbook)
+        other = factories.TaskFactory(playbook=self.playbook, play=self.play)
+        results = [
+            {"status": "ok", "task": self.task.id, "changed": True},
+            {"status": "ok", "task": self.task.id},
+            {"status": "failed", "task": other.id},
+        ]
+        for result in results:
+            result.update(host=host.id, play=self.play.id, playbook=self.playbook.id)
+        request = self.client.post("/api/v1/results/bulk", {"results": results})
+        self.assertEqual(201, request.status_code)
+
+        self.assertCounts({"ok": 1, "changed": 1, "failed": 1}, self.playbook, self.play)
+        self.assertCounts({"ok": 1, "changed": 1}, self.task)
+        self.assertCounts({"failed": 1}, other)
+
+    def test_delete_host(self):
+        host = factories.HostFactory(playbook=self.playbook)
+        self.create_result(status="ok", host=host)
+        self.create_result(status="failed")
+        request = self.client.delete("/api/v1/hosts/%s" % host.id)
+        self.assertEqual(204, request.status_code)
+        self.assertCounts({"failed": 1})
+
+    def test_delete_task(self):
+        other = factories.TaskFactory(playbook=self.playbook, play=self.play)
+        factories.ResultFactory(task=other, play=self.play, playbook=self.playbook, status="ok")
+        self.create_result(status="failed")
+        request = self.client.delete("/api/v1/tasks/%s" % other.id)
+        self.assertEqual(204, request.status_code)
+        self.assertCounts({"failed": 1})
+
+    def test_get_playbook_result_counts(self):
+        self.create_result(status="ok", changed=True)
+        request = self.client.get("/api/v1/playbooks/%s" % self.playbook.id)
+        self.assertEqual(1, request.data["results_changed"])
+        self.assertEqual(0, request.data["results_ok"])
+
+        request = self.client.get("/api/v1/tasks", {"playbook": self.playbook.id})
+        self.assertEqual(1, request.data["results"][0]["results_changed"])
+
+    def test_result_counts_are_read_only(self):
+        request = self.client.patch("/api/v1/playbooks/%s" % self.playbook.id, {"results_ok": 10})
+        self.assertEqual(200, request.status_code)
+        self.assertCounts({}, self.playbook)
+
+    def test_countresults_command(self):
+        self.create_result(status="ok")
+        self.create_result(status="skipped")
+        other = factories.PlaybookFactory()
+        # Results recorded before the counters existed
+        models.Playbook.objects.update(results_ok=0, results_skipped=0)
+        models.Play.objects.update(results_ok=0, results_skipped=0)
+        models.Task.objects.update(results_ok=0, results_skipped=0)
+
+        call_command("countresults", playbook=[other.id], stdout=io.StringIO())
+        self.assertCounts({})
+
+        call_command("countresults", stdout=io.StringIO())
+        self.assertCounts({"ok": 1, "skipped": 1})
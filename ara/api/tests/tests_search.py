@@ -0,0 +1,133 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ara.api import models, search
+from ara.api.tests import factories, utils
+
+
+@override_settings(SEARCH_RESULT_KEYS=["msg", "stdout", "stderr"])
+class SearchTestCase(APITestCase):
+    def _search(self, url, value):
+        request = self.client.get(url, {"search": value})
+        self.assertEqual(200, request.status_code)
+        return [obj["id"] for obj in request.data["results"]]
+
+    def _create_content(self, contents):
+        compressed = utils.compressed_obj(contents)
+        return factories.ResultContentFactory(sha1=utils.sha1_bytes(compressed), contents=compressed)
+
+    def _create_result(self, contents):
+        return factories.ResultFactory(content=self._create_content(contents))
+
+    def test_search_playbooks(self):
+        deploy = factories.PlaybookFactory(name="Deploy the application", path="/playbooks/deploy.yml")
+        upgrade = factories.PlaybookFactory(name="Upgrade the application", path="/playbooks/upgrade.yml")
+
+        self.assertEqual([upgrade.id, deploy.id], self._search("/api/v1/playbooks", "application"))
+        # Every word must match, in any of the fields
+        self.assertEqual([deploy.id], self._search("/api/v1/playbooks", "application deploy.yml"))
+        self.assertEqual([], self._search("/api/v1/playbooks", "application missing"))
+        # Searches are not case sensitive
+        self.assertEqual([upgrade.id], self._search("/api/v1/playbooks", "UPGRADE"))
+        # An empty search doesn't filter anything
+        self.assertEqual(2, len(self._search("/api/v1/playbooks", " ")))
+
+    def test_search_playbooks_updated_and_deleted(self):
+        playbook = factories.PlaybookFactory(name="first")
+        playbook.name = "second"
+        playbook.save()
+        self.assertEqual([], self._search("/api/v1/playbooks", "first"))
+        self.assertEqual([playbook.id], self._search("/api/v1/playbooks", "second"))
+
+        playbook.delete()
+        self.assertEqual([], self._search("/api/v1/playbooks", "second"))
+
+    def test_search_syntax_is_not_interpreted(self):
+        task = factories.TaskFactory(name='Run "make install" (with: sudo) AND NOT -v *')
+        for value in ['"make install"', "(with:", "AND NOT", "-v *", 'install" OR "']:
+            self.assertEqual(200, self.client.get("/api/v1/tasks", {"search": value}).status_code, value)
+        self.assertEqual([task.id], self._search("/api/v1/tasks", '"make'))
+
+    def test_search_tasks(self):
+        install = factories.TaskFactory(name="Install packages")
+        factories.TaskFactory(name="Start services")
+        self.assertEqual([install.id], self._search("/api/v1/tasks", "packages"))
+
+        # Other filters still apply
+        request = self.client.get("/api/v1/tasks", {"search": "packages", "playbook": install.playbook.id + 1000})
+        self.assertEqual(0, request.data["count"])
+
+    def test_search_results(self):
+        failed = self._create_result({"msg": "Connection refused by host", "rc": 1, "stdout": "", "stderr": "fatal"})
+        looped = self._create_result({"results": [{"item": "one", "stdout": "first"}, {"stdout": "refused later"}]})
+        self._create_result({"msg": "All assertions passed", "cmd": "refused"})
+
+        self.assertEqual([looped.id, failed.id], self._search("/api/v1/results", "refused"))
+        self.assertEqual([failed.id], self._search("/api/v1/results", "fatal connection"))
+        # Only the keys listed in SEARCH_RESULT_KEYS are searched
+        self.assertEqual([], self._search("/api/v1/results", "one"))
+
+    def test_search_results_sharing_contents(self):
+        contents = self._create_content({"msg": "shared"})
+        first = factories.ResultFactory(content=contents)
+        second = factories.ResultFactory(content=contents)
+        self.assertEqual([second.id, first.id], self._search("/api/v1/results", "shared"))
+
+    @override_settings(SEARCH_RESULT_KEYS=[])
+    def test_search_results_disabled(self):
+        # Results aren't indexed unless SEARCH_RESULT_KEYS is set
+        result = self._create_result({"msg": "not indexed"})
+        self.assertEqual("", result.content.text)
+        self.assertEqual([], self._search("/api/v1/results", "indexed"))
+
+    @override_settings(SEARCH_RESULT_MAX_LENGTH=20)
+    def test_search_results_max_length(self):
+        result = self._create_result({"msg": "indexed", "stdout": "x" * 100})
+        self.assertEqual(20, len(result.content.text))
+        self.assertEqual([result.id], self._search("/api/v1/results", "indexed"))
+
+    def test_search_results_invalid_contents(self):
+        # Contents that can't be decoded are stored without text
+        content = factories.ResultContentFactory(sha1="1" * 40, contents=b"not compressed")
+        self.assertEqual("", content.text)
+        content = factories.ResultContentFactory(sha1="2" * 40, contents=utils.compressed_str("{"))
+        self.assertEqual("", content.text)
+
+    @override_settings(SEARCH_BACKEND="ara.api.search.SearchBackend")
+    def test_search_without_index(self):
+        playbook = factories.PlaybookFactory(name="Deploy the application", path="/playbooks/deploy.yml")
+        result = self._create_result({"msg": "Connection refused"})
+        self.assertEqual([playbook.id], self._search("/api/v1/playbooks", "application deploy"))
+        self.assertEqual([result.id], self._search("/api/v1/results", "refused"))
+
+    def test_install_search_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Triggers are specific to the sqlite search backend")
+        playbook = factories.PlaybookFactory(name="before")
+        # Re-creating a table when migrating with sqlite drops its triggers
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER playbooks_search_insert")
+        factories.PlaybookFactory(name="missed")
+
+        search.get_search_backend().install()
+        self.assertEqual(1, len(self._search("/api/v1/playbooks", "missed")))
+        self.assertEqual([playbook.id], self._search("/api/v1/playbooks", "before"))
+        factories.PlaybookFactory(name="after")
+        self.assertEqual(1, len(self._search("/api/v1/playbooks", "after")))
+
+    def test_indexresults_command(self):
+        result = self._create_result({"msg": "recorded earlier"})
+        models.ResultContent.objects.update(text="")
+        self.assertEqual([], self._search("/api/v1/results", "earlier"))
+
+        stdout = io.StringIO()
+        call_command("indexresults", stdout=stdout)
+        self.assertIn("1 result contents", stdout.getvalue())
+        self.assertEqual([result.id], self._search("/api/v1/results", "earlier"))
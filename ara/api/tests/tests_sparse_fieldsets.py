@@ -0,0 +1,81 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from ara.api.tests import factories
+
+
+class SparseFieldsetsTestCase(APITestCase):
+    def test_fields_list(self):
+        factories.ResultFactory.create_batch(2)
+        request = self.client.get("/api/v1/results", {"fields": "id,status"})
+        self.assertEqual(200, request.status_code)
+        self.assertEqual(2, len(request.data["results"]))
+        for result in request.data["results"]:
+            self.assertEqual({"id", "status"}, set(result))
+
+    def test_fields_repeated(self):
+        result = factories.ResultFactory()
+        request = self.client.get("/api/v1/results/%s?fields=id&fields=changed" % result.id)
+        self.assertEqual({"id": result.id, "changed": False}, request.data)
+
+    def test_exclude_retrieve(self):
+        playbook = factories.PlaybookFactory()
+        request = self.client.get("/api/v1/playbooks/%s" % playbook.id, {"exclude": "arguments, items"})
+        self.assertEqual(200, request.status_code)
+        self.assertEqual(playbook.path, request.data["path"])
+        self.assertNotIn("arguments", request.data)
+        self.assertNotIn("items", request.data)
+
+    def test_fields_and_exclude(self):
+        host = factories.HostFactory()
+        request = self.client.get("/api/v1/hosts/%s" % host.id, {"fields": "id,name,facts", "exclude": "facts"})
+        self.assertEqual({"id": host.id, "name": host.name}, request.data)
+
+    def test_unknown_fields(self):
+        factories.PlaybookFactory()
+        request = self.client.get("/api/v1/playbooks", {"fields": "id,unknown", "exclude": "facts"})
+        self.assertEqual(400, request.status_code)
+        self.assertIn("unknown", request.data["fields"])
+        self.assertIn("facts", request.data["exclude"])
+
+    def test_fields_not_applied_to_writes(self):
+        playbook = factories.PlaybookFactory()
+        request = self.client.patch("/api/v1/playbooks/%s?fields=id" % playbook.id, {"status": "completed"})
+        self.assertEqual(200, request.status_code)
+        self.assertEqual("completed", request.data["status"])
+
+    def test_fields_skip_nested_objects(self):
+        result = factories.ResultFactory()
+        with self.assertNumQueries(1):
+            request = self.client.get("/api/v1/results/%s" % result.id, {"fields": "id,status"})
+        self.assertEqual({"id": result.id, "status": "ok"}, request.data)
+
+        # Nested objects that are requested are still retrieved along with their item counts
+        request = self.client.get("/api/v1/results/%s" % result.id, {"fields": "id,task"})
+        self.assertEqual(result.task.name, request.data["task"]["name"])
+        self.assertEqual(1, request.data["task"]["items"]["results"])
+
+    def test_fields_defer_binary_columns(self):
+        playbook = factories.PlaybookFactory()
+        playbook.labels.add(factories.LabelFactory())
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get("/api/v1/playbooks", {"fields": "id,name"})
+        self.assertEqual(1, len(request.data["results"]))
+        # Neither labels nor item counts are retrieved
+        self.assertEqual(2, len(queries.captured_queries))
+        for query in queries.captured_queries:
+            self.assertNotIn('"playbooks"."arguments"', query["sql"])
+            self.assertNotIn('"tasks"', query["sql"])
+
+    def test_exclude_file_content(self):
+        file = factories.FileFactory()
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get("/api/v1/files/%s" % file.id, {"exclude": "content"})
+        self.assertEqual(file.content.sha1, request.data["sha1"])
+        self.assertNotIn("content", request.data)
+        for query in queries.captured_queries:
+            self.assertNotIn('"file_contents"."contents"', query["sql"])
@@ -0,0 +1,146 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import LiveServerTestCase
+
+from ara.api import models
+from ara.api.tests import factories
+from ara.clients.http import HttpClient
+from ara.clients.spool import Spool, replay
+
+
+class SpoolTestCase(LiveServerTestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.journal = os.path.join(self.spool_dir, "journal.jsonl")
+        self.client = HttpClient(endpoint=self.live_server_url)
+
+    def tearDown(self):
+        self.client.http.close()
+        shutil.rmtree(self.spool_dir)
+
+    def _result(self, task, host, status="ok"):
+        return dict(playbook=task.playbook.id, play=task.play.id, task=task.id, host=host.id, status=status, content={})
+
+    def test_spool_replays_and_removes_journal(self):
+        task = factories.TaskFactory()
+        host = factories.HostFactory(playbook=task.playbook)
+
+        spool = Spool(self.client, self.journal)
+        spool.append("post", "/api/v1/results", **self._result(task, host, "ok"))
+        spool.append("post", "/api/v1/results", **self._result(task, host, "failed"))
+        spool.append("patch", "/api/v1/tasks/%s" % task.id, status="failed")
+        self.assertTrue(spool.close())
+
+        self.assertEqual(2, models.Result.objects.count())
+        self.assertEqual(["failed", "ok"], sorted(models.Result.objects.values_list("status", flat=True)))
+        self.assertEqual("failed", models.Task.objects.get(id=task.id).status)
+        self.assertEqual([], os.listdir(self.spool_dir))
+
+    def test_spool_replays_raw_entries(self):
+        task = factories.TaskFactory()
+        host = factories.HostFactory(playbook=task.playbook)
+
+        spool = Spool(self.client, self.journal)
+        spool.append_raw("post", "/api/v1/results", json.dumps(self._result(task, host), ensure_ascii=False))
+        spool.append_raw("post", "/api/v1/labels", json.dumps({"name": "caf\u00e9"}, ensure_ascii=False))
+        self.assertTrue(spool.close())
+
+        self.assertEqual(1, models.Result.objects.count())
+        self.assertEqual("caf\u00e9", models.Label.objects.get().name)
+
+    def test_coalesce_consecutive_results(self):
+        entries = [
+            (10, {"method": "post", "url": "/api/v1/results", "payload": {"status": "ok"}}),
+            (20, {"method": "post", "url": "/api/v1/results", "payload": {"status": "failed"}}),
+            (30, {"method": "patch", "url": "/api/v1/tasks/1", "payload": {"status": "failed"}}),
+            (40, {"method": "post", "url": "/api/v1/results", "payload": {"status": "skipped"}}),
+        ]
+        requests = list(Spool._coalesce(entries))
+        self.assertEqual(
+            [
+                (
+                    20,
+                    "post",
+                    "/api/v1/results/bulk",
+                    {"results": [{"status": "ok"}, {"status": "failed"}]},
+                    [(10, {"status": "ok"}), (20, {"status": "failed"})],
+                ),
+                (30, "patch", "/api/v1/tasks/1", {"status": "failed"}, []),
+                (
+                    40,
+                    "post",
+                    "/api/v1/results/bulk",
+                    {"results": [{"status": "skipped"}]},
+                    [(40, {"status": "skipped"})],
+                ),
+            ],
+            requests,
+        )
+
+    def test_invalid_result_does_not_drop_coalesced_results(self):
+        task = factories.TaskFactory()
+        host = factories.HostFactory(playbook=task.playbook)
+
+        spool = Spool(self.client, self.journal)
+        spool.append("post", "/api/v1/results", **self._result(task, host, "ok"))
+        spool.append("post", "/api/v1/results", **self._result(task, host, "invalid"))
+        spool.append("post", "/api/v1/results", **self._result(task, host, "failed"))
+        with self.assertLogs("ara.clients.spool", "ERROR"):
+            self.assertTrue(spool.close())
+
+        self.assertEqual(["failed", "ok"], sorted(models.Result.objects.values_list("status", flat=True)))
+
+    def test_spool_keeps_retrying_until_closed(self):
+        playbook = factories.PlaybookFactory(status="running")
+
+        # Nothing listens on this port until the client is replaced
+        spool = Spool(HttpClient(endpoint="http://127.0.0.1:9"), self.journal, retries=1, retry_delay=0.01)
+        spool.max_retry_delay = 0.05
+        with self.assertLogs("ara.clients.spool", "WARNING"):
+            spool.append("patch", "/api/v1/playbooks/%s" % playbook.id, status="completed")
+            time.sleep(0.5)
+        self.assertTrue(spool.thread.is_alive())
+
+        # Without keepalive so that the server doesn't wait for further requests after the test
+        spool.client = HttpClient(endpoint=self.live_server_url, keepalive=False)
+        self.assertTrue(spool.close())
+        self.assertEqual("completed", models.Playbook.objects.get(id=playbook.id).status)
+
+    def test_journal_is_kept_when_server_is_unavailable(self):
+        playbook = factories.PlaybookFactory(status="running")
+
+        # Nothing listens on this port
+        spool = Spool(HttpClient(endpoint="http://127.0.0.1:9"), self.journal, retries=0)
+        spool.append("patch", "/api/v1/playbooks/%s" % playbook.id, status="completed")
+        self.assertFalse(spool.close())
+        self.assertTrue(os.path.exists(self.journal))
+
+        # The journal can be replayed once the server is back
+        self.assertEqual([], replay(self.client, self.spool_dir))
+        self.assertEqual("completed", models.Playbook.objects.get(id=playbook.id).status)
+        self.assertEqual([], os.listdir(self.spool_dir))
+
+    def test_replay_resumes_from_offset(self):
+        first = factories.PlaybookFactory(status="running")
+        second = factories.PlaybookFactory(status="running")
+
+        lines = [
+            json.dumps({"method": "patch", "url": "/api/v1/playbooks/%s" % first.id, "payload": {"status": "failed"}}),
+            json.dumps({"method": "patch", "url": "/api/v1/playbooks/%s" % second.id, "payload": {"status": "failed"}}),
+        ]
+        with open(self.journal, "w") as fd:
+            fd.write("\n".join(lines) + "\n")
+        # The first entry was already sent
+        with open(self.journal + ".offset", "w") as fd:
+            fd.write(str(len(lines[0]) + 1))
+
+        self.assertEqual([], replay(self.client, self.journal))
+        self.assertEqual("running", models.Playbook.objects.get(id=first.id).status)
+        self.assertEqual("failed", models.Playbook.objects.get(id=second.id).status)
@@ -3,6 +3,8 @@
 
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.dateparse import parse_duration
 from rest_framework.test import APITestCase
@@ -103,6 +105,19 @@ class TaskTestCase(APITestCase):
         self.assertEqual(1, len(request.data["results"]))
         self.assertEqual(task.name, request.data["results"][0]["name"])
 
+    def test_get_tasks_constant_queries(self):
+        task = factories.TaskFactory()
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get("/api/v1/tasks")
+        self.assertEqual(task.file.path, request.data["results"][0]["path"])
+        for query in queries.captured_queries:
+            self.assertNotIn('"file_contents"."contents"', query["sql"])
+
+        # The files of the tasks are retrieved along with the tasks
+        factories.TaskFactory.create_batch(2)
+        with self.assertNumQueries(len(queries.captured_queries)):
+            self.client.get("/api/v1/tasks")
+
     def test_delete_task(self):
         task = factories.TaskFactory()
         self.assertEqual(1, models.Task.objects.all().count())
@@ -131,6 +146,41 @@ class TaskTestCase(APITestCase):
         self.assertEqual(201, request.status_code)
         self.assertEqual(1, models.Task.objects.count())
 
+    def test_create_task_with_play_uuid(self):
+        play = factories.PlayFactory()
+        file = factories.FileFactory(playbook=play.playbook)
+        request = self.client.post(
+            "/api/v1/tasks",
+            {
+                "name": "create",
+                "uuid": "5c5f67b9-e63c-6297-80da-000000000009",
+                "action": "test",
+                "lineno": 2,
+                "handler": False,
+                "status": "running",
+                "play_uuid": play.uuid,
+                "file": file.id,
+                "playbook": play.playbook.id,
+            },
+        )
+        self.assertEqual(201, request.status_code)
+        self.assertEqual(request.data["play"], play.id)
+
+        request = self.client.post(
+            "/api/v1/tasks",
+            {
+                "name": "create",
+                "action": "test",
+                "lineno": 2,
+                "handler": False,
+                "play_uuid": "5c5f67b9-e63c-6297-80da-000000000001",
+                "file": file.id,
+                "playbook": play.playbook.id,
+            },
+        )
+        self.assertEqual(400, request.status_code)
+        self.assertIn("play_uuid", request.data)
+
     def test_partial_update_task(self):
         task = factories.TaskFactory()
         self.assertNotEqual("update", task.name)
@@ -719,3 +769,36 @@ class TaskNotesTestCase(APITestCase):
         # We should only have the task with the exception
         self.assertEqual(len(ids), 1)
         self.assertIn(task.id, ids)
+
+    def test_task_notes_counts(self):
+        """Test that the number of notes is stored when tasks are saved."""
+        task = factories.TaskFactory(warnings=TASK_WARNINGS, deprecations=TASK_DEPRECATIONS)
+        self.assertEqual(3, task.warnings_count)
+        self.assertEqual(2, task.deprecations_count)
+        self.assertEqual(0, task.exceptions_count)
+
+        request = self.client.patch("/api/v1/tasks/%s" % task.id, {"exceptions": TASK_EXCEPTIONS}, format="json")
+        self.assertEqual(200, request.status_code)
+        self.assertEqual(2, request.data["exceptions_count"])
+
+        # Counts are read-only
+        request = self.client.patch("/api/v1/tasks/%s" % task.id, {"warnings_count": 10}, format="json")
+        self.assertEqual(200, request.status_code)
+        self.assertEqual(3, request.data["warnings_count"])
+
+    def test_get_tasks_by_notes_counts(self):
+        """Test that tasks can be filtered by their number of notes."""
+        with_warnings = factories.TaskFactory(warnings=TASK_WARNINGS)
+        with_deprecations = factories.TaskFactory(deprecations=TASK_DEPRECATIONS[:1])
+        with_exceptions = factories.TaskFactory(exceptions=TASK_EXCEPTIONS)
+        without_notes = factories.TaskFactory()
+
+        for query, expected in (
+            ("warnings_count__gt=0", [with_warnings]),
+            ("warnings_count__lt=3", [without_notes, with_exceptions, with_deprecations]),
+            ("deprecations_count__gt=0", [with_deprecations]),
+            ("exceptions_count__gt=1", [with_exceptions]),
+            ("exceptions_count__gt=0&warnings_count__gt=0", []),
+        ):
+            request = self.client.get("/api/v1/tasks?%s" % query)
+            self.assertEqual([task.id for task in expected], [task["id"] for task in request.data["results"]], query)
@@ -25,3 +25,10 @@ def sha1(obj):
     Returns the sha1 of a compressed string or an object
     """
     return hashlib.sha1(obj.encode("utf8")).hexdigest()
+
+
+def sha1_bytes(obj):
+    """
+    Returns the sha1 of bytes, such as compressed contents
+    """
+    return hashlib.sha1(obj).hexdigest()
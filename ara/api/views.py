@@ -1,12 +1,179 @@
 # Copyright (c) 2022 The ARA Records Ansible authors
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
-from rest_framework import viewsets
+from django.db.models import Avg, BinaryField, Count, F, Prefetch, Q, Sum
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
 from ara.api import filters, models, serializers
 
 
-class LabelViewSet(viewsets.ModelViewSet):
+class SparseFieldsetsMixin:
+    """
+    Allows clients to retrieve only some of the fields of objects with the "fields" and "exclude" parameters as
+    comma separated lists of fields, for example: /api/v1/results?fields=id,status,changed
+    Fields that are not returned are not serialized and their binary columns are not retrieved from the database.
+    Viewsets can also check is_field_requested() to avoid preparing fields that are not returned.
+    """
+
+    sparse_fieldsets_params = ["fields", "exclude"]
+    sparse_fieldsets_actions = ["list", "retrieve"]
+
+    def get_sparse_fieldsets(self):
+        """
+        Returns the set of field names provided for each of the "fields" and "exclude" parameters
+        """
+        fieldsets = {}
+        request = getattr(self, "request", None)
+        if request is None or getattr(self, "action", None) not in self.sparse_fieldsets_actions:
+            return fieldsets
+
+        for param in self.sparse_fieldsets_params:
+            names = ",".join(request.query_params.getlist(param)).split(",")
+            names = {name.strip() for name in names if name.strip()}
+            if names:
+                fieldsets[param] = names
+        return fieldsets
+
+    def is_field_requested(self, name):
+        fieldsets = self.get_sparse_fieldsets()
+        if "fields" in fieldsets and name not in fieldsets["fields"]:
+            return False
+        return name not in fieldsets.get("exclude", set())
+
+    def get_requested_fields(self, *names):
+        return [name for name in names if self.is_field_requested(name)]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldsets = self.get_sparse_fieldsets()
+        if not fieldsets:
+            return serializer
+
+        # The fields of the serializer of each object when serializing many objects
+        fields = getattr(serializer, "child", serializer).fields
+        errors = {}
+        for param, names in fieldsets.items():
+            unknown = names - set(fields)
+            if unknown:
+                errors[param] = "Unknown fields: %s" % ", ".join(sorted(unknown))
+        if errors:
+            raise ValidationError(errors)
+
+        for name in list(fields):
+            if not self.is_field_requested(name):
+                fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        deferred = [
+            field.name
+            for field in queryset.model._meta.concrete_fields
+            if isinstance(field, BinaryField) and not self.is_field_requested(field.name)
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+
+class MetricsMixin:
+    """
+    Provides metrics about the objects matching the filters of a viewset, aggregated by one of their fields in the
+    database, for example: /api/v1/playbooks/metrics?aggregate=path&status=failed
+    Aggregates are paginated and ordered by the value of the field they are aggregated by.
+    """
+
+    # Fields that objects can be aggregated by, by name of the aggregate
+    metrics_aggregates = {}
+    metrics_default_aggregate = None
+    # Related objects that are counted for each aggregate (i.e, the tasks of playbooks)
+    metrics_items = []
+
+    def get_metrics(self):
+        """
+        Returns the metrics computed for each aggregate as a dictionary of aggregation expressions
+        """
+        return {"count": Count("pk")}
+
+    def get_metrics_items(self, queryset, lookup, aggregates):
+        """
+        Returns the number of related objects of each aggregate, by item and by aggregate
+        """
+        items = {}
+        for item in self.metrics_items:
+            relation = queryset.model._meta.get_field(item)
+            field = relation.field.name
+            related = relation.related_model.objects.filter(**{"%s__in" % field: queryset.values("pk")})
+            # Objects without a value for the field are aggregated together
+            in_aggregates = Q(**{"%s__%s__in" % (field, lookup): aggregates})
+            if None in aggregates:
+                in_aggregates |= Q(**{"%s__%s__isnull" % (field, lookup): True})
+            related = related.filter(in_aggregates)
+            counts = related.values(aggregate=F("%s__%s" % (field, lookup))).annotate(count=Count("pk"))
+            items[item] = {count["aggregate"]: count["count"] for count in counts.order_by()}
+        return items
+
+    @action(detail=False, methods=["get"])
+    def metrics(self, request):
+        aggregate = request.query_params.get("aggregate", self.metrics_default_aggregate)
+        if aggregate not in self.metrics_aggregates:
+            raise ValidationError({"aggregate": "Must be one of: %s" % ", ".join(self.metrics_aggregates)})
+        lookup = self.metrics_aggregates[aggregate]
+
+        # The ordering of objects would otherwise be part of the grouping
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        metrics = queryset.values(aggregate=F(lookup)).annotate(**self.get_metrics()).order_by("aggregate")
+        page = self.paginate_queryset(metrics)
+        metrics = list(metrics) if page is None else page
+
+        if self.metrics_items:
+            items = self.get_metrics_items(queryset, lookup, [metric["aggregate"] for metric in metrics])
+            for metric in metrics:
+                for item in self.metrics_items:
+                    metric[item] = items[item].get(metric["aggregate"], 0)
+
+        serializer = self.get_serializer(metrics, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+
+class ResultContentCollectorMixin:
+    """
+    Result contents are shared between identical results: once the results referring to them are
+    deleted, the contents that are no longer referred to by any other result are deleted as well.
+    """
+
+    @staticmethod
+    def get_result_content_ids(instance):
+        return set(instance.results.values_list("content", flat=True))
+
+    def perform_destroy(self, instance):
+        content_ids = self.get_result_content_ids(instance)
+        super().perform_destroy(instance)
+        models.ResultContent.objects.delete_orphans(content_ids)
+
+
+class ResultCountsMixin:
+    """
+    Results are deleted along with their play, task or host: the result counters of the playbook, plays and tasks
+    they belonged to are counted again once they are deleted.
+    """
+
+    def perform_destroy(self, instance):
+        related = instance.results.values_list("playbook", "play", "task").distinct()
+        playbooks, plays, tasks = (set(ids) for ids in zip(*related)) if related else (set(), set(), set())
+        super().perform_destroy(instance)
+        # Counting the results of objects that were deleted along with the instance doesn't update anything
+        models.Playbook.refresh_result_counts(playbooks)
+        models.Play.refresh_result_counts(plays)
+        models.Task.refresh_result_counts(tasks)
+
+
+class LabelViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
     queryset = models.Label.objects.all()
     filterset_class = filters.LabelFilter
 
@@ -20,24 +187,50 @@ class LabelViewSet(viewsets.ModelViewSet):
             return serializers.LabelSerializer
 
 
-class PlaybookViewSet(viewsets.ModelViewSet):
+class PlaybookViewSet(SparseFieldsetsMixin, MetricsMixin, ResultContentCollectorMixin, viewsets.ModelViewSet):
     filterset_class = filters.PlaybookFilter
+    metrics_aggregates = {
+        "name": "name",
+        "path": "path",
+        "label": "labels__name",
+        "ansible_version": "ansible_version",
+        "controller": "controller",
+        "user": "user",
+    }
+    metrics_default_aggregate = "path"
+    metrics_items = models.ItemCountQuerySet.ITEMS
 
     def get_queryset(self):
         statuses = self.request.GET.getlist("status")
         if statuses:
-            return models.Playbook.objects.filter(status__in=statuses).order_by("-id")
-        return models.Playbook.objects.all().order_by("-id")
+            queryset = models.Playbook.objects.filter(status__in=statuses)
+        else:
+            queryset = models.Playbook.objects.all()
+        if self.action in ["list", "retrieve"]:
+            if self.is_field_requested("items"):
+                queryset = queryset.with_item_counts()
+            if self.is_field_requested("labels"):
+                queryset = queryset.prefetch_related("labels")
+        return queryset.order_by("-id")
 
     def get_serializer_class(self):
         if self.action == "list":
             return serializers.ListPlaybookSerializer
         elif self.action == "retrieve":
             return serializers.DetailedPlaybookSerializer
+        elif self.action == "metrics":
+            return serializers.PlaybookMetricsSerializer
         else:
             # create/update/destroy
             return serializers.PlaybookSerializer
 
+    def get_metrics(self):
+        metrics = super().get_metrics()
+        metrics.update(duration_total=Sum("duration"), duration_avg=Avg("duration"))
+        for value, _ in models.Playbook.STATUS:
+            metrics[value] = Count("pk", filter=Q(status=value))
+        return metrics
+
     def perform_destroy(self, instance):
         """
         Update the LatestHost table when deleting a playbook (if necessary)
@@ -60,14 +253,20 @@ class PlaybookViewSet(viewsets.ModelViewSet):
         return super().perform_destroy(instance)
 
 
-class PlayViewSet(viewsets.ModelViewSet):
+class PlayViewSet(SparseFieldsetsMixin, ResultCountsMixin, ResultContentCollectorMixin, viewsets.ModelViewSet):
     filterset_class = filters.PlayFilter
 
     def get_queryset(self):
         statuses = self.request.GET.getlist("status")
         if statuses:
-            return models.Play.objects.filter(status__in=statuses).order_by("-id")
-        return models.Play.objects.all().order_by("-id")
+            queryset = models.Play.objects.filter(status__in=statuses)
+        else:
+            queryset = models.Play.objects.all()
+        if self.action in ["list", "retrieve"] and self.is_field_requested("items"):
+            queryset = queryset.with_item_counts()
+        if self.action == "retrieve":
+            queryset = models.prefetch_item_counts(queryset, *self.get_requested_fields("playbook"))
+        return queryset.order_by("-id")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -79,28 +278,67 @@ class PlayViewSet(viewsets.ModelViewSet):
             return serializers.PlaySerializer
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(
+    SparseFieldsetsMixin, MetricsMixin, ResultCountsMixin, ResultContentCollectorMixin, viewsets.ModelViewSet
+):
     filterset_class = filters.TaskFilter
+    metrics_aggregates = {"action": "action", "name": "name", "path": "file__path"}
+    metrics_default_aggregate = "action"
+    metrics_items = ["results"]
 
     def get_queryset(self):
         statuses = self.request.GET.getlist("status")
         if statuses:
-            return models.Task.objects.filter(status__in=statuses).order_by("-id")
-        return models.Task.objects.all().order_by("-id")
+            queryset = models.Task.objects.filter(status__in=statuses)
+        else:
+            queryset = models.Task.objects.all()
+        if self.action in ["list", "retrieve"]:
+            if self.is_field_requested("items"):
+                queryset = queryset.with_item_counts()
+            if self.is_field_requested("path"):
+                # For the path of the task
+                queryset = queryset.select_related("file")
+        if self.action == "retrieve":
+            queryset = models.prefetch_item_counts(queryset, *self.get_requested_fields("playbook", "play"))
+            if self.is_field_requested("file"):
+                queryset = queryset.select_related("file__content").defer("file__content__contents")
+        return queryset.order_by("-id")
 
     def get_serializer_class(self):
         if self.action == "list":
             return serializers.ListTaskSerializer
         elif self.action == "retrieve":
             return serializers.DetailedTaskSerializer
+        elif self.action == "metrics":
+            return serializers.TaskMetricsSerializer
         else:
             # create/update/destroy
             return serializers.TaskSerializer
 
+    def get_metrics(self):
+        metrics = super().get_metrics()
+        metrics.update(duration_total=Sum("duration"), duration_avg=Avg("duration"))
+        for value, _ in models.Task.STATUS:
+            metrics[value] = Count("pk", filter=Q(status=value))
+        return metrics
+
 
-class HostViewSet(viewsets.ModelViewSet):
+class HostViewSet(
+    SparseFieldsetsMixin, MetricsMixin, ResultCountsMixin, ResultContentCollectorMixin, viewsets.ModelViewSet
+):
     queryset = models.Host.objects.all()
     filterset_class = filters.HostFilter
+    metrics_aggregates = {"name": "name"}
+    metrics_default_aggregate = "name"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # Facts are not returned by list views
+            queryset = queryset.defer("facts")
+        if self.action == "retrieve":
+            queryset = models.prefetch_item_counts(queryset, *self.get_requested_fields("playbook"))
+        return queryset
 
     def perform_destroy(self, instance):
         """
@@ -126,25 +364,78 @@ class HostViewSet(viewsets.ModelViewSet):
             return serializers.ListHostSerializer
         elif self.action == "retrieve":
             return serializers.DetailedHostSerializer
+        elif self.action == "bulk":
+            return serializers.BulkHostSerializer
+        elif self.action == "stats":
+            return serializers.BulkHostStatsSerializer
+        elif self.action == "metrics":
+            return serializers.HostMetricsSerializer
         else:
             # create/update/destroy
             return serializers.HostSerializer
 
+    def get_metrics(self):
+        metrics = super().get_metrics()
+        for field in ["changed", "failed", "ok", "skipped", "unreachable"]:
+            metrics["%s_total" % field] = Sum(field)
+        return metrics
 
-class LatestHostViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Gets or creates many hosts of a playbook in a single request and database transaction.
+        Hosts are provided as a list of names under the "names" key along with the "playbook".
+        Returns the id of each host by name.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def stats(self, request):
+        """
+        Updates the statistics of many hosts of a playbook in a single request and database transaction.
+        Statistics are provided by host name under the "hosts" key along with the "playbook".
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class LatestHostViewSet(SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.LatestHost.objects.all()
     filterset_class = filters.LatestHostFilter
     serializer_class = serializers.DetailedLatestHostSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ["list", "retrieve"] and self.is_field_requested("host"):
+            queryset = models.prefetch_item_counts(queryset, "host__playbook")
+        return queryset
 
-class ResultViewSet(viewsets.ModelViewSet):
+
+class ResultViewSet(SparseFieldsetsMixin, ResultContentCollectorMixin, viewsets.ModelViewSet):
     filterset_class = filters.ResultFilter
 
+    @staticmethod
+    def get_result_content_ids(instance):
+        return {instance.content_id}
+
+    def perform_update(self, serializer):
+        # The previous content may no longer be referred to if the content was updated
+        content_ids = self.get_result_content_ids(serializer.instance)
+        super().perform_update(serializer)
+        models.ResultContent.objects.delete_orphans(content_ids)
+
     def get_queryset(self):
-        statuses = self.request.GET.getlist("status")
-        if statuses:
-            return models.Result.objects.filter(status__in=statuses).order_by("-id")
-        return models.Result.objects.all().order_by("-id")
+        queryset = models.Result.objects.all()
+        if self.action == "list" and self.is_field_requested("delegated_to"):
+            queryset = queryset.prefetch_related(Prefetch("delegated_to", queryset=models.Host.objects.only("id")))
+        if self.action == "retrieve":
+            queryset = models.prefetch_item_counts(queryset, *self.get_requested_fields("playbook", "play", "task"))
+        return queryset.order_by("-id")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -152,28 +443,78 @@ class ResultViewSet(viewsets.ModelViewSet):
         elif self.action == "retrieve":
             return serializers.DetailedResultSerializer
         else:
-            # create/update/destroy
+            # create/update/destroy/bulk
             return serializers.ResultSerializer
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Creates many results in a single request and database transaction.
+        Results are provided as a list under the "results" key with the same fields as /api/v1/results.
+        """
+        results = request.data
+        if isinstance(results, dict):
+            results = results.get("results", [])
+
+        serializer = self.get_serializer(data=results, many=True)
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save()
+        return Response(
+            {"count": len(created), "ids": [result.id for result in created]}, status=status.HTTP_201_CREATED
+        )
 
-class FileViewSet(viewsets.ModelViewSet):
+
+class FileViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
     queryset = models.File.objects.all()
     filterset_class = filters.FileFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list" or (self.action == "retrieve" and not self.is_field_requested("content")):
+            # For the sha1 of the contents, without the contents themselves
+            queryset = queryset.select_related("content").defer("content__contents")
+        if self.action == "retrieve":
+            queryset = models.prefetch_item_counts(queryset, *self.get_requested_fields("playbook"))
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "list":
             return serializers.ListFileSerializer
         elif self.action == "retrieve":
             return serializers.DetailedFileSerializer
+        elif self.action == "bulk":
+            return serializers.BulkFileSerializer
         else:
             # create/update/destroy
             return serializers.FileSerializer
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Creates many files of a playbook in a single request from the sha1 of their contents.
+        Files are provided as a list of "path" and "sha1" under the "files" key along with the "playbook".
+        Returns the id of each file created by path and the sha1 of the contents the server doesn't have: files
+        with these contents must be created with their content instead.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
-class RecordViewSet(viewsets.ModelViewSet):
+class RecordViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
     queryset = models.Record.objects.all()
     filterset_class = filters.RecordFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # Values are not returned by list views
+            queryset = queryset.defer("value")
+        if self.action == "retrieve":
+            queryset = models.prefetch_item_counts(queryset, *self.get_requested_fields("playbook"))
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "list":
             return serializers.ListRecordSerializer
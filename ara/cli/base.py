@@ -45,6 +45,12 @@ def global_arguments(parser):
         default=os.environ.get("ARA_API_PASSWORD", None),
         help=("API server password for authentication, defaults to ARA_API_PASSWORD or None"),
     )
+    parser.add_argument(
+        "--token",
+        metavar="<token>",
+        default=os.environ.get("ARA_API_TOKEN", None),
+        help=("API token for authentication instead of a username and password, defaults to ARA_API_TOKEN or None"),
+    )
     parser.add_argument(
         "--ssl-cert",
         metavar="<path/to/certificate>",
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from cliff.command import Command
 
 from ara.cli.base import global_arguments
-from ara.clients.utils import get_client
+from ara.clients.utils import get_client, paginate
 
 
 class ExpireObjects(Command):
@@ -63,6 +63,7 @@ class ExpireObjects(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -77,30 +78,32 @@ class ExpireObjects(Command):
         # ex: 2019-11-21T00:57:41.702229
         query["updated_before"] = (datetime.now() - timedelta(hours=args.hours)).isoformat()
         query["order"] = args.order
-        query["limit"] = args.limit
+        query["fields"] = "id,updated"
 
         endpoints = ["/api/v1/playbooks", "/api/v1/plays", "/api/v1/tasks"]
         for endpoint in endpoints:
-            objects = client.get(endpoint, **query)
-            self.log.info("Found %s objects matching query on %s" % (objects["count"], endpoint))
-            # TODO: Improve client validation and exception handling
-            if "count" not in objects:
-                # If we didn't get an answer we can parse, it's probably due to an error 500, 403, 401, etc.
-                # The client would have logged the error.
-                self.log.error(
-                    "Client failed to retrieve results, see logs for ara.clients.offline or ara.clients.http."
-                )
-                sys.exit(1)
-
-            for obj in objects["results"]:
-                link = "%s/%s" % (endpoint, obj["id"])
-                if not args.confirm:
-                    self.log.info(
-                        "Dry-run: %s would have been expired, status is running since %s" % (link, obj["updated"])
+            found = 0
+            for objects in paginate(client, endpoint, args.limit, **query):
+                # TODO: Improve client validation and exception handling
+                if "results" not in objects:
+                    # If we didn't get an answer we can parse, it's probably due to an error 500, 403, 401, etc.
+                    # The client would have logged the error.
+                    self.log.error(
+                        "Client failed to retrieve results, see logs for ara.clients.offline or ara.clients.http."
                     )
-                else:
-                    self.log.info("Expiring %s, status is running since %s" % (link, obj["updated"]))
-                    client.patch(link, status="expired")
-                    self.expired += 1
+                    sys.exit(1)
+
+                found += len(objects["results"])
+                for obj in objects["results"]:
+                    link = "%s/%s" % (endpoint, obj["id"])
+                    if not args.confirm:
+                        self.log.info(
+                            "Dry-run: %s would have been expired, status is running since %s" % (link, obj["updated"])
+                        )
+                    else:
+                        self.log.info("Expiring %s, status is running since %s" % (link, obj["updated"]))
+                        client.patch(link, status="expired")
+                        self.expired += 1
+            self.log.info("Found %s objects matching query on %s" % (found, endpoint))
 
         self.log.info("%s objects expired" % self.expired)
@@ -126,6 +126,7 @@ class HostList(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -225,6 +226,7 @@ class HostShow(ShowOne):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -297,6 +299,7 @@ class HostDelete(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -375,19 +378,14 @@ class HostMetrics(Lister):
         parser.add_argument(
             "--order",
             metavar="<order>",
-            default="-updated",
-            help=(
-                "Orders hosts by a field ('id', 'created', 'updated', 'name')\n"
-                "Defaults to '-updated' descending so the most recent host is at the top.\n"
-                "The order can be reversed by omitting the '-': ara host list --order=updated\n"
-                "This influences the API request, not the ordering of the metrics."
-            ),
+            default=None,
+            help=("Deprecated and ignored: metrics are computed from every host matching the search arguments"),
         )
         parser.add_argument(
             "--limit",
             metavar="<limit>",
             default=os.environ.get("ARA_CLI_LIMIT", 1000),
-            help=("Return metrics for the first <limit> determined by the ordering. Defaults to ARA_CLI_LIMIT or 1000.")
+            help=("Return metrics for the first <limit> host names. Defaults to ARA_CLI_LIMIT or 1000.")
         )
         # fmt: on
         return parser
@@ -402,6 +400,7 @@ class HostMetrics(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -428,41 +427,22 @@ class HostMetrics(Lister):
         if args.without_unreachable:
             query["unreachable__lt"] = 1
 
-        query["order"] = args.order
+        query["aggregate"] = "name"
         query["limit"] = args.limit
 
-        resp = client.get("/api/v1/hosts", **query)
-
-        # Group hosts by name
-        hosts = {}
-        for host in resp["results"]:
-            name = host["name"]
-            if name not in hosts:
-                hosts[name] = []
-            hosts[name].append(host)
-
-        data = {}
-        for name, host_results in hosts.items():
-            data[name] = {
-                "name": name,
-                "count": len(host_results),
-                "changed": 0,
-                "failed": 0,
-                "ok": 0,
-                "skipped": 0,
-                "unreachable": 0,
-            }
-
-            for host in host_results:
-                for status in ["changed", "failed", "ok", "skipped", "unreachable"]:
-                    data[name][status] += host[status]
+        if args.order is not None:
+            self.log.warning("--order is deprecated and ignored: metrics are computed from every host")
+
+        metrics = client.get("/api/v1/hosts/metrics", **query)
+        for metric in metrics["results"]:
+            metric["name"] = metric["aggregate"]
 
         columns = ("name", "count", "changed", "failed", "ok", "skipped", "unreachable")
         # fmt: off
         return (
             columns, (
-                [data[host][column] for column in columns]
-                for host in sorted(data.keys())
+                [metric[column] for column in columns]
+                for metric in metrics["results"]
             )
         )
         # fmt: on
@@ -89,6 +89,7 @@ class PlayList(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -163,6 +164,7 @@ class PlayShow(ShowOne):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -222,6 +224,7 @@ class PlayDelete(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -12,7 +12,7 @@ from cliff.show import ShowOne
 
 import ara.cli.utils as cli_utils
 from ara.cli.base import global_arguments
-from ara.clients.utils import get_client
+from ara.clients.utils import get_client, paginate
 
 
 class PlaybookList(Lister):
@@ -73,6 +73,12 @@ class PlaybookList(Lister):
             default=None,
             help=("List playbooks matching the provided name (full or partial)"),
         )
+        parser.add_argument(
+            "--search",
+            metavar="<words>",
+            default=None,
+            help=("List playbooks matching every word of the search in their name or path"),
+        )
         parser.add_argument(
             "--path",
             metavar="<path>",
@@ -120,6 +126,7 @@ class PlaybookList(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -147,6 +154,9 @@ class PlaybookList(Lister):
         if args.name is not None:
             query["name"] = args.name
 
+        if args.search is not None:
+            query["search"] = args.search
+
         if args.path is not None:
             query["path"] = args.path
 
@@ -250,6 +260,7 @@ class PlaybookShow(ShowOne):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -311,6 +322,7 @@ class PlaybookDelete(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -429,6 +441,7 @@ class PlaybookPrune(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -473,28 +486,31 @@ class PlaybookPrune(Command):
         # ex: 2019-11-21T00:57:41.702229
         query["started_before"] = (datetime.now() - timedelta(days=args.days)).isoformat()
         query["order"] = args.order
-        query["limit"] = args.limit
-
-        playbooks = client.get("/api/v1/playbooks", **query)
-
-        # TODO: Improve client validation and exception handling
-        if "count" not in playbooks:
-            # If we didn't get an answer we can parse, it's probably due to an error 500, 403, 401, etc.
-            # The client would have logged the error.
-            self.log.error("Client failed to retrieve results, see logs for ara.clients.offline or ara.clients.http.")
-            sys.exit(1)
-
-        self.log.info("Found %s playbooks matching query" % playbooks["count"])
-        for playbook in playbooks["results"]:
-            if not args.confirm:
-                msg = "Dry-run: playbook {id} ({path}) would have been deleted, start date: {started}"
-                self.log.info(msg.format(id=playbook["id"], path=playbook["path"], started=playbook["started"]))
-            else:
-                msg = "Deleting playbook {id} ({path}), start date: {started}"
-                self.log.info(msg.format(id=playbook["id"], path=playbook["path"], started=playbook["started"]))
-                client.delete("/api/v1/playbooks/%s" % playbook["id"])
-                self.deleted += 1
-
+        query["fields"] = "id,path,started"
+
+        found = 0
+        for playbooks in paginate(client, "/api/v1/playbooks", args.limit, **query):
+            # TODO: Improve client validation and exception handling
+            if "results" not in playbooks:
+                # If we didn't get an answer we can parse, it's probably due to an error 500, 403, 401, etc.
+                # The client would have logged the error.
+                self.log.error(
+                    "Client failed to retrieve results, see logs for ara.clients.offline or ara.clients.http."
+                )
+                sys.exit(1)
+
+            found += len(playbooks["results"])
+            for playbook in playbooks["results"]:
+                if not args.confirm:
+                    msg = "Dry-run: playbook {id} ({path}) would have been deleted, start date: {started}"
+                    self.log.info(msg.format(id=playbook["id"], path=playbook["path"], started=playbook["started"]))
+                else:
+                    msg = "Deleting playbook {id} ({path}), start date: {started}"
+                    self.log.info(msg.format(id=playbook["id"], path=playbook["path"], started=playbook["started"]))
+                    client.delete("/api/v1/playbooks/%s" % playbook["id"])
+                    self.deleted += 1
+
+        self.log.info("Found %s playbooks matching query" % found)
         self.log.info("%s playbooks deleted" % self.deleted)
 
 
@@ -509,9 +525,9 @@ class PlaybookMetrics(Lister):
         # fmt: off
         parser.add_argument(
             "--aggregate",
-            choices=["name", "path", "ansible_version", "controller"],
+            choices=["name", "path", "label", "ansible_version", "controller", "user"],
             default="path",
-            help=("Aggregate playbooks by path, name, ansible version or controller. Defaults to path."),
+            help=("Aggregate playbooks by path, name, label, ansible version, controller or user. Defaults to path."),
         )
         # Playbook search arguments and ordering as per ara.api.filters.PlaybookFilter
         parser.add_argument(
@@ -577,18 +593,14 @@ class PlaybookMetrics(Lister):
         parser.add_argument(
             "--order",
             metavar="<order>",
-            default="-started",
-            help=(
-                "Orders playbooks by a field ('id', 'created', 'updated', 'started', 'ended', 'duration')\n"
-                "Defaults to '-started' descending so the most recent playbook is at the top.\n"
-                "The order can be reversed by omitting the '-': ara playbook list --order=started"
-            ),
+            default=None,
+            help=("Deprecated and ignored: metrics are computed from every playbook matching the search arguments"),
         )
         parser.add_argument(
             "--limit",
             metavar="<limit>",
             default=os.environ.get("ARA_CLI_LIMIT", 1000),
-            help=("Returns the first <limit> determined by the ordering. Defaults to ARA_CLI_LIMIT or 1000.")
+            help=("Returns metrics for the first <limit> aggregates. Defaults to ARA_CLI_LIMIT or 1000.")
         )
         # fmt: on
         return parser
@@ -603,6 +615,7 @@ class PlaybookMetrics(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -637,59 +650,22 @@ class PlaybookMetrics(Lister):
         if args.status is not None:
             query["status"] = args.status
 
-        query["order"] = args.order
+        query["aggregate"] = args.aggregate
         query["limit"] = args.limit
 
-        playbooks = client.get("/api/v1/playbooks", **query)
+        if args.order is not None:
+            self.log.warning("--order is deprecated and ignored: metrics are computed from every playbook")
 
-        # TODO: This could probably be made more efficient without needing to iterate a second time
-        # Group playbooks by aggregate
-        aggregate = {}
-        for playbook in playbooks["results"]:
-            item = playbook[args.aggregate]
-            if item not in aggregate:
-                aggregate[item] = []
-            aggregate[item].append(playbook)
-
-        data = {}
-        for item, playbooks in aggregate.items():
-            data[item] = {
-                "count": len(playbooks),
-                "hosts": 0,
-                "plays": 0,
-                "tasks": 0,
-                "results": 0,
-                "files": 0,
-                "records": 0,
-                "expired": 0,
-                "failed": 0,
-                "running": 0,
-                "completed": 0,
-                "unknown": 0,
-                "duration_total": 0.0,
-            }
-
-            if args.aggregate == "path" and not args.long:
-                data[item]["aggregate"] = cli_utils.truncatepath(item, 50)
-            else:
-                data[item]["aggregate"] = item
-
-            for playbook in playbooks:
-                for status in ["completed", "expired", "failed", "running", "unknown"]:
-                    if playbook["status"] == status:
-                        data[item][status] += 1
-
-                for obj in ["files", "hosts", "plays", "tasks", "records", "results"]:
-                    data[item][obj] += playbook["items"][obj]
-
-                if playbook["duration"] is not None:
-                    data[item]["duration_total"] = cli_utils.sum_timedelta(
-                        playbook["duration"], data[item]["duration_total"]
-                    )
-
-            delta = timedelta(seconds=data[item]["duration_total"])
-            data[item]["duration_total"] = str(delta)
-            data[item]["duration_avg"] = cli_utils.avg_timedelta(delta, data[item]["count"])
+        metrics = client.get("/api/v1/playbooks/metrics", **query)
+        for metric in metrics["results"]:
+            # Durations are formatted like timedeltas, as they always were
+            metric["duration_total"] = cli_utils.format_duration(metric["duration_total"])
+            metric["duration_avg"] = cli_utils.format_duration(metric["duration_avg"])
+
+        # Paths can easily take up too much width real estate
+        if args.aggregate == "path" and not args.long:
+            for metric in metrics["results"]:
+                metric["aggregate"] = cli_utils.truncatepath(metric["aggregate"], 50)
 
         # fmt: off
         if args.long:
@@ -725,8 +701,8 @@ class PlaybookMetrics(Lister):
             )
         return (
             columns, (
-                [data[playbook][column] for column in columns]
-                for playbook in sorted(data.keys())
+                [metric[column] for column in columns]
+                for metric in metrics["results"]
             )
         )
         # fmt: on
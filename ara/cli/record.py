@@ -77,6 +77,7 @@ class RecordList(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -147,6 +148,7 @@ class RecordShow(ShowOne):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -204,6 +206,7 @@ class RecordDelete(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
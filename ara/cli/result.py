@@ -58,6 +58,12 @@ class ResultList(Lister):
                 "ok, failed, skipped, unreachable, changed, ignored, unknown"
             )
         )
+        parser.add_argument(
+            "--search",
+            metavar="<words>",
+            default=None,
+            help=("List results matching every word of the search in their content, see SEARCH_RESULT_KEYS")
+        )
         parser.add_argument(
             "--ignore-errors",
             action="store_true",
@@ -111,6 +117,7 @@ class ResultList(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -130,6 +137,9 @@ class ResultList(Lister):
         if args.status is not None:
             query["status"] = args.status
 
+        if args.search is not None:
+            query["search"] = args.search
+
         if args.changed:
             query["changed"] = args.changed
 
@@ -230,6 +240,7 @@ class ResultShow(ShowOne):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -317,6 +328,7 @@ class ResultDelete(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -0,0 +1,72 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import logging
+import os
+import sys
+
+from cliff.command import Command
+
+from ara.cli.base import global_arguments
+from ara.clients.http import AraHttpClient
+from ara.clients.spool import replay
+from ara.clients.utils import get_client
+
+
+class SpoolReplay(Command):
+    """Sends spooled data left behind by the callback plugin to the API server"""
+
+    log = logging.getLogger(__name__)
+
+    def get_parser(self, prog_name):
+        parser = super().get_parser(prog_name)
+        parser = global_arguments(parser)
+        # fmt: off
+        parser.add_argument(
+            "path",
+            metavar="<path>",
+            default=os.environ.get("ARA_SPOOL_DIR", None),
+            nargs="?",
+            help="Spool journal or directory of journals to replay, defaults to ARA_SPOOL_DIR",
+        )
+        parser.add_argument(
+            "--retries",
+            metavar="<retries>",
+            type=int,
+            default=5,
+            help="Number of times to retry a request before giving up on a journal (default: 5)",
+        )
+        # fmt: on
+        return parser
+
+    def take_action(self, args):
+        if args.path is None or not os.path.exists(args.path):
+            self.log.error("Spool journal or directory not found: %s" % args.path)
+            sys.exit(1)
+
+        verify = False if args.insecure else True
+        if args.ssl_ca:
+            verify = args.ssl_ca
+        client = get_client(
+            client=args.client,
+            endpoint=args.server,
+            timeout=args.timeout,
+            username=args.username,
+            password=args.password,
+            token=args.token,
+            cert=args.ssl_cert,
+            key=args.ssl_key,
+            verify=verify,
+            run_sql_migrations=False,
+        )
+
+        # The offline client inherits from the http client
+        if not isinstance(client, AraHttpClient):
+            self.log.error("Spooled data can only be replayed with the http or offline clients")
+            sys.exit(1)
+
+        remaining = replay(client.client, args.path, retries=args.retries)
+        if remaining:
+            self.log.error("%s journal(s) could not be replayed entirely: %s" % (len(remaining), ", ".join(remaining)))
+            sys.exit(1)
+        self.log.info("Spooled data replayed successfully")
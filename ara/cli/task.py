@@ -4,7 +4,6 @@
 import logging
 import os
 import sys
-from datetime import timedelta
 
 from cliff.command import Command
 from cliff.lister import Lister
@@ -43,6 +42,12 @@ class TaskList(Lister):
             default=None,
             help=("List tasks matching the provided name (full or partial)"),
         )
+        parser.add_argument(
+            "--search",
+            metavar="<words>",
+            default=None,
+            help=("List tasks matching every word of the search in their name"),
+        )
         parser.add_argument(
             "--uuid",
             metavar="<uuid>",
@@ -141,6 +146,7 @@ class TaskList(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -157,6 +163,9 @@ class TaskList(Lister):
         if args.name is not None:
             query["name"] = args.name
 
+        if args.search is not None:
+            query["search"] = args.search
+
         if args.uuid is not None:
             query["uuid"] = args.uuid
 
@@ -267,6 +276,7 @@ class TaskShow(ShowOne):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -328,6 +338,7 @@ class TaskDelete(Command):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -405,19 +416,14 @@ class TaskMetrics(Lister):
         parser.add_argument(
             "--order",
             metavar="<order>",
-            default="-started",
-            help=(
-                "Orders tasks by a field ('id', 'created', 'updated', 'started', 'ended', 'duration')\n"
-                "Defaults to '-started' descending so the most recent task is at the top.\n"
-                "The order can be reversed by omitting the '-': ara task metrics --order=started\n"
-                "This influences the API request, not the ordering of the metrics."
-            ),
+            default=None,
+            help=("Deprecated and ignored: metrics are computed from every task matching the search arguments"),
         )
         parser.add_argument(
             "--limit",
             metavar="<limit>",
             default=os.environ.get("ARA_CLI_LIMIT", 1000),
-            help=("Return metrics for the first <limit> determined by the ordering. Defaults to ARA_CLI_LIMIT or 1000.")
+            help=("Return metrics for the first <limit> aggregates. Defaults to ARA_CLI_LIMIT or 1000.")
         )
         # fmt: on
         return parser
@@ -432,6 +438,7 @@ class TaskMetrics(Lister):
             timeout=args.timeout,
             username=args.username,
             password=args.password,
+            token=args.token,
             cert=args.ssl_cert,
             key=args.ssl_key,
             verify=verify,
@@ -457,53 +464,22 @@ class TaskMetrics(Lister):
         if args.action is not None:
             query["action"] = args.action
 
-        query["order"] = args.order
+        query["aggregate"] = args.aggregate
         query["limit"] = args.limit
 
-        tasks = client.get("/api/v1/tasks", **query)
+        if args.order is not None:
+            self.log.warning("--order is deprecated and ignored: metrics are computed from every task")
 
-        # TODO: This could probably be made more efficient without needing to iterate a second time
-        # Group tasks by aggregate
-        aggregate = {}
-        for task in tasks["results"]:
-            item = task[args.aggregate]
-            if item not in aggregate:
-                aggregate[item] = []
-            aggregate[item].append(task)
-
-        data = {}
-        for item, tasks in aggregate.items():
-            data[item] = {
-                "count": len(tasks),
-                "results": 0,
-                "completed": 0,
-                "expired": 0,
-                "failed": 0,
-                "running": 0,
-                "unknown": 0,
-                "duration_total": 0.0,
-            }
-
-            if args.aggregate == "path" and not args.long:
-                data[item]["aggregate"] = cli_utils.truncatepath(item, 50)
-            else:
-                data[item]["aggregate"] = item
-
-            for task in tasks:
-                for status in ["completed", "expired", "failed", "running", "unknown"]:
-                    if task["status"] == status:
-                        data[item][status] += 1
-
-                data[item]["results"] += task["items"]["results"]
-
-                if task["duration"] is not None:
-                    data[item]["duration_total"] = cli_utils.sum_timedelta(
-                        task["duration"], data[item]["duration_total"]
-                    )
-
-            delta = timedelta(seconds=data[item]["duration_total"])
-            data[item]["duration_total"] = str(delta)
-            data[item]["duration_avg"] = cli_utils.avg_timedelta(delta, data[item]["count"])
+        metrics = client.get("/api/v1/tasks/metrics", **query)
+        for metric in metrics["results"]:
+            # Durations are formatted like timedeltas, as they always were
+            metric["duration_total"] = cli_utils.format_duration(metric["duration_total"])
+            metric["duration_avg"] = cli_utils.format_duration(metric["duration_avg"])
+
+        # Paths can easily take up too much width real estate
+        if args.aggregate == "path" and not args.long:
+            for metric in metrics["results"]:
+                metric["aggregate"] = cli_utils.truncatepath(metric["aggregate"], 50)
 
         # fmt: off
         if args.long:
@@ -530,8 +506,8 @@ class TaskMetrics(Lister):
 
         return (
             columns, (
-                [data[action][column] for column in columns]
-                for action in sorted(data.keys())
+                [metric[column] for column in columns]
+                for metric in metrics["results"]
             )
         )
         # fmt: on
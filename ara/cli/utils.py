@@ -3,57 +3,45 @@
 
 import functools
 import os
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 
 @functools.lru_cache(maxsize=10)
 def get_playbook(client, playbook_id):
-    playbook = client.get("/api/v1/playbooks/%s" % playbook_id)
+    playbook = client.get("/api/v1/playbooks/%s" % playbook_id, fields="id,path")
     return playbook
 
 
 @functools.lru_cache(maxsize=10)
 def get_play(client, play_id):
-    play = client.get("/api/v1/plays/%s" % play_id)
+    play = client.get("/api/v1/plays/%s" % play_id, fields="id,name")
     return play
 
 
 @functools.lru_cache(maxsize=10)
 def get_task(client, task_id):
-    task = client.get("/api/v1/tasks/%s" % task_id)
+    task = client.get("/api/v1/tasks/%s" % task_id, fields="id,name")
     return task
 
 
 @functools.lru_cache(maxsize=10)
 def get_host(client, host_id):
-    host = client.get("/api/v1/hosts/%s" % host_id)
+    host = client.get("/api/v1/hosts/%s" % host_id, fields="id,name")
     return host
 
 
-def parse_timedelta(duration: str, pattern: str = "%H:%M:%S.%f"):
-    """Parses a timedelta string back into a timedelta object"""
-    parsed = datetime.strptime(duration, pattern)
-    # fmt: off
-    return timedelta(
-        hours=parsed.hour,
-        minutes=parsed.minute,
-        seconds=parsed.second,
-        microseconds=parsed.microsecond
-    ).total_seconds()
-    # fmt: on
+def parse_duration(duration: str):
+    """Parses a duration as provided by the API, for example "1 02:03:04.000005", back into a timedelta"""
+    days, _, duration = duration.rpartition(" ")
+    hours, minutes, seconds = duration.split(":")
+    return timedelta(days=int(days or 0), hours=int(hours), minutes=int(minutes), seconds=float(seconds))
 
 
-def sum_timedelta(duration: str, total: float):
-    """
-    Returns the sum of two timedeltas as provided by the API, for example:
-    00:00:02.031557 + 00:00:04.782581 = ?
-    """
-    return parse_timedelta(duration) + total
-
-
-def avg_timedelta(delta: timedelta, count: int):
-    """Returns an average timedelta based on the amount of occurrences"""
-    return str(delta / count)
+def format_duration(duration):
+    """Formats a duration provided by the API like a timedelta, for example: 0:00:02.031557"""
+    if duration is None:
+        return str(timedelta())
+    return str(parse_duration(duration))
 
 
 # Also see: ui.templatetags.truncatepath
@@ -0,0 +1,108 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import json
+import logging
+import os
+import weakref
+
+from requests import Request
+
+from ara.clients.utils import active_client
+from ara.setup.exceptions import MissingDjangoException
+
+try:
+    from django.core.signals import request_finished, request_started
+    from django.test.client import RequestFactory
+    from django.urls import Resolver404, resolve
+except ImportError as e:
+    raise MissingDjangoException from e
+
+
+class AraDirectClient:
+    """
+    Queries the API from within the same process without going through an HTTP server.
+    Requests are handed to the API views directly, skipping the network, WSGI and middleware layers.
+    Like a WSGI server, the client signals the start and the end of requests so that Django closes
+    the database connections which can't be reused, and errors are logged rather than raised.
+    """
+
+    def __init__(self, auth=None, run_sql_migrations=True):
+        self.log = logging.getLogger(__name__)
+
+        from django import setup as django_setup
+        from django.core.management import execute_from_command_line
+
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ara.server.settings")
+
+        if run_sql_migrations:
+            # Automatically create the database and run migrations (is there a better way?)
+            execute_from_command_line(["django", "migrate"])
+
+        # Set up the things Django needs
+        django_setup()
+
+        self.auth = auth
+        # Links to other pages (i.e, "next") are absolute: the host must be allowed by default
+        headers = {"SERVER_NAME": "localhost", "HTTP_ACCEPT": "application/json"}
+        if self.auth is not None:
+            # Let requests compute the authorization header like it would for the http client
+            prepared = Request("get", "http://localhost", auth=self.auth).prepare()
+            headers["HTTP_AUTHORIZATION"] = prepared.headers["Authorization"]
+        self.factory = RequestFactory(**headers)
+        active_client._instance = weakref.ref(self)
+
+    def _request(self, method, url, body=None, **kwargs):
+        if method == "get":
+            request = self.factory.get(url, data=kwargs)
+        elif method == "delete":
+            request = self.factory.delete(url)
+        else:
+            if body is None:
+                body = json.dumps(kwargs)
+            request = getattr(self.factory, method)(url, data=body, content_type="application/json")
+
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            self.log.error(f"404 | Failed to {method} on {url}: no such endpoint")
+            return {"detail": "Not found."}
+
+        request_started.send(sender=self.__class__, environ=request.environ)
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+            response.render()
+        except Exception:
+            self.log.exception(f"500 | Failed to {method} on {url}: {body or kwargs}")
+            return {"detail": "A server error occurred."}
+        finally:
+            request_finished.send(sender=self.__class__)
+
+        self.log.debug(f"Direct {response.status_code}: {method} on {url}")
+
+        if response.status_code >= 400 or response.status_code not in [200, 201, 204]:
+            self.log.error(f"{response.status_code} | Failed to {method} on {url}: {body or kwargs}")
+
+        if response.status_code == 204:
+            return response
+
+        return json.loads(response.content)
+
+    def get(self, endpoint, **kwargs):
+        return self._request("get", endpoint, **kwargs)
+
+    def patch(self, endpoint, **kwargs):
+        return self._request("patch", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self._request("post", endpoint, **kwargs)
+
+    def post_raw(self, endpoint, data):
+        """Posts a payload that was already encoded to JSON"""
+        return self._request("post", endpoint, body=data)
+
+    def put(self, endpoint, **kwargs):
+        return self._request("put", endpoint, **kwargs)
+
+    def delete(self, endpoint, **kwargs):
+        return self._request("delete", endpoint)
@@ -7,13 +7,25 @@ import weakref
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 
 from ara.clients.utils import active_client
 from ara.setup import ara_version
 
 
 class HttpClient:
-    def __init__(self, endpoint="http://127.0.0.1:8000", auth=None, cert=None, timeout=30, verify=True):
+    def __init__(
+        self,
+        endpoint="http://127.0.0.1:8000",
+        auth=None,
+        cert=None,
+        timeout=30,
+        verify=True,
+        pool_connections=10,
+        pool_maxsize=10,
+        pool_block=False,
+        keepalive=True,
+    ):
         self.log = logging.getLogger(__name__)
 
         self.endpoint = endpoint.rstrip("/")
@@ -26,8 +38,17 @@ class HttpClient:
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
+        if not keepalive:
+            self.headers["Connection"] = "close"
         self.http = requests.Session()
         self.http.headers.update(self.headers)
+
+        # pool_connections is the number of hosts to keep a pool of connections for and pool_maxsize is the number
+        # of connections kept open for each host. Threads using more connections than pool_maxsize at once either
+        # open connections that are discarded afterwards or, with pool_block, wait for a connection to be available.
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
         if self.auth is not None:
             self.http.auth = self.auth
         if self.cert is not None:
@@ -55,6 +76,10 @@ class HttpClient:
     def post(self, url, **payload):
         return self._request("post", url, data=json.dumps(payload))
 
+    def post_raw(self, url, data):
+        # The payload was already encoded to JSON by the caller
+        return self._request("post", url, data=data.encode("utf-8"))
+
     def put(self, url, **payload):
         return self._request("put", url, data=json.dumps(payload))
 
@@ -63,7 +88,17 @@ class HttpClient:
 
 
 class AraHttpClient:
-    def __init__(self, endpoint="http://127.0.0.1:8000", auth=None, cert=None, timeout=30, verify=True):
+    def __init__(
+        self,
+        endpoint="http://127.0.0.1:8000",
+        auth=None,
+        cert=None,
+        timeout=30,
+        verify=True,
+        pool_maxsize=10,
+        pool_block=False,
+        keepalive=True,
+    ):
         self.log = logging.getLogger(__name__)
         self.endpoint = endpoint
         self.auth = auth
@@ -71,7 +106,14 @@ class AraHttpClient:
         self.timeout = int(timeout)
         self.verify = verify
         self.client = HttpClient(
-            endpoint=self.endpoint, timeout=self.timeout, auth=self.auth, cert=self.cert, verify=self.verify
+            endpoint=self.endpoint,
+            timeout=self.timeout,
+            auth=self.auth,
+            cert=self.cert,
+            verify=self.verify,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keepalive=keepalive,
         )
         active_client._instance = weakref.ref(self)
 
@@ -101,6 +143,10 @@ class AraHttpClient:
     def post(self, endpoint, **kwargs):
         return self._request("post", endpoint, **kwargs)
 
+    def post_raw(self, endpoint, data):
+        """Posts a payload that was already encoded to JSON"""
+        return self._request("post_raw", endpoint, data=data)
+
     def put(self, endpoint, **kwargs):
         return self._request("put", endpoint, **kwargs)
 
@@ -16,7 +16,7 @@ except ImportError as e:
 
 
 class AraOfflineClient(AraHttpClient):
-    def __init__(self, auth=None, run_sql_migrations=True):
+    def __init__(self, auth=None, run_sql_migrations=True, pool_maxsize=10, pool_block=False, keepalive=True):
         self.log = logging.getLogger(__name__)
 
         from django import setup as django_setup
@@ -32,7 +32,13 @@ class AraOfflineClient(AraHttpClient):
         django_setup()
 
         self._start_server()
-        super().__init__(endpoint="http://localhost:%d" % self.server_thread.port, auth=auth)
+        super().__init__(
+            endpoint="http://localhost:%d" % self.server_thread.port,
+            auth=auth,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keepalive=keepalive,
+        )
 
     def _start_server(self):
         self.server_thread = ServerThread("localhost")
@@ -0,0 +1,213 @@
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+
+# Consecutive results in the journal are sent to the bulk endpoint in a single request
+RESULTS_URL = "/api/v1/results"
+BULK_RESULTS_URL = "/api/v1/results/bulk"
+
+
+class Spool:
+    """
+    Durable, append-only journal of API requests on the local disk.
+
+    Requests are appended to the journal as one JSON document per line and a background thread
+    replays them to the API in order, in batches and with retries until the spool is closed.
+    The position up to which the journal has been replayed is kept in a sidecar ".offset" file
+    so that a journal left behind by an interrupted run can be resumed by another process.
+    """
+
+    def __init__(self, client, path, batch_size=100, retries=5, retry_delay=1, max_retry_delay=60):
+        self.log = logging.getLogger(__name__)
+        # An ara.clients.http.HttpClient: the raw responses are needed to know whether a request should be retried
+        self.client = client
+        self.path = path
+        self.offset_path = path + ".offset"
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.offset = 0
+        if os.path.exists(self.offset_path):
+            with open(self.offset_path) as fd:
+                self.offset = int(fd.read().strip() or 0)
+
+        self.journal = open(self.path, "a", encoding="utf-8")
+        self.closing = False
+        # Interrupts the delay between retries when the spool is closed
+        self.closed = threading.Event()
+        self.failed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._drain, name="ara-spool", daemon=True)
+        self.thread.start()
+
+    def append(self, method, url, **payload):
+        entry = json.dumps({"method": method, "url": url, "payload": payload})
+        with self.condition:
+            self.journal.write(entry + "\n")
+            self.journal.flush()
+            self.condition.notify()
+
+    def append_raw(self, method, url, data):
+        # The payload was already encoded to JSON, embed it in the entry as-is rather than encoding it again
+        entry = '{"method": %s, "url": %s, "payload": %s}' % (json.dumps(method), json.dumps(url), data)
+        with self.condition:
+            self.journal.write(entry + "\n")
+            self.journal.flush()
+            self.condition.notify()
+
+    def close(self, timeout=None):
+        """
+        Waits for the journal to be replayed and removes it.
+        Returns False if it could not be replayed entirely, in which case it is left on disk.
+        """
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.closed.set()
+        self.thread.join(timeout)
+        self.journal.close()
+
+        if self.thread.is_alive() or self.failed or self.offset < os.path.getsize(self.path):
+            self.log.warning(
+                f"Spool journal could not be replayed entirely, replay it with: ara spool replay {self.path}"
+            )
+            return False
+
+        os.remove(self.path)
+        if os.path.exists(self.offset_path):
+            os.remove(self.offset_path)
+        return True
+
+    def _drain(self):
+        while True:
+            entries = self._read()
+            if not entries:
+                with self.condition:
+                    if self.closing:
+                        return
+                    self.condition.wait(timeout=1)
+                continue
+
+            for offset, method, url, payload, merged in self._coalesce(entries):
+                status = self._send(method, url, payload)
+                if status is not None and status >= 400 and len(merged) > 1:
+                    # Results merged into a bulk request are created atomically, one invalid result fails all of
+                    # them: send them one by one so that only the invalid ones are skipped
+                    self.log.warning(
+                        f"{status} | Failed to post {len(merged)} results in bulk, sending them one by one"
+                    )
+                    for result_offset, result in merged:
+                        status = self._send("post", RESULTS_URL, result)
+                        if status is None:
+                            break
+                        self._skip(status, "post", RESULTS_URL, result)
+                        self._commit(result_offset)
+                elif status is not None:
+                    self._skip(status, method, url, payload)
+
+                if status is None:
+                    self.failed = True
+                    return
+                self._commit(offset)
+
+    def _read(self):
+        """Returns up to batch_size complete entries following the current offset along with their end offsets"""
+        entries = []
+        with open(self.path, "rb") as fd:
+            fd.seek(self.offset)
+            while len(entries) < self.batch_size:
+                line = fd.readline()
+                # A line without a newline is incomplete: it is either still being written or was truncated by a crash
+                if not line.endswith(b"\n"):
+                    break
+                entries.append((fd.tell(), json.loads(line)))
+        return entries
+
+    @staticmethod
+    def _coalesce(entries):
+        """
+        Merges consecutive result creations into bulk requests.
+        Yields the requests along with the offsets and payloads of the results they merge, if any.
+        """
+        results = []
+        for index, (offset, entry) in enumerate(entries):
+            if entry["method"] == "post" and entry["url"] == RESULTS_URL:
+                results.append((offset, entry["payload"]))
+                following = entries[index + 1][1] if index + 1 < len(entries) else None
+                if following is None or following["method"] != "post" or following["url"] != RESULTS_URL:
+                    payload = {"results": [result for _, result in results]}
+                    yield offset, "post", BULK_RESULTS_URL, payload, results
+                    results = []
+            else:
+                yield offset, entry["method"], entry["url"], entry["payload"], []
+
+    def _send(self, method, url, payload):
+        """
+        Sends a request, retrying with a capped backoff for as long as the server is unavailable.
+        Once the spool is closed, gives up after the configured number of retries.
+        Returns the status code of the response or None if the request could not be sent.
+        """
+        attempt = 0
+        while True:
+            try:
+                if method == "delete":
+                    response = self.client.delete(url)
+                else:
+                    response = getattr(self.client, method)(url, **payload)
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+            else:
+                # Errors from the server or its proxies are worth retrying, the others would fail the same way again
+                if response.status_code < 500 and response.status_code != 429:
+                    return response.status_code
+                error = f"HTTP {response.status_code}"
+
+            if self.closing and attempt >= self.retries:
+                self.log.error(f"Failed to {method} on {url} after {attempt} retries: {error}")
+                return None
+
+            delay = min(self.retry_delay * 2**attempt, self.max_retry_delay)
+            self.log.warning(f"Failed to {method} on {url} ({error}), retrying in {delay}s")
+            if self.closing:
+                time.sleep(delay)
+            else:
+                self.closed.wait(delay)
+            attempt += 1
+
+    def _skip(self, status, method, url, payload):
+        # Requests refused by the server would fail the same way again
+        if status >= 400:
+            self.log.error(f"{status} | Failed to {method} on {url}, skipping: {payload}")
+
+    def _commit(self, offset):
+        self.offset = offset
+        with open(self.offset_path, "w") as fd:
+            fd.write(str(offset))
+
+
+def replay(client, path, retries=5, retry_delay=1):
+    """
+    Replays the spool journal at the given path, or every journal in the given directory.
+    Returns the list of journals that could not be replayed entirely.
+    """
+    if os.path.isdir(path):
+        journals = sorted(glob.glob(os.path.join(path, "*.jsonl")))
+    else:
+        journals = [path]
+
+    remaining = []
+    for journal in journals:
+        spool = Spool(client, journal, retries=retries, retry_delay=retry_delay)
+        if not spool.close():
+            remaining.append(journal)
+    return remaining
@@ -2,8 +2,25 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 import os
+from urllib.parse import parse_qs, urlsplit
 
-from requests.auth import HTTPBasicAuth
+from requests.auth import AuthBase, HTTPBasicAuth
+
+# Orderings of collections that can be paginated with a cursor by the API, see ara.api.pagination
+CURSOR_FIELDS = ["id", "created", "updated", "started"]
+
+
+class HTTPTokenAuth(AuthBase):
+    """
+    Authenticates requests with an API token, see ara.api.auth.TokenAuthentication
+    """
+
+    def __init__(self, token):
+        self.token = token
+
+    def __call__(self, request):
+        request.headers["Authorization"] = "Token %s" % self.token
+        return request
 
 
 def get_client(
@@ -12,16 +29,24 @@ def get_client(
     timeout=30,
     username=None,
     password=None,
+    token=None,
     cert=None,
     key=None,
     verify=True,
     run_sql_migrations=True,
+    pool_maxsize=10,
+    pool_block=False,
+    keepalive=True,
 ):
     """
     Returns a specified client configuration or one with sane defaults.
+    pool_maxsize, pool_block and keepalive configure the pool of HTTP connections to the API server.
+    An API token is used rather than the username and password when both are provided.
     """
     auth = None
-    if all(cred is not None and cred != "" for cred in [username, password]):
+    if token:
+        auth = HTTPTokenAuth(token)
+    elif all(cred is not None and cred != "" for cred in [username, password]):
         auth = HTTPBasicAuth(username.encode("utf-8"), password.encode("utf-8"))
 
     # Verify can be a bool (to ignore SSL verification or not)
@@ -40,13 +65,53 @@ def get_client(
     if client == "offline":
         from ara.clients.offline import AraOfflineClient
 
-        return AraOfflineClient(auth=auth, run_sql_migrations=run_sql_migrations)
+        return AraOfflineClient(
+            auth=auth,
+            run_sql_migrations=run_sql_migrations,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keepalive=keepalive,
+        )
     elif client == "http":
         from ara.clients.http import AraHttpClient
 
-        return AraHttpClient(endpoint=endpoint, timeout=timeout, auth=auth, cert=cert_tuple, verify=verify)
+        return AraHttpClient(
+            endpoint=endpoint,
+            timeout=timeout,
+            auth=auth,
+            cert=cert_tuple,
+            verify=verify,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keepalive=keepalive,
+        )
+    elif client == "direct":
+        from ara.clients.direct import AraDirectClient
+
+        return AraDirectClient(auth=auth, run_sql_migrations=run_sql_migrations)
     else:
-        raise ValueError("Unsupported API client: %s (use 'http' or 'offline')" % client)
+        raise ValueError("Unsupported API client: %s (use 'http', 'offline' or 'direct')" % client)
+
+
+def paginate(client, endpoint, limit, page_size=1000, **query):
+    """
+    Yields the pages of up to <limit> objects of a collection endpoint.
+    Pages are walked with a cursor when the ordering allows it: walking a large collection is then linear and it is
+    not affected by objects updated or deleted between pages. Objects are otherwise returned in a single page.
+    """
+    if query.get("order", "-id").lstrip("-") not in CURSOR_FIELDS:
+        yield client.get(endpoint, limit=limit, **query)
+        return
+
+    query["cursor"] = ""
+    remaining = int(limit)
+    while remaining > 0:
+        page = client.get(endpoint, limit=min(page_size, remaining), **query)
+        yield page
+        if "results" not in page or not page["next"]:
+            return
+        remaining -= len(page["results"])
+        query["cursor"] = parse_qs(urlsplit(page["next"]).query)["cursor"][0]
 
 
 def active_client():
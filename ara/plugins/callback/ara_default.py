@@ -3,22 +3,26 @@
 
 from __future__ import absolute_import, division, print_function
 
+import base64
 import datetime
 import getpass
+import hashlib
 import json
 import logging
 import os
 import signal
 import socket
 import sys
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 from ansible import __version__ as ANSIBLE_VERSION, constants as C
 from ansible.parsing.ajson import AnsibleJSONEncoder
 from ansible.plugins.callback import CallbackBase
-from ansible.vars.clean import module_response_deepcopy, strip_internal_keys
 
 from ara.clients import utils as client_utils
+from ara.clients.spool import Spool
 from ara.setup import ara_version as ARA_VERSION
 
 # Ansible CLI options are now in ansible.context in >= 2.8
@@ -48,14 +52,18 @@ description:
   - Sends playbook execution data to the ARA API internally or over HTTP
 options:
   api_client:
-    description: The client to use for communicating with the API
+    description:
+      - The client to use for communicating with the API
+      - The offline client runs an API server in a thread while the direct client calls the API in-process
+        without any HTTP server, both record to the local database configured for the API server
+      - The http client sends data to the API server configured with api_server
     default: offline
     env:
       - name: ARA_API_CLIENT
     ini:
       - section: ara
         key: api_client
-    choices: ['offline', 'http']
+    choices: ['offline', 'http', 'direct']
   api_server:
     description: When using the HTTP client, the base URL to the ARA API server
     default: http://127.0.0.1:8000
@@ -80,6 +88,14 @@ options:
     ini:
       - section: ara
         key: api_password
+  api_token:
+    description: If authentication is required, an API token to authenticate with instead of a username and password
+    default: null
+    env:
+      - name: ARA_API_TOKEN
+    ini:
+      - section: ara
+        key: api_token
   api_cert:
     description: If a client certificate is required, the path to the certificate to use.
     default: null
@@ -122,6 +138,29 @@ options:
     ini:
       - section: ara
         key: api_timeout
+  api_pool_maxsize:
+    description:
+      - The maximum number of connections to the API server kept open by the HTTP and offline clients
+      - When set to 0 (default), the pool is sized after callback_threads so that every thread has a connection
+      - When set, it is a hard limit and threads wait for a connection to be available
+    type: integer
+    default: 0
+    env:
+      - name: ARA_API_POOL_MAXSIZE
+    ini:
+      - section: ara
+        key: api_pool_maxsize
+  api_keepalive:
+    description:
+      - Whether connections to the API server should be kept open and re-used between requests
+      - Can be disabled when a proxy or load balancer in front of the API server does not handle them well
+    type: boolean
+    default: true
+    env:
+      - name: ARA_API_KEEPALIVE
+    ini:
+      - section: ara
+        key: api_keepalive
   argument_labels:
     description: |
         A list of CLI arguments that, if set, will be automatically applied to playbooks as labels.
@@ -141,9 +180,10 @@ options:
         key: argument_labels
   callback_threads:
     description:
-      - The number of threads to use in API client thread pools (maximum 4)
+      - The number of threads to use in API client thread pools
       - When set to 0, no threading will be used (default) which is appropriate for usage with sqlite
-      - Using threads is recommended when the server is using MySQL or PostgreSQL
+      - Using threads is recommended when the server is using MySQL or PostgreSQL, for example 16 or 32
+        for playbooks with a large number of hosts
     type: integer
     default: 0
     env:
@@ -151,6 +191,18 @@ options:
     ini:
       - section: ara
         key: callback_threads
+  compress_content:
+    description:
+      - Whether the content of results should be compressed before being sent to the API server
+      - This saves bandwidth and CPU on the server, the compressed content is stored as-is
+      - Requires an API server that accepts the compressed_content field for results
+    type: boolean
+    default: false
+    env:
+      - name: ARA_COMPRESS_CONTENT
+    ini:
+      - section: ara
+        key: compress_content
   default_labels:
     description: A list of default labels that will be applied to playbooks
     type: list
@@ -272,8 +324,37 @@ options:
     ini:
       - section: ara
         key: record_task_content
+  result_batch_size:
+    description:
+      - The number of results to buffer before sending them to the API in a single request
+      - When set to 0, results are sent one at a time as soon as they are available (default)
+      - Buffered results are always sent at the end of each task, even if the batch is not full
+      - Requires an API server that provides the /api/v1/results/bulk endpoint
+    type: integer
+    default: 0
+    env:
+      - name: ARA_RESULT_BATCH_SIZE
+    ini:
+      - section: ara
+        key: result_batch_size
+  spool_dir:
+    description:
+      - When set, data that the callback doesn't need an answer for (results, facts, statuses and host stats) is
+        appended to a journal in this directory instead of being sent to the API right away
+      - A background thread replays the journal to the API in batches, retrying when the server is unavailable
+      - Journals that could not be replayed by the end of the playbook are kept and can be sent with 'ara spool replay'
+      - Only supported with the http and offline clients
+    default: null
+    env:
+      - name: ARA_SPOOL_DIR
+    ini:
+      - section: ara
+        key: spool_dir
 """
 
+# Replaces the value of facts that are not saved
+IGNORED_FACTS_HINT = "Not saved by ARA as configured by 'ignored_facts'"
+
 # Task modules for which ara should save host facts
 ANSIBLE_SETUP_MODULES = frozenset(
     [
@@ -287,6 +368,22 @@ ANSIBLE_SETUP_MODULES = frozenset(
 )
 
 
+def copy_without_internal_keys(value):
+    """
+    Returns a copy of a result, or part of a result, without the keys that are internal to Ansible.
+    Equivalent to strip_internal_keys(module_response_deepcopy(value)) in a single pass.
+    """
+    if isinstance(value, dict):
+        return {
+            key: copy_without_internal_keys(item) if isinstance(item, (dict, list)) else item
+            for key, item in value.items()
+            if not (isinstance(key, str) and key.startswith("_ansible_"))
+        }
+    if isinstance(value, list):
+        return [copy_without_internal_keys(item) if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+
 class CallbackModule(CallbackBase):
     """
     Saves data from an Ansible run into a database
@@ -303,13 +400,22 @@ class CallbackModule(CallbackBase):
         # These are configured in self.set_options
         self.client = None
         self.callback_threads = None
+        self.compress_content = None
+        self.api_timeout = None
+        self.spool_dir = None
+        self.spool = None
 
         # A global threadpool is used for processing items asynchronously where order is not
         # important and there are no dependencies on the outcome of a result
-        # Task threadpools are opened at the beginning of a task and shutdown at the end of a task
-        # to process a single task's results faster.
+        # A task threadpool processes results, it lives for the duration of the playbook so that a task can start
+        # while the results of the previous one are still being recorded. The futures of a task's results are
+        # tracked so that the task is only marked as ended once they are done.
         self.global_threads = None
         self.task_threads = None
+        self.task_futures = {}
+        # Results waiting for their task to be created, they are submitted to the task threadpool once it is.
+        # Only the main thread adds to and waits for them.
+        self.deferred_results = []
 
         self.ignored_facts = []
         self.ignored_arguments = []
@@ -318,20 +424,27 @@ class CallbackModule(CallbackBase):
         self.localhost_as_hostname_format = None
 
         self.result = None
+        self.result_batch_size = None
+        self.result_batch = []
+        # Reentrant: the signal handlers flush the batch from the main thread, which may be holding the lock
+        self.result_batch_lock = threading.RLock()
         self.result_started = {}
         self.result_ended = {}
-        self.task = None
+        self.task_uuid = None
         self.play = None
         self.playbook = None
         self.stats = None
         self.file_cache = {}
         self.host_cache = {}
         self.task_cache = {}
+        self.task_started = {}
+        self.failed_tasks = set()
         self.delegation_cache = {}
         self.warned_about_host_length = []
+        # Deprecations, exceptions and warnings of results, by task uuid
         self.deprecations = {}
-        self.exceptions = []
-        self.warnings = []
+        self.exceptions = {}
+        self.warnings = {}
 
         self.set_handler(signal.SIGINT)
         self.set_handler(signal.SIGTERM)
@@ -340,13 +453,19 @@ class CallbackModule(CallbackBase):
         original_handler = signal.getsignal(sig)
 
         def handler(sig, frame):
+            # Don't lose results that were buffered but not yet sent
+            self._flush_results()
             ended = datetime.datetime.now(datetime.timezone.utc).isoformat()
             status = "expired"
-            self.client.patch(
+            self._send(
+                "patch",
                 "/api/v1/playbooks/%s" % self.playbook["id"],
                 status=status,
                 ended=ended,
             )
+            if self.spool is not None:
+                # Give the spool a chance to drain, it is otherwise left on disk to be replayed later
+                self.spool.close(timeout=self.api_timeout)
             if original_handler:
                 original_handler(sig, frame)
             else:
@@ -369,6 +488,9 @@ class CallbackModule(CallbackBase):
         self.record_user = self.get_option("record_user")
         self.record_user_name = self.get_option("record_user_name")
         self.record_task_content = self.get_option("record_task_content")
+        self.compress_content = self.get_option("compress_content")
+        self.result_batch_size = self.get_option("result_batch_size")
+        self.spool_dir = self.get_option("spool_dir")
 
         # The intent for the ignored_files default value is to ignore the ansible local tmpdir but the path
         # can be changed by the user's configuration so retrieve that and use it instead.
@@ -382,48 +504,89 @@ class CallbackModule(CallbackBase):
 
         client = self.get_option("api_client")
         endpoint = self.get_option("api_server")
-        timeout = self.get_option("api_timeout")
+        timeout = self.api_timeout = self.get_option("api_timeout")
         username = self.get_option("api_username")
         password = self.get_option("api_password")
+        token = self.get_option("api_token")
         cert = self.get_option("api_cert")
         key = self.get_option("api_key")
         ca = self.get_option("api_ca")
         insecure = self.get_option("api_insecure")
 
+        keepalive = self.get_option("api_keepalive")
+        pool_maxsize = self.get_option("api_pool_maxsize")
+        self.callback_threads = self.get_option("callback_threads")
+
         verify = False if insecure else True
         if ca:
             verify = ca
 
+        # Without a configured limit, size the connection pool so that the threads of the global, task and
+        # file upload thread pools as well as the main and spool threads can each use a connection at the same time.
+        # Otherwise, threads wait for a connection rather than going above the limit.
+        pool_block = bool(pool_maxsize)
+        if not pool_maxsize:
+            pool_maxsize = max(10, self.callback_threads * 3 + 2)
+
         self.client = client_utils.get_client(
             client=client,
             endpoint=endpoint,
             timeout=timeout,
             username=username,
             password=password,
+            token=token,
             cert=cert,
             key=key,
             verify=verify,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keepalive=keepalive,
         )
 
-        # TODO: Consider un-hardcoding this and plumbing pool_maxsize to requests.adapters.HTTPAdapter.
-        #       In the meantime default to 4 so we don't go above requests.adapters.DEFAULT_POOLSIZE.
-        #       Otherwise we can hit "urllib3.connectionpool: Connection pool is full"
-        self.callback_threads = self.get_option("callback_threads")
-        if self.callback_threads > 4:
-            self.callback_threads = 4
-
     def _submit_thread(self, threadpool, func, *args, **kwargs):
         # Manages whether or not the function should be threaded to keep things DRY
+        # Returns a future when threaded and the return value of the function otherwise
         if self.callback_threads:
             # Pick from one of two thread pools (global or task)
             threads = getattr(self, threadpool + "_threads")
-            threads.submit(func, *args, **kwargs)
+            return threads.submit(func, *args, **kwargs)
         else:
-            func(*args, **kwargs)
+            return func(*args, **kwargs)
+
+    def _send(self, method, url, **payload):
+        # Sends data that nothing depends on the answer of, through the spool when there is one
+        if self.spool is not None:
+            self.spool.append(method, url, **payload)
+            return None
+        return getattr(self.client, method)(url, **payload)
+
+    def _send_raw(self, url, body):
+        # Same as _send for a creation that was already encoded to JSON
+        if self.spool is not None:
+            self.spool.append_raw("post", url, body)
+            return None
+        return self.client.post_raw(url, body)
+
+    def _get_spool(self):
+        from ara.clients.http import AraHttpClient
+
+        # The offline client inherits from the http client
+        if not isinstance(self.client, AraHttpClient):
+            self.log.warning("spool_dir is only supported with the http and offline clients, data won't be spooled")
+            return None
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S")
+        path = os.path.join(self.spool_dir, f"{timestamp}-{os.getpid()}.jsonl")
+        self.log.debug("Spooling data to %s" % path)
+        return Spool(self.client.client, path)
 
     def v2_playbook_on_start(self, playbook):
         self.log.debug("v2_playbook_on_start")
 
+        if self.spool_dir:
+            self.spool = self._get_spool()
+
         # Lookup the hostname for localhost if necessary
         self.localhost_hostname = self._get_localhost_hostname()
 
@@ -432,6 +595,8 @@ class CallbackModule(CallbackBase):
         if self.callback_threads:
             self.global_threads = ThreadPoolExecutor(max_workers=self.callback_threads)
             self.log.debug("Global thread pool initialized with %s thread(s)" % self.callback_threads)
+            self.task_threads = ThreadPoolExecutor(max_workers=self.callback_threads)
+            self.log.debug("Task thread pool initialized with %s thread(s)" % self.callback_threads)
 
         content = None
 
@@ -527,6 +692,7 @@ class CallbackModule(CallbackBase):
             self._submit_thread("global", self._set_playbook_labels, labels)
 
         # Record all the files involved in the play
+        paths = []
         for path in play._loader._FILE_CACHE.keys():
             # The cache can be pre-populated with files that aren't relevant to the playbook report
             # If there are matches that should be ignored here, don't record them at all
@@ -537,8 +703,14 @@ class CallbackModule(CallbackBase):
                     ignored = True
                     break
 
-            if not ignored:
-                self._submit_thread("global", self._get_or_create_file, path)
+            if not ignored and path not in self.file_cache:
+                paths.append(path)
+
+        if paths:
+            # Until the files are created, their cache refers to the creation of all of them
+            files = self._submit_thread("global", self._create_files, paths)
+            for path in paths:
+                self.file_cache[path] = files if isinstance(files, Future) else files[path]
 
         # Note: ansible-runner suffixes play UUIDs when running in serial so 34cff6f4-9f8e-6137-3461-000000000005 can
         # end up being 34cff6f4-9f8e-6137-3461-000000000005_2. Remove anything beyond standard 36 character UUIDs.
@@ -553,6 +725,15 @@ class CallbackModule(CallbackBase):
             started=datetime.datetime.now(datetime.timezone.utc).isoformat(),
         )
 
+        # Register the hosts of the play at once instead of as their first result is recorded
+        names = []
+        for host in play._variable_manager._inventory.get_hosts(play.hosts):
+            name = self._get_host_name(host.get_name())
+            if name not in self.host_cache and name not in names:
+                names.append(name)
+        if names:
+            self._submit_thread("global", self._create_hosts, names)
+
         return self.play
 
     def v2_playbook_on_handler_task_start(self, task):
@@ -564,10 +745,6 @@ class CallbackModule(CallbackBase):
         self.log.debug("v2_playbook_on_task_start")
         self._end_task()
 
-        if self.callback_threads:
-            self.task_threads = ThreadPoolExecutor(max_workers=self.callback_threads)
-            self.log.debug("Task thread pool initialized with %s thread(s)" % self.callback_threads)
-
         pathspec = task.get_path()
         if pathspec:
             path, lineno = pathspec.split(":", 1)
@@ -577,13 +754,15 @@ class CallbackModule(CallbackBase):
             path = self.playbook["path"]
             lineno = 1
 
-        # Get task file
-        task_file = self._get_or_create_file(path)
-
-        # Get task
-        self.task = self._get_or_create_task(task, task_file["id"], lineno, handler)
-
-        return self.task
+        # The task and its file are created in the background, results are loaded once the task exists
+        self.task_uuid = str(task._uuid)[:36]
+        if self.task_uuid not in self.task_cache:
+            self.log.debug("Task not in cache, creating: %s" % task)
+            started = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            self.task_started[self.task_uuid] = started
+            self.task_cache[self.task_uuid] = self._submit_thread(
+                "global", self._create_task, task, self.play["id"], path, lineno, handler, started
+            )
 
     def v2_runner_on_start(self, host, task):
         self.log.debug("v2_runner_on_start")
@@ -592,35 +771,27 @@ class CallbackModule(CallbackBase):
 
     def v2_runner_on_ok(self, result, **kwargs):
         self.log.debug("v2_runner_on_ok")
-        self._submit_thread("task", self._load_result, result, "ok", **kwargs)
+        self._submit_result(result, "ok", **kwargs)
 
     def v2_runner_on_unreachable(self, result, **kwargs):
         self.log.debug("v2_runner_on_unreachable")
         # A task is failed if there is at least one failed result (without ignore_errors=True)
         # It may also be rescued by a following task but *this* task failed.
         if not kwargs.get("ignore_errors", False):
-            task_uuid = str(result._task._uuid[:36])
-            self.task_cache[task_uuid] = self.client.patch(
-                "/api/v1/tasks/%s" % self.task_cache[task_uuid]["id"], status="failed"
-            )
-            self.task = self.task_cache[task_uuid]
-        self._submit_thread("task", self._load_result, result, "unreachable", **kwargs)
+            self._set_task_failed(str(result._task._uuid[:36]))
+        self._submit_result(result, "unreachable", **kwargs)
 
     def v2_runner_on_failed(self, result, **kwargs):
         self.log.debug("v2_runner_on_failed")
         # A task is failed if there is at least one failed result (without ignore_errors=True)
         # It may also be rescued by a following task but *this* task failed.
         if not kwargs.get("ignore_errors", False):
-            task_uuid = str(result._task._uuid[:36])
-            self.task_cache[task_uuid] = self.client.patch(
-                "/api/v1/tasks/%s" % self.task_cache[task_uuid]["id"], status="failed"
-            )
-            self.task = self.task_cache[task_uuid]
-        self._submit_thread("task", self._load_result, result, "failed", **kwargs)
+            self._set_task_failed(str(result._task._uuid[:36]))
+        self._submit_result(result, "failed", **kwargs)
 
     def v2_runner_on_skipped(self, result, **kwargs):
         self.log.debug("v2_runner_on_skipped")
-        self._submit_thread("task", self._load_result, result, "skipped", **kwargs)
+        self._submit_result(result, "skipped", **kwargs)
 
     def v2_runner_item_on_ok(self, result):
         self.log.debug("v2_runner_item_on_ok")
@@ -650,42 +821,70 @@ class CallbackModule(CallbackBase):
         self._end_playbook(stats)
 
     def _end_task(self):
-        if self.callback_threads:
-            # Flush threads before moving on to next task to make sure all results are saved
-            self.log.debug("waiting for task threads...")
-            if self.task_threads is not None:
-                self.task_threads.shutdown(wait=True)
-            self.task_threads = None
-
-        if self.task is not None:
-            task_uuid = self.task["uuid"]
-
-            # If there is one or more failures across results for this task,
-            # the status of the task has already been set to failed
-            if self.task_cache[task_uuid]["status"] == "failed":
-                task_status = "failed"
-            else:
-                task_status = "completed"
+        if self.task_uuid is not None:
+            # Don't wait for the results of the task to be recorded before moving on to the next task,
+            # the task is marked as ended once they are.
             ended = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            futures = self.task_futures.pop(self.task_uuid, [])
+            self._when_done(futures, self._finish_task, self.task_uuid, ended)
+            self.task_uuid = None
+
+    def _finish_task(self, task_uuid, ended):
+        # Send results that are still buffered so the task is complete when we mark it as such
+        self._flush_results()
+
+        # If there is one or more failures across results for this task,
+        # the task has already been recorded as failed
+        if task_uuid in self.failed_tasks:
+            task_status = "failed"
+        else:
+            task_status = "completed"
+
+        self._update_task(
+            task_uuid,
+            status=task_status,
+            ended=ended,
+            deprecations=self._dedupe_deprecations(self.deprecations.pop(task_uuid, [])),
+            exceptions=list(set(self.exceptions.pop(task_uuid, []))),
+            warnings=list(set(self.warnings.pop(task_uuid, []))),
+        )
 
-            self.task_cache[task_uuid] = self.client.patch(
-                "/api/v1/tasks/%s" % self.task["id"],
-                status=task_status,
-                ended=ended,
-                deprecations=self._dedupe_deprecations(self.deprecations),
-                exceptions=list(set(self.exceptions)),
-                warnings=list(set(self.warnings)),
-            )
-            self.task = None
-            self.deprecations = {}
-            self.exceptions = []
-            self.warnings = []
+    def _when_done(self, futures, func, *args, threadpool="global", **kwargs):
+        """
+        Runs func in a thread pool once all of the futures are done without waiting for them:
+        the last future to complete submits it.
+        Returns a future that is done once func is.
+        """
+        if not futures:
+            return self._submit_thread(threadpool, func, *args, **kwargs)
+
+        done = Future()
+        pending = [len(futures)]
+        lock = threading.Lock()
+
+        def forward(submitted):
+            if submitted.exception() is not None:
+                done.set_exception(submitted.exception())
+            else:
+                done.set_result(submitted.result())
+
+        def countdown(future):
+            with lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            self._submit_thread(threadpool, func, *args, **kwargs).add_done_callback(forward)
+
+        for future in futures:
+            future.add_done_callback(countdown)
+        return done
 
     def _end_play(self):
         if self.play is not None:
             self._submit_thread(
                 "global",
-                self.client.patch,
+                self._send,
+                "patch",
                 "/api/v1/plays/%s" % self.play["id"],
                 status="completed",
                 ended=datetime.datetime.now(datetime.timezone.utc).isoformat(),
@@ -694,7 +893,10 @@ class CallbackModule(CallbackBase):
 
     def _end_playbook(self, stats):
         if self.callback_threads:
-            self.log.debug("waiting for global threads before ending playbook...")
+            # Results are waited for first since the last of a task's results submits the end of the task globally
+            self.log.debug("waiting for task and global threads before ending playbook...")
+            wait(self.deferred_results)
+            self.task_threads.shutdown(wait=True)
             self.global_threads.shutdown(wait=True)
 
         status = "unknown"
@@ -704,7 +906,11 @@ class CallbackModule(CallbackBase):
             status = "completed"
 
         ended = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        self.client.patch("/api/v1/playbooks/%s" % self.playbook["id"], status=status, ended=ended)
+        self._send("patch", "/api/v1/playbooks/%s" % self.playbook["id"], status=status, ended=ended)
+
+        if self.spool is not None:
+            self.log.debug("waiting for the spool to be replayed before ending playbook...")
+            self.spool.close()
 
     def _set_playbook_labels(self, labels):
         # Only update labels if our cache doesn't match
@@ -727,28 +933,82 @@ class CallbackModule(CallbackBase):
     def _get_or_create_file(self, path, content=None):
         if path not in self.file_cache:
             self.log.debug("File not in cache, getting or creating: %s" % path)
-            for ignored_file_pattern in self.ignored_files:
-                if ignored_file_pattern in path:
-                    # The file must be created because there will be things referring to it
-                    self.log.debug(f"Censoring file {path}, matched pattern: {ignored_file_pattern}")
-                    content = "Not saved by ARA as configured by 'ignored_files'"
-            if content is None:
-                try:
-                    with open(path) as fd:
-                        content = fd.read()
-                except OSError as e:
-                    self.log.error(f"Unable to open {path} for reading: {str(e)}")
-                    content = """ARA was not able to read this file successfully.
-                            Refer to the logs for more information"""
-
-            self.file_cache[path] = self.client.post(
-                "/api/v1/files", playbook=self.playbook["id"], path=path, content=content
-            )
+            self.file_cache[path] = self._upload_file(path, self._read_file(path, content))
+
+        file_ = self.file_cache[path]
+        if isinstance(file_, Future):
+            # The file is still being created along with the other files of the play
+            file_ = self.file_cache[path] = file_.result()[path]
+        return file_
+
+    def _read_file(self, path, content=None):
+        for ignored_file_pattern in self.ignored_files:
+            if ignored_file_pattern in path:
+                # The file must be created because there will be things referring to it
+                self.log.debug(f"Censoring file {path}, matched pattern: {ignored_file_pattern}")
+                content = "Not saved by ARA as configured by 'ignored_files'"
+        if content is None:
+            try:
+                with open(path) as fd:
+                    content = fd.read()
+            except OSError as e:
+                self.log.error(f"Unable to open {path} for reading: {str(e)}")
+                content = """ARA was not able to read this file successfully.
+                        Refer to the logs for more information"""
+        return content
+
+    def _upload_file(self, path, content):
+        compressed = zlib.compress(content.encode("utf8"))
+        return self.client.post(
+            "/api/v1/files",
+            playbook=self.playbook["id"],
+            path=path,
+            compressed_content=base64.b64encode(compressed).decode("ascii"),
+        )
 
-        return self.file_cache[path]
+    def _create_files(self, paths):
+        """
+        Creates files from the sha1 of their contents and only uploads the contents the server doesn't have.
+        Returns the files by path.
+        """
+        contents = {path: self._read_file(path) for path in paths}
+        sha1s = {path: hashlib.sha1(content.encode("utf8")).hexdigest() for path, content in contents.items()}
+        created = self.client.post(
+            "/api/v1/files/bulk",
+            playbook=self.playbook["id"],
+            files=[dict(path=path, sha1=sha1) for path, sha1 in sha1s.items()],
+        )
+        files = {path: {"id": file_id, "path": path} for path, file_id in created.get("files", {}).items()}
+
+        # Files with contents the server is missing (or that weren't created in bulk) are uploaded in parallel
+        missing = [path for path in paths if path not in files]
+        self.log.debug("Uploading %s of %s file(s)" % (len(missing), len(paths)))
+        if self.callback_threads and len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=self.callback_threads) as executor:
+                uploaded = executor.map(lambda path: self._upload_file(path, contents[path]), missing)
+                files.update(zip(missing, uploaded))
+        else:
+            for path in missing:
+                files[path] = self._upload_file(path, contents[path])
+        return files
 
     def _get_or_create_host(self, host):
         """Note: The get_or_create is handled through the serializer of the API server."""
+        host = self._get_host_name(host)
+        if host not in self.host_cache:
+            self.log.debug("Host not in cache, getting or creating: %s" % host)
+            self.host_cache[host] = self.client.post("/api/v1/hosts", name=host, playbook=self.playbook["id"])
+        return self.host_cache[host]
+
+    def _create_hosts(self, names):
+        hosts = self._send("post", "/api/v1/hosts/bulk", playbook=self.playbook["id"], names=names)
+        # The hosts aren't known yet if they were spooled, they are created by _get_or_create_host when needed
+        if hosts is not None and "hosts" in hosts:
+            for name, host_id in hosts["hosts"].items():
+                self.host_cache.setdefault(name, {"id": host_id, "name": name})
+
+    def _get_host_name(self, host):
+        """Returns the name a host is recorded as"""
         # We might want to record results against the fqdn instead of localhost
         # so that we can differentiate between different actual hosts
         if self.localhost_as_hostname and host in ["localhost", "127.0.0.1"]:
@@ -764,35 +1024,66 @@ class CallbackModule(CallbackBase):
                 self.warned_about_host_length.append(host)
             host = host[:254]
 
-        if host not in self.host_cache:
-            self.log.debug("Host not in cache, getting or creating: %s" % host)
-            self.host_cache[host] = self.client.post("/api/v1/hosts", name=host, playbook=self.playbook["id"])
-        return self.host_cache[host]
+        return host
 
-    def _get_or_create_task(self, task, file_id=None, lineno=None, handler=None):
-        # Note: The get_or_create is handled through the serializer of the API server.
-        task_uuid = str(task._uuid)[:36]
-        if task_uuid not in self.task_cache:
-            if None in (file_id, lineno, handler):
-                raise ValueError("file_id, lineno, and handler are required to create a task")
-
-            self.log.debug("Task not in cache, getting or creating: %s" % task)
-            self.task_cache[task_uuid] = self.client.post(
-                "/api/v1/tasks",
-                name=task.get_name(),
-                uuid=task_uuid,
-                status="running",
-                action=task.action,
-                play=self.play["id"],
-                playbook=self.playbook["id"],
-                file=file_id,
-                tags=task.tags,
-                lineno=lineno,
-                handler=handler,
-                started=datetime.datetime.now(datetime.timezone.utc).isoformat(),
-            )
+    def _create_task(self, task, play_id, path, lineno, handler, started):
+        task_file = self._get_or_create_file(path)
+        return self.client.post(
+            "/api/v1/tasks",
+            name=task.get_name(),
+            uuid=str(task._uuid)[:36],
+            status="running",
+            action=task.action,
+            play=play_id,
+            playbook=self.playbook["id"],
+            file=task_file["id"],
+            tags=task.tags,
+            lineno=lineno,
+            handler=handler,
+            started=started,
+        )
 
-        return self.task_cache[task_uuid]
+    def _get_task(self, task_uuid):
+        # The task may still be in the process of being created in the background
+        task = self.task_cache[task_uuid]
+        if isinstance(task, Future):
+            task = task.result()
+        return task
+
+    def _update_task(self, task_uuid, **fields):
+        task = self._get_task(task_uuid)
+        updated = self._send("patch", "/api/v1/tasks/%s" % task["id"], **fields)
+        if updated is None:
+            # The update was spooled, keep the cache in line with what the API will eventually have
+            updated = dict(task, **fields)
+        self.task_cache[task_uuid] = updated
+        return updated
+
+    def _set_task_failed(self, task_uuid):
+        # The task only needs to be updated for the first failure
+        if task_uuid not in self.failed_tasks:
+            self.failed_tasks.add(task_uuid)
+            self._submit_task_thread(task_uuid, self._update_task, task_uuid, status="failed")
+
+    def _submit_task_thread(self, task_uuid, func, *args, **kwargs):
+        # Same as _submit_thread in the task thread pool, keeping track of the future for the end of the task
+        future = self._submit_thread("task", func, *args, **kwargs)
+        if isinstance(future, Future):
+            self.task_futures.setdefault(task_uuid, []).append(future)
+        return future
+
+    def _submit_result(self, result, status, **kwargs):
+        task_uuid = str(result._task._uuid[:36])
+        task = self.task_cache.get(task_uuid)
+        if not isinstance(task, Future) or task.done():
+            return self._submit_task_thread(task_uuid, self._load_result, result, status, **kwargs)
+
+        # Results refer to their task by uuid and the task must exist before they are created: rather than holding
+        # a thread until it is, the result is loaded once the task is created.
+        future = self._when_done([task], self._load_result, result, status, threadpool="task", **kwargs)
+        self.task_futures.setdefault(task_uuid, []).append(future)
+        self.deferred_results.append(future)
+        return future
 
     def _update_delegation_cache(self, result):
         # If the task is a loop and delegate_to is a variable, result._task.delegate_to can return the variable
@@ -814,10 +1105,10 @@ class CallbackModule(CallbackBase):
         hostname = result._host.get_name()
         self.result_ended[hostname] = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
-        # Retrieve the host so we can associate the result to the host id
-        host = self._get_or_create_host(hostname)
+        # Hosts are referred to by name, the API server creates them if necessary
+        host_name = self._get_host_name(hostname)
 
-        # If the task was delegated to another host, retrieve that too.
+        # If the task was delegated to another host, refer to that too.
         # Since a single task can be delegated to multiple hosts (ex: looping on a host group and using delegate_to)
         # this must be a list of hosts.
         delegated_to = []
@@ -827,87 +1118,126 @@ class CallbackModule(CallbackBase):
         if result._task.delegate_to and status != "skipped":
             if task_uuid in self.delegation_cache:
                 for delegated in self.delegation_cache[task_uuid]:
-                    delegated_to.append(self._get_or_create_host(delegated))
+                    delegated_to.append(self._get_host_name(delegated))
             else:
-                delegated_to.append(self._get_or_create_host(result._task.delegate_to))
-
-        # Retrieve the task so we can associate the result to the task id
-        self.task = self._get_or_create_task(result._task)
+                delegated_to.append(self._get_host_name(result._task.delegate_to))
 
         if self.record_task_content:
-            results = strip_internal_keys(module_response_deepcopy(result._result))
-
-            # Round-trip through JSON to sort keys and convert Ansible types
-            # to standard types
-            try:
-                jsonified = json.dumps(results, cls=AnsibleJSONEncoder, ensure_ascii=False, sort_keys=True)
-            except TypeError:
-                # Python 3 can't sort non-homogenous keys.
-                # https://bugs.python.org/issue25457
-                jsonified = json.dumps(results, cls=AnsibleJSONEncoder, ensure_ascii=False, sort_keys=False)
-
-            results = json.loads(jsonified)
+            results = self._get_result_content(result._result)
         else:
             results = {}
 
-        # Sanitize facts
-        if "ansible_facts" in results:
-            ignored_facts_hint = "Not saved by ARA as configured by 'ignored_facts'"
-
-            if "all" in self.ignored_facts:
-                self.log.debug("Ignoring all facts")
-                results["ansible_facts"] = {"all": ignored_facts_hint}
-
-            else:
-                for fact in self.ignored_facts:
-                    if fact in results["ansible_facts"]:
-                        self.log.debug("Ignoring fact: %s" % fact)
-                        results["ansible_facts"][fact] = ignored_facts_hint
-
         # Note: ignore_errors might be None instead of a boolean
         ignore_errors = kwargs.get("ignore_errors", False) or False
-        self.result = self.client.post(
-            "/api/v1/results",
+        # The request body is encoded once, which also converts Ansible types to standard types
+        payload = dict(
             playbook=self.playbook["id"],
-            task=self.task["id"],
-            host=host["id"],
-            delegated_to=[h["id"] for h in delegated_to],
-            play=self.task["play"],
-            content=results,
+            task_uuid=task_uuid,
+            host_name=host_name,
+            delegated_to_names=delegated_to,
             status=status,
-            started=self.result_started[hostname] if hostname in self.result_started else self.task["started"],
+            started=self.result_started[hostname] if hostname in self.result_started else self.task_started[task_uuid],
             ended=self.result_ended[hostname],
             changed=result._result.get("changed", False),
             ignore_errors=ignore_errors,
         )
+        if self.compress_content:
+            # The server stores the compressed content as-is
+            content = self._encode(results)
+            compressed = zlib.compress(content.encode("utf8"))
+            payload["compressed_content"] = base64.b64encode(compressed).decode("ascii")
+        else:
+            payload["content"] = results
+        body = self._encode(payload)
+        self._send_result(body)
 
         # Update host facts if gather_facts: true
-        if self.task["action"] in ANSIBLE_SETUP_MODULES and "ansible_facts" in results:
-            self.client.patch("/api/v1/hosts/%s" % host["id"], facts=results["ansible_facts"])
+        if result._task.action in ANSIBLE_SETUP_MODULES and "ansible_facts" in results:
+            host = self._get_or_create_host(hostname)
+            # The facts are decoded from the encoded content rather than encoded a second time
+            if self.compress_content:
+                facts = json.loads(content)["ansible_facts"]
+            else:
+                facts = json.loads(body)["content"]["ansible_facts"]
+            self._send("patch", "/api/v1/hosts/%s" % host["id"], facts=facts)
 
         # Update task deprecations/exceptions/warnings
         # Note: the ansible field is "exception" but ara pluralizes it
+        keys = ("deprecations", "exception", "warnings")
+        results = json.loads(self._encode({key: results[key] for key in keys if key in results}))
         if "deprecations" in results:
             # deprecations are supplied as a dict
-            self.deprecations = results["deprecations"]
+            self.deprecations[task_uuid] = results["deprecations"]
         if "exception" in results:
             # exceptions are supplied as a string
-            self.exceptions.append(results["exception"])
+            self.exceptions.setdefault(task_uuid, []).append(results["exception"])
         if "warnings" in results:
             # warnings are supplied as a list
-            for warning in results["warnings"]:
-                self.warnings.append(warning)
+            self.warnings.setdefault(task_uuid, []).extend(results["warnings"])
+
+    def _get_result_content(self, result):
+        """
+        Returns a copy of a result without the keys that are internal to Ansible and with facts sanitized.
+        Facts that are ignored aren't copied at all.
+        """
+        content = {}
+        for key, value in result.items():
+            if isinstance(key, str) and key.startswith("_ansible_"):
+                continue
+
+            if key == "ansible_facts":
+                if "all" in self.ignored_facts:
+                    self.log.debug("Ignoring all facts")
+                    content[key] = {"all": IGNORED_FACTS_HINT}
+                    continue
+
+                value = {fact: item for fact, item in value.items() if fact not in self.ignored_facts}
+                content[key] = copy_without_internal_keys(value)
+                for fact in self.ignored_facts:
+                    if fact in result[key]:
+                        self.log.debug("Ignoring fact: %s" % fact)
+                        content[key][fact] = IGNORED_FACTS_HINT
+            else:
+                content[key] = copy_without_internal_keys(value)
+
+        return content
+
+    def _encode(self, value):
+        try:
+            return json.dumps(value, cls=AnsibleJSONEncoder, ensure_ascii=False, sort_keys=True)
+        except TypeError:
+            # Python 3 can't sort non-homogenous keys.
+            # https://bugs.python.org/issue25457
+            return json.dumps(value, cls=AnsibleJSONEncoder, ensure_ascii=False, sort_keys=False)
+
+    def _send_result(self, body):
+        if not self.result_batch_size:
+            self.result = self._send_raw("/api/v1/results", body)
+            return
+
+        # Results can be loaded from multiple threads, only one of them gets to send a full batch
+        with self.result_batch_lock:
+            self.result_batch.append(body)
+            if len(self.result_batch) < self.result_batch_size:
+                return
+            batch, self.result_batch = self.result_batch, []
+
+        self._send_raw("/api/v1/results/bulk", '{"results": [%s]}' % ",".join(batch))
+
+    def _flush_results(self):
+        with self.result_batch_lock:
+            batch, self.result_batch = self.result_batch, []
+
+        if batch:
+            self.log.debug("Sending %s buffered result(s)" % len(batch))
+            self._send_raw("/api/v1/results/bulk", '{"results": [%s]}' % ",".join(batch))
 
     def _load_stats(self, stats):
-        hosts = sorted(stats.processed.keys())
-        for hostname in hosts:
-            host = self._get_or_create_host(hostname)
+        # The statistics of every host are sent at once, hosts are referred to by name
+        hosts = {}
+        for hostname in sorted(stats.processed.keys()):
             host_stats = stats.summarize(hostname)
-
-            self._submit_thread(
-                "global",
-                self.client.patch,
-                "/api/v1/hosts/%s" % host["id"],
+            hosts[self._get_host_name(hostname)] = dict(
                 changed=host_stats["changed"],
                 unreachable=host_stats["unreachable"],
                 failed=host_stats["failures"],
@@ -915,6 +1245,11 @@ class CallbackModule(CallbackBase):
                 skipped=host_stats["skipped"],
             )
 
+        if hosts:
+            self._submit_thread(
+                "global", self._send, "post", "/api/v1/hosts/stats", playbook=self.playbook["id"], hosts=hosts
+            )
+
     def _get_localhost_hostname(self):
         """Returns a hostname for localhost in the specified format"""
         hostname = None
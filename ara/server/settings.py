@@ -158,7 +158,7 @@ if EXTERNAL_AUTH:
     AUTHENTICATION_BACKENDS = ["django.contrib.auth.backends.RemoteUserBackend"]
     REST_FRAMEWORK_AUTH = ("rest_framework.authentication.RemoteUserAuthentication",)
 else:
-    REST_FRAMEWORK_AUTH = ("rest_framework.authentication.BasicAuthentication",)
+    REST_FRAMEWORK_AUTH = ("rest_framework.authentication.BasicAuthentication", "ara.api.auth.TokenAuthentication")
 
 # fmt: off
 MIDDLEWARE = [
@@ -231,9 +231,17 @@ ROOT_URLCONF = "ara.server.urls"
 APPEND_SLASH = False
 
 PAGE_SIZE = settings.get("PAGE_SIZE", 100)
+# How paginated list views count objects: "exact", "estimated" or "disabled", see ara.api.pagination
+COUNT_STRATEGY = settings.get("COUNT_STRATEGY", "exact")
+# Backend of the "search" parameter: "auto" to pick one for the database or the import path of a backend class
+SEARCH_BACKEND = settings.get("SEARCH_BACKEND", "auto")
+# Keys of the content of results which are indexed to search results by them, none by default
+SEARCH_RESULT_KEYS = settings.get("SEARCH_RESULT_KEYS", [])
+# Maximum number of characters of the content of a result which are indexed
+SEARCH_RESULT_MAX_LENGTH = settings.get("SEARCH_RESULT_MAX_LENGTH", 10000)
 
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "ara.api.pagination.LimitOffsetPagination",
     "PAGE_SIZE": PAGE_SIZE,
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
     "DEFAULT_RENDERER_CLASSES": (
@@ -285,6 +293,10 @@ if not os.path.exists(DEFAULT_SETTINGS) and "ARA_SETTINGS" not in os.environ:
         READ_LOGIN_REQUIRED=READ_LOGIN_REQUIRED,
         WRITE_LOGIN_REQUIRED=WRITE_LOGIN_REQUIRED,
         PAGE_SIZE=PAGE_SIZE,
+        COUNT_STRATEGY=COUNT_STRATEGY,
+        SEARCH_BACKEND=SEARCH_BACKEND,
+        SEARCH_RESULT_KEYS=SEARCH_RESULT_KEYS.to_list(),
+        SEARCH_RESULT_MAX_LENGTH=SEARCH_RESULT_MAX_LENGTH,
         DISTRIBUTED_SQLITE=DISTRIBUTED_SQLITE,
         DISTRIBUTED_SQLITE_PREFIX=DISTRIBUTED_SQLITE_PREFIX,
         DISTRIBUTED_SQLITE_ROOT=DISTRIBUTED_SQLITE_ROOT,
@@ -29,7 +29,7 @@ class ResultSearchForm(forms.Form):
     changed = forms.BooleanField(label="Changed", required=False)
 
     status = forms.MultipleChoiceField(
-        widget=forms.CheckboxSelectMultiple, choices=models.Result.STATUS, required=False
+        widget=forms.CheckboxSelectMultiple, choices=models.Result.EFFECTIVE_STATUS, required=False
     )
 
 
@@ -6,12 +6,14 @@ import os
 import shutil
 
 from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
 from django.template.loader import render_to_string
 
 from ara.api import models, serializers
 
 # Otherwise provided by ara.server.context_processors for ara/ui/templates/partials/about_modal.html
 from ara.setup import ara_version as ARA_VERSION
+from ara.ui.utils import expand_results
 
 
 class Command(BaseCommand):
@@ -51,7 +53,7 @@ class Command(BaseCommand):
         self.create_dirs(path)
 
         # TODO: Leverage ui views directly instead of duplicating logic here
-        query = models.Playbook.objects.all().order_by("-id")
+        query = models.Playbook.objects.with_item_counts().prefetch_related("labels").order_by("-id")
         serializer = serializers.ListPlaybookSerializer(query, many=True)
 
         print("[ara] Generating static files for %s playbooks at %s..." % (query.count(), path))
@@ -64,31 +66,30 @@ class Command(BaseCommand):
         # Escape surrogates to prevent UnicodeEncodeError exceptions
         codecs.register_error("strict", codecs.lookup_error("surrogateescape"))
 
+        # Only the ids of the hosts results are delegated to are serialized
+        delegated_to = Prefetch("delegated_to", queryset=models.Host.objects.only("id"))
+
         # Playbooks
         for pb in query:
             playbook = serializers.DetailedPlaybookSerializer(pb)
             hosts = serializers.ListHostSerializer(
-                models.Host.objects.filter(playbook=playbook.data["id"]).order_by("name").all(), many=True
+                models.Host.objects.filter(playbook=playbook.data["id"]).defer("facts").order_by("name"), many=True
             )
             files = serializers.ListFileSerializer(
-                models.File.objects.filter(playbook=playbook.data["id"]).all(), many=True
+                models.File.objects.filter(playbook=playbook.data["id"])
+                .select_related("content")
+                .defer("content__contents"),
+                many=True,
             )
             records = serializers.ListRecordSerializer(
-                models.Record.objects.filter(playbook=playbook.data["id"]).all(), many=True
+                models.Record.objects.filter(playbook=playbook.data["id"]).defer("value"), many=True
             )
             results = serializers.ListResultSerializer(
-                models.Result.objects.filter(playbook=playbook.data["id"]).all(), many=True
+                models.Result.objects.filter(playbook=playbook.data["id"]).prefetch_related(delegated_to), many=True
             )
 
             # Backfill task and host data into results
-            for result in results.data:
-                task_id = result["task"]
-                result["task"] = serializers.SimpleTaskSerializer(models.Task.objects.get(pk=task_id)).data
-                host_id = result["host"]
-                result["host"] = serializers.SimpleHostSerializer(models.Host.objects.get(pk=host_id)).data
-                if result["delegated_to"]:
-                    delegated_to = [models.Host.objects.get(pk=delegated) for delegated in result["delegated_to"]]
-                    result["delegated_to"] = serializers.SimpleHostSerializer(delegated_to, many=True).data
+            expand_results(results.data)
 
             # Results are paginated in the dynamic version and the template expects data in a specific format
             formatted_results = {"count": len(results.data), "results": results.data}
@@ -109,29 +110,27 @@ class Command(BaseCommand):
             )
 
         # Files
-        query = models.File.objects.all()
-        for file in query.all():
+        query = models.prefetch_item_counts(models.File.objects.all(), "playbook")
+        for file in query.iterator(chunk_size=1000):
             destination = os.path.join(path, "files/%s.html" % file.id)
             serializer = serializers.DetailedFileSerializer(file)
             data = {"file": serializer.data, "page": "file", **self.DEFAULT_PARAMS}
             self.render("file.html", destination, **data)
 
         # Hosts
-        query = models.Host.objects.all()
-        for host in query.all():
+        query = models.prefetch_item_counts(models.Host.objects.all(), "playbook")
+        for host in query.iterator(chunk_size=1000):
             destination = os.path.join(path, "hosts/%s.html" % host.id)
             serializer = serializers.DetailedHostSerializer(host)
 
             # fmt: off
             host_results = serializers.ListResultSerializer(
-                models.Result.objects.filter(host=host.id).all(), many=True
+                models.Result.objects.filter(host=host.id).prefetch_related(delegated_to), many=True
             )
             # fmt: on
 
             # Backfill task data into results
-            for result in host_results.data:
-                task_id = result["task"]
-                result["task"] = serializers.SimpleTaskSerializer(models.Task.objects.get(pk=task_id)).data
+            expand_results(host_results.data, host=False)
 
             # Results are paginated in the dynamic version and the template expects data in a specific format
             formatted_results = {"count": len(host_results.data), "results": host_results.data}
@@ -148,8 +147,8 @@ class Command(BaseCommand):
             )
 
         # Results
-        query = models.Result.objects.all()
-        for result in query.all():
+        query = models.prefetch_item_counts(models.Result.objects.all(), "playbook", "play", "task")
+        for result in query.iterator(chunk_size=1000):
             destination = os.path.join(path, "results/%s.html" % result.id)
             serializer = serializers.DetailedResultSerializer(result)
             data = {"result": serializer.data, "page": "result", **self.DEFAULT_PARAMS}
@@ -3,10 +3,48 @@
 
 from collections import OrderedDict
 
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 from rest_framework.utils.urls import remove_query_param, replace_query_param
 
+from ara.api.pagination import CursorPagination, LimitOffsetPagination
+
+
+class CursorPaginationWithLinks(CursorPagination):
+    """
+    Extends CursorPagination to provide a link to the first page and the limit.
+    The count and the last page are not known when paginating with a cursor.
+    Generates relative links instead of absolute URIs.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view)
+        self.base_url = request.get_full_path()
+        return page
+
+    def get_first_link(self):
+        if not self.has_previous:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, "")
+
+    def get_current_page_results(self):
+        return "%s results" % len(self.page)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", None),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("first", self.get_first_link()),
+                    ("last", None),
+                    ("limit", self.page_size),
+                    ("offset", None),
+                    ("results", data),
+                ]
+            )
+        )
+
 
 class LimitOffsetPaginationWithLinks(LimitOffsetPagination):
     """
@@ -15,8 +53,12 @@ class LimitOffsetPaginationWithLinks(LimitOffsetPagination):
     Generates relative links instead of absolute URIs.
     """
 
+    cursor_pagination_class = CursorPaginationWithLinks
+    # The reporting interface can be sorted by fields that can't be used by a cursor (i.e, duration)
+    cursor_fallback = True
+
     def get_next_link(self):
-        if self.offset + self.limit >= self.count:
+        if not self.has_next_page():
             return None
 
         url = self.request.get_full_path()
@@ -45,18 +87,35 @@ class LimitOffsetPaginationWithLinks(LimitOffsetPagination):
         return remove_query_param(url, self.offset_query_param)
 
     def get_last_link(self):
-        if self.offset + self.limit >= self.count:
+        # The last page can't be known without an exact count
+        if self.count is None or self.count_estimated or self.offset + self.limit >= self.count:
             return None
         url = self.request.get_full_path()
         url = replace_query_param(url, self.limit_query_param, self.limit)
         offset = self.count - self.limit
         return replace_query_param(url, self.offset_query_param, offset)
 
+    def get_current_page_results(self):
+        """Returns the range of the objects of the current page for display, i.e. "101-200" """
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_current_page_results()
+
+        if self.count_strategy != "exact":
+            max_current = self.offset + len(self.page)
+        elif self.count > (self.offset + self.limit):
+            max_current = self.offset + self.limit
+        else:
+            max_current = self.count
+        return "%s-%s" % (self.offset + 1, max_current)
+
     def get_paginated_response(self, data):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
         return Response(
             OrderedDict(
                 [
                     ("count", self.count),
+                    ("count_estimated", self.count_estimated),
                     ("next", self.get_next_link()),
                     ("previous", self.get_previous_link()),
                     ("first", self.get_first_link()),
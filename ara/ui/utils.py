@@ -7,6 +7,8 @@ from datetime import datetime
 
 from django.utils.timezone import make_aware
 
+from ara.api import models, serializers
+
 
 def _human_readable_timestamp(seconds):
     """
@@ -46,3 +48,31 @@ def find_distributed_databases(distributed_sqlite_root):
         )
 
     return data
+
+
+def expand_results(results, host=True):
+    """
+    Replaces the task, host and delegated hosts ids of serialized results by a simple representation of these objects.
+    Tasks and hosts are retrieved once for all the results rather than for each result.
+    Set host to False to leave the host of results as is, for example when they all share the same host.
+    """
+    task_ids = set()
+    host_ids = set()
+    for result in results:
+        task_ids.add(result["task"])
+        if host:
+            host_ids.add(result["host"])
+        host_ids.update(result["delegated_to"])
+
+    tasks = models.Task.objects.with_item_counts().select_related("file").in_bulk(task_ids)
+    tasks = {pk: serializers.SimpleTaskSerializer(task).data for pk, task in tasks.items()}
+    hosts = models.Host.objects.defer("facts").in_bulk(host_ids)
+    hosts = {pk: serializers.SimpleHostSerializer(host).data for pk, host in hosts.items()}
+
+    for result in results:
+        result["task"] = tasks[result["task"]]
+        if host:
+            result["host"] = hosts[result["host"]]
+        if result["delegated_to"]:
+            result["delegated_to"] = [hosts[delegated] for delegated in result["delegated_to"]]
+    return results
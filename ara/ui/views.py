@@ -4,6 +4,7 @@
 import codecs
 
 from django.conf import settings
+from django.db.models import Prefetch
 from rest_framework import generics
 from rest_framework.renderers import TemplateHTMLRenderer
 from rest_framework.response import Response
@@ -11,7 +12,7 @@ from rest_framework.response import Response
 from ara.api import filters, models, serializers
 from ara.ui import forms
 from ara.ui.pagination import LimitOffsetPaginationWithLinks
-from ara.ui.utils import find_distributed_databases
+from ara.ui.utils import expand_results, find_distributed_databases
 
 
 class Index(generics.ListAPIView):
@@ -19,7 +20,7 @@ class Index(generics.ListAPIView):
     Returns a list of playbook summaries
     """
 
-    queryset = models.Playbook.objects.all()
+    queryset = models.Playbook.objects.with_item_counts().prefetch_related("labels")
     filterset_class = filters.PlaybookFilter
     renderer_classes = [TemplateHTMLRenderer]
     pagination_class = LimitOffsetPaginationWithLinks
@@ -34,14 +35,10 @@ class Index(generics.ListAPIView):
             serializer = serializers.ListPlaybookSerializer(query, many=True)
         response = self.get_paginated_response(serializer.data)
 
-        if self.paginator.count > (self.paginator.offset + self.paginator.limit):
-            max_current = self.paginator.offset + self.paginator.limit
-        else:
-            max_current = self.paginator.count
-        current_page_results = "%s-%s" % (self.paginator.offset + 1, max_current)
+        current_page_results = self.paginator.get_current_page_results()
 
         # We need to expand the search card if there is a search query, not considering pagination args
-        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset"]]
+        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset", "cursor", "count"]]
         expand_search = True if search_args else False
 
         search_form = forms.PlaybookSearchForm(request.GET)
@@ -78,15 +75,18 @@ class HostIndex(generics.RetrieveAPIView):
         # Default is LatestHost (by not requiring "?latest=true") but accept false to
         # return all hosts
         if "latest" in request.GET and request.GET["latest"] == "false":
-            queryset = models.Host.objects.all()
-            serializer_type = "DetailedHostSerializer"
+            queryset = models.prefetch_item_counts(models.Host.objects.defer("facts"), "playbook")
+            queryset = queryset.prefetch_related("playbook__labels")
+            serializer_type = "ListHostPlaybookSerializer"
             filter_type = "HostFilter"
             # TODO: Is there a cleaner way ? Doing this logic in the template seemed complicated.
             checkbox_status = "checked"
             api_link_url = "host-list"
         else:
-            queryset = models.LatestHost.objects.all()
-            serializer_type = "DetailedLatestHostSerializer"
+            queryset = models.LatestHost.objects.select_related("host").defer("host__facts")
+            queryset = models.prefetch_item_counts(queryset, "host__playbook")
+            queryset = queryset.prefetch_related("host__playbook__labels")
+            serializer_type = "ListLatestHostSerializer"
             filter_type = "LatestHostFilter"
             checkbox_status = ""
             api_link_url = "latesthost-list"
@@ -111,14 +111,10 @@ class HostIndex(generics.RetrieveAPIView):
             serializer = getattr(serializers, serializer_type)(query, many=True)
         response = self.get_paginated_response(serializer.data)
 
-        if self.paginator.count > (self.paginator.offset + self.paginator.limit):
-            max_current = self.paginator.offset + self.paginator.limit
-        else:
-            max_current = self.paginator.count
-        current_page_results = "%s-%s" % (self.paginator.offset + 1, max_current)
+        current_page_results = self.paginator.get_current_page_results()
 
         # We need to expand the search card if there is a search query, not considering pagination args
-        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset"]]
+        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset", "cursor", "count"]]
         expand_search = True if search_args else False
 
         # fmt: off
@@ -144,7 +140,9 @@ class TaskIndex(generics.RetrieveAPIView):
     pagination_class = LimitOffsetPaginationWithLinks
     filterset_class = filters.TaskFilter
     template_name = "task_index.html"
-    queryset = models.Task.objects.all()
+    queryset = models.prefetch_item_counts(models.Task.objects.with_item_counts(), "playbook", "play")
+    # For the path and the sha1 of the file of the tasks, without the contents of the file
+    queryset = queryset.select_related("file__content").defer("file__content__contents")
 
     def get(self, request, *args, **kwargs):
         query = self.filter_queryset(self.queryset.all().order_by("-id"))
@@ -155,14 +153,10 @@ class TaskIndex(generics.RetrieveAPIView):
             serializer = serializers.DetailedTaskSerializer(query, many=True)
         response = self.get_paginated_response(serializer.data)
 
-        if self.paginator.count > (self.paginator.offset + self.paginator.limit):
-            max_current = self.paginator.offset + self.paginator.limit
-        else:
-            max_current = self.paginator.count
-        current_page_results = "%s-%s" % (self.paginator.offset + 1, max_current)
+        current_page_results = self.paginator.get_current_page_results()
 
         # We need to expand the search card if there is a search query, not considering pagination args
-        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset"]]
+        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset", "cursor", "count"]]
         expand_search = True if search_args else False
 
         search_form = forms.TaskSearchForm(request.GET)
@@ -184,7 +178,7 @@ class Playbook(generics.RetrieveAPIView):
     Returns a page for a detailed view of a playbook
     """
 
-    queryset = models.Playbook.objects.all()
+    queryset = models.Playbook.objects.with_item_counts()
     renderer_classes = [TemplateHTMLRenderer]
     pagination_class = LimitOffsetPaginationWithLinks
     template_name = "playbook.html"
@@ -192,19 +186,25 @@ class Playbook(generics.RetrieveAPIView):
     def get(self, request, *args, **kwargs):
         playbook = serializers.DetailedPlaybookSerializer(self.get_object())
         hosts = serializers.ListHostSerializer(
-            models.Host.objects.filter(playbook=playbook.data["id"]).order_by("name").all(), many=True
+            models.Host.objects.filter(playbook=playbook.data["id"]).defer("facts").order_by("name"), many=True
         )
         files = serializers.ListFileSerializer(
-            models.File.objects.filter(playbook=playbook.data["id"]).all(), many=True
+            models.File.objects.filter(playbook=playbook.data["id"])
+            .select_related("content")
+            .defer("content__contents"),
+            many=True,
         )
         records = serializers.ListRecordSerializer(
-            models.Record.objects.filter(playbook=playbook.data["id"]).all(), many=True
+            models.Record.objects.filter(playbook=playbook.data["id"]).defer("value"), many=True
         )
 
         order = "-started"
         if "order" in request.GET:
             order = request.GET["order"]
-        result_queryset = models.Result.objects.filter(playbook=playbook.data["id"]).order_by(order).all()
+        result_queryset = models.Result.objects.filter(playbook=playbook.data["id"]).order_by(order)
+        result_queryset = result_queryset.prefetch_related(
+            Prefetch("delegated_to", queryset=models.Host.objects.only("id"))
+        )
         result_filter = filters.ResultFilter(request.GET, queryset=result_queryset)
 
         page = self.paginate_queryset(result_filter.qs)
@@ -213,25 +213,12 @@ class Playbook(generics.RetrieveAPIView):
         else:
             serializer = serializers.ListResultSerializer(result_filter, many=True)
 
-        # TODO: We should have a serializer that takes care of this automatically instead of backfilling "manually"
-        for result in serializer.data:
-            task = models.Task.objects.get(pk=result["task"])
-            result["task"] = serializers.SimpleTaskSerializer(task).data
-            host = models.Host.objects.get(pk=result["host"])
-            result["host"] = serializers.SimpleHostSerializer(host).data
-            if result["delegated_to"]:
-                delegated_to = [models.Host.objects.get(pk=delegated) for delegated in result["delegated_to"]]
-                result["delegated_to"] = serializers.SimpleHostSerializer(delegated_to, many=True).data
-        paginated_results = self.get_paginated_response(serializer.data)
-
-        if self.paginator.count > (self.paginator.offset + self.paginator.limit):
-            max_current = self.paginator.offset + self.paginator.limit
-        else:
-            max_current = self.paginator.count
-        current_page_results = "%s-%s" % (self.paginator.offset + 1, max_current)
+        paginated_results = self.get_paginated_response(expand_results(serializer.data))
+
+        current_page_results = self.paginator.get_current_page_results()
 
         # We need to expand the search card if there is a search query, not considering pagination args
-        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset"]]
+        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset", "cursor", "count"]]
         expand_search = True if search_args else False
 
         search_form = forms.ResultSearchForm(request.GET)
@@ -257,8 +244,9 @@ class Host(generics.RetrieveAPIView):
     Returns a page for a detailed view of a host
     """
 
-    queryset = models.Host.objects.all()
+    queryset = models.prefetch_item_counts(models.Host.objects.all(), "playbook")
     renderer_classes = [TemplateHTMLRenderer]
+    pagination_class = LimitOffsetPaginationWithLinks
     template_name = "host.html"
 
     def get(self, request, *args, **kwargs):
@@ -268,7 +256,10 @@ class Host(generics.RetrieveAPIView):
         order = "-started"
         if "order" in request.GET:
             order = request.GET["order"]
-        result_queryset = models.Result.objects.filter(host=host_serializer.data["id"]).order_by(order).all()
+        result_queryset = models.Result.objects.filter(host=host_serializer.data["id"]).order_by(order)
+        result_queryset = result_queryset.prefetch_related(
+            Prefetch("delegated_to", queryset=models.Host.objects.only("id"))
+        )
         result_filter = filters.ResultFilter(request.GET, queryset=result_queryset)
 
         page = self.paginate_queryset(result_filter.qs)
@@ -277,23 +268,13 @@ class Host(generics.RetrieveAPIView):
         else:
             result_serializer = serializers.ListResultSerializer(result_filter, many=True)
 
-        # TODO: We should have a serializer that takes care of this automatically instead of backfilling "manually"
-        for result in result_serializer.data:
-            task = models.Task.objects.get(pk=result["task"])
-            result["task"] = serializers.SimpleTaskSerializer(task).data
-            if result["delegated_to"]:
-                delegated_to = [models.Host.objects.get(pk=delegated) for delegated in result["delegated_to"]]
-                result["delegated_to"] = serializers.SimpleHostSerializer(delegated_to, many=True).data
-        paginated_results = self.get_paginated_response(result_serializer.data)
-
-        if self.paginator.count > (self.paginator.offset + self.paginator.limit):
-            max_current = self.paginator.offset + self.paginator.limit
-        else:
-            max_current = self.paginator.count
-        current_page_results = "%s-%s" % (self.paginator.offset + 1, max_current)
+        # Every result is from the same host
+        paginated_results = self.get_paginated_response(expand_results(result_serializer.data, host=False))
+
+        current_page_results = self.paginator.get_current_page_results()
 
         # We need to expand the search card if there is a search query, not considering pagination args
-        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset"]]
+        search_args = [arg for arg in request.GET.keys() if arg not in ["limit", "offset", "cursor", "count"]]
         expand_search = True if search_args else False
 
         search_form = forms.ResultSearchForm(request.GET)
@@ -316,7 +297,7 @@ class File(generics.RetrieveAPIView):
     Returns a page for a detailed view of a file
     """
 
-    queryset = models.File.objects.all()
+    queryset = models.prefetch_item_counts(models.File.objects.all(), "playbook")
     renderer_classes = [TemplateHTMLRenderer]
     template_name = "file.html"
 
@@ -331,7 +312,7 @@ class Result(generics.RetrieveAPIView):
     Returns a page for a detailed view of a result
     """
 
-    queryset = models.Result.objects.all()
+    queryset = models.prefetch_item_counts(models.Result.objects.all(), "playbook", "play", "task")
     renderer_classes = [TemplateHTMLRenderer]
     template_name = "result.html"
 
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Compares the time spent by the queries behind the API and UI's hot filter and ordering paths
+# before and after the indexes of the 0023_indexes migration.
+# A disposable sqlite database is created in a temporary directory unless ARA_BASE_DIR is set.
+# Note: the database must be disposable, it is migrated back and forth and filled with generated data.
+# Usage: python3 tests/benchmark_indexes.py [--playbooks 20] [--tasks 100] [--hosts 1000] [--runs 20]
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+BEFORE = "0022_remove_result_content_blob"
+AFTER = "0023_indexes"
+
+
+def populate(models, fields, playbooks, tasks, hosts):
+    content = models.ResultContent.objects.create(sha1="0" * 40, contents=fields.EMPTY_DICT)
+    statuses = ["ok"] * 90 + ["skipped"] * 5 + ["failed"] * 4 + ["unreachable"]
+    started = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+    for _ in range(playbooks):
+        playbook = models.Playbook.objects.create(
+            status=random.choice(["completed", "failed"]), path="/playbook.yml", started=started
+        )
+        file_content = models.FileContent.objects.get_or_create(sha1="0" * 40, defaults={"contents": b""})[0]
+        playbook_file = models.File.objects.create(path="/playbook.yml", content=file_content, playbook=playbook)
+        play = models.Play.objects.create(uuid=uuid.uuid4(), playbook=playbook, started=started)
+        playbook_tasks = models.Task.objects.bulk_create(
+            [
+                models.Task(
+                    name="task %s" % index,
+                    uuid=uuid.uuid4(),
+                    action=random.choice(["command", "debug", "copy", "template", "package"]),
+                    lineno=index,
+                    tags=fields.EMPTY_LIST,
+                    handler=False,
+                    play=play,
+                    file=playbook_file,
+                    playbook=playbook,
+                    started=started + datetime.timedelta(seconds=index),
+                )
+                for index in range(tasks)
+            ]
+        )
+        playbook_hosts = models.Host.objects.bulk_create(
+            [models.Host(name="host%s" % index, facts=fields.EMPTY_DICT, playbook=playbook) for index in range(hosts)]
+        )
+
+        results = []
+        for task in playbook_tasks:
+            for host in playbook_hosts:
+                results.append(
+                    models.Result(
+                        status=random.choice(statuses),
+                        content=content,
+                        host=host,
+                        task=task,
+                        play=play,
+                        playbook=playbook,
+                        started=task.started + datetime.timedelta(milliseconds=random.randint(0, 999)),
+                    )
+                )
+        models.Result.objects.bulk_create(results, batch_size=5000)
+        started += datetime.timedelta(hours=1)
+        print(".", end="", flush=True)
+    print()
+
+
+def queries(models):
+    playbook = random.choice(models.Playbook.objects.values_list("id", flat=True))
+    host = random.choice(models.Host.objects.filter(playbook=playbook).values_list("id", "name"))
+    task = random.choice(models.Task.objects.filter(playbook=playbook).values_list("id", "uuid"))
+    play = models.Play.objects.filter(playbook=playbook).values_list("uuid", flat=True).first()
+
+    # fmt: off
+    return {
+        "results of a playbook by -started (UI playbook page)": lambda: list(
+            models.Result.objects.filter(playbook=playbook).order_by("-started").values_list("id", flat=True)[:100]
+        ),
+        "results of a host by -started (UI host page)": lambda: list(
+            models.Result.objects.filter(host=host[0]).order_by("-started").values_list("id", flat=True)[:100]
+        ),
+        "failed results of a task": lambda: models.Result.objects.filter(task=task[0], status="failed").count(),
+        "task by uuid": lambda: list(models.Task.objects.filter(uuid=task[1]).values_list("id", flat=True)),
+        "play by uuid": lambda: list(models.Play.objects.filter(uuid=play).values_list("id", flat=True)),
+        "latest host by name": lambda: models.Host.objects.filter(name=host[1]).order_by("-updated").first(),
+        "failed playbooks by -started": lambda: list(
+            models.Playbook.objects.filter(status="failed").order_by("-started").values_list("id", flat=True)[:100]
+        ),
+    }
+    # fmt: on
+
+
+def measure(func, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the database indexes of the API")
+    parser.add_argument("--playbooks", type=int, default=20, help="Number of playbooks (default: 20)")
+    parser.add_argument("--tasks", type=int, default=100, help="Number of tasks per playbook (default: 100)")
+    parser.add_argument("--hosts", type=int, default=1000, help="Number of hosts per playbook (default: 1000)")
+    parser.add_argument("--runs", type=int, default=20, help="Number of times each query is run (default: 20)")
+    args = parser.parse_args()
+
+    if "ARA_BASE_DIR" not in os.environ:
+        os.environ["ARA_BASE_DIR"] = tempfile.mkdtemp(prefix="ara-benchmark-")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ara.server.settings")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    from ara.api import fields, models
+
+    random.seed(42)
+    call_command("migrate", "api", BEFORE, verbosity=0)
+    results = args.playbooks * args.tasks * args.hosts
+    print(f"Recording {results} results ({args.playbooks} playbooks of {args.tasks} tasks on {args.hosts} hosts)")
+    populate(models, fields, args.playbooks, args.tasks, args.hosts)
+    benchmarks = queries(models)
+
+    before = {name: measure(func, args.runs) for name, func in benchmarks.items()}
+    started = time.perf_counter()
+    call_command("migrate", "api", AFTER, verbosity=0)
+    print(f"Indexes created in {time.perf_counter() - started:.1f}s, median over {args.runs} runs:")
+    after = {name: measure(func, args.runs) for name, func in benchmarks.items()}
+
+    for name in benchmarks:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<55} {before[name] * 1000:9.2f} ms -> {after[name] * 1000:8.2f} ms ({speedup:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Copyright (c) 2022 The ARA Records Ansible authors
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Compares the CPU time spent by the callback to turn a result into a request body
+# before and after results were encoded in a single pass.
+# Usage: python3 tests/benchmark_result_encoding.py [--items 500] [--runs 20]
+import argparse
+import json
+import time
+
+from ansible.parsing.ajson import AnsibleJSONEncoder
+from ansible.vars.clean import module_response_deepcopy, strip_internal_keys
+
+from ara.plugins.callback.ara_default import CallbackModule
+
+IGNORED_FACTS = ["ansible_env"]
+
+
+def make_result(items):
+    # A loop task returning a sizeable amount of output for each item, along with facts
+    result = {
+        "changed": True,
+        "_ansible_no_log": False,
+        "ansible_facts": {"ansible_env": {"PATH": "/usr/bin"}, "ansible_hostname": "host"},
+        "results": [],
+    }
+    for item in range(items):
+        result["results"].append(
+            {
+                "item": item,
+                "changed": True,
+                "rc": 0,
+                "cmd": ["echo", str(item)],
+                "stdout": "line of output\n" * 100,
+                "stdout_lines": ["line of output"] * 100,
+                "invocation": {"module_args": {"_raw_params": "echo %s" % item, "chdir": None}},
+                "_ansible_item_label": item,
+                "_ansible_ignore_errors": None,
+            }
+        )
+    return result
+
+
+def encode_before(result):
+    # The content was copied, stripped, dumped, loaded and sanitized before the payload was dumped by the client
+    results = strip_internal_keys(module_response_deepcopy(result))
+    results = json.loads(json.dumps(results, cls=AnsibleJSONEncoder, ensure_ascii=False, sort_keys=True))
+    for fact in IGNORED_FACTS:
+        if fact in results["ansible_facts"]:
+            results["ansible_facts"][fact] = "Not saved by ARA as configured by 'ignored_facts'"
+    return json.dumps(dict(playbook=1, task_uuid="uuid", host_name="host", content=results, status="ok"))
+
+
+def encode_after(callback, result):
+    results = callback._get_result_content(result)
+    return callback._encode(dict(playbook=1, task_uuid="uuid", host_name="host", content=results, status="ok"))
+
+
+def measure(func, runs):
+    started = time.process_time()
+    for _ in range(runs):
+        func()
+    return (time.process_time() - started) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the encoding of results by the callback")
+    parser.add_argument("--items", type=int, default=500, help="Number of loop items in the result (default: 500)")
+    parser.add_argument("--runs", type=int, default=20, help="Number of times each encoding is run (default: 20)")
+    args = parser.parse_args()
+
+    callback = CallbackModule()
+    callback.ignored_facts = IGNORED_FACTS
+    result = make_result(args.items)
+
+    # Both pipelines must produce the same content
+    assert json.loads(encode_before(result)) == json.loads(encode_after(callback, result))
+
+    size = len(encode_after(callback, result).encode("utf-8"))
+    before = measure(lambda: encode_before(result), args.runs)
+    after = measure(lambda: encode_after(callback, result), args.runs)
+    print(f"Result of {args.items} items ({size / 1024 / 1024:.2f} MiB encoded), average over {args.runs} runs")
+    print(f"before: {before * 1000:.2f} ms of CPU per result")
+    print(f"after:  {after * 1000:.2f} ms of CPU per result")
+    print(f"saved:  {(before - after) * 1000:.2f} ms of CPU per result ({(1 - after / before) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()